@@ -3,15 +3,19 @@
 #############################
 
 import os
-import openai
 from flask import Flask, render_template, request, jsonify
 from flask_cors import CORS
 
+from llm_client import AsyncTranslationClient
+
 # Make sure your API key is set in an environment variable, e.g.:
 # export OPENAI_API_KEY="sk-..."
 # or in your Render / Heroku dashboard config.
+# OPENAI_BASE_URL overrides the API endpoint, e.g. for a local stand-in server.
 
-openai.api_key = os.environ.get("OPENAI_API_KEY", "")
+# Shared per worker process: one keep-alive pool and in-flight limit for all
+# request threads
+llm_client = AsyncTranslationClient.from_env(api_key=os.environ.get("OPENAI_API_KEY", ""))
 
 app = Flask(__name__)
 CORS(app)
@@ -50,15 +54,8 @@ def run_code():
             }
         ]
 
-        # Call OpenAI ChatCompletion
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",  # or "gpt-4" if you have access
-            messages=messages,
-            temperature=0
-        )
-        
-        # Extract the assistant's reply
-        ai_reply = response.choices[0].message.content if response.choices else ""
+        # Call OpenAI ChatCompletion (model set by LLM_MODEL, default gpt-3.5-turbo)
+        ai_reply = llm_client.chat_blocking(messages, temperature=0)
 
         return jsonify({'output': ai_reply})
     
@@ -1,3 +1,10 @@
-from .main import app
+__all__ = ['app']
 
-__all__ = ['app'] 
\ No newline at end of file
+def __getattr__(name):
+    # The Flask app is created on first use, so standalone modules such as
+    # app.fair_queue can be imported without starting the server's setup
+    if name == 'app':
+        from .main import app
+        globals()['app'] = app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
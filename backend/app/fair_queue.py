@@ -0,0 +1,234 @@
+"""
+Weighted fair queuing bookkeeping shared by the execution schedulers.
+
+FairQueue orders jobs and tracks slots, queue depths and timings, but never
+blocks. The threaded scheduler in app.scheduler and the event-loop scheduler
+used by the FastAPI server build waiting on top of it, each with its own
+Ticket subclass that wakes a waiter when its job is dispatched. This module
+has no project imports, so either server can load it on its own.
+"""
+
+import heapq
+import itertools
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+class QueueFull(Exception):
+    """Raised when a client's queue, or the shared queue, is at its limit"""
+
+class QueueTimeout(Exception):
+    """Raised when a job waits longer than max_wait to start"""
+
+def parse_weights(spec: Optional[str]) -> Dict[str, float]:
+    """Parse "client=weight,client=weight" into a dict"""
+    weights = {}
+    for item in (spec or '').split(','):
+        if item.strip():
+            client, _, weight = item.partition('=')
+            weights[client.strip()] = float(weight)
+    return weights
+
+def percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+class Ticket:
+    """A job's place in the queue, and its timings"""
+
+    __slots__ = ('client', 'short', 'start_tag', 'finish_tag', 'seq',
+                 'enqueued', 'started', 'finished', 'cancelled')
+
+    def __init__(self, client: str, short: bool, start_tag: float, finish_tag: float, seq: int):
+        self.client = client
+        self.short = short
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.seq = seq
+        self.enqueued = time.monotonic()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.cancelled = False
+
+    def __lt__(self, other: 'Ticket') -> bool:
+        return (self.finish_tag, self.seq) < (other.finish_tag, other.seq)
+
+    def notify(self):
+        """Wake whoever waits for this job; called once it is dispatched"""
+
+    @property
+    def queue_wait(self) -> float:
+        return (self.started or time.monotonic()) - self.enqueued
+
+    @property
+    def exec_time(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+class FairQueue:
+    """
+    Weighted fair queuing of jobs from many clients onto a few execution slots.
+
+    Each client has its own queue. A job's finish tag is its size divided by
+    the client's weight, added to the later of the queue's virtual time and
+    the client's previous finish tag; the queued job with the smallest tag
+    runs next. A client submitting a large batch therefore waits behind its
+    own jobs while other clients' jobs are interleaved.
+
+    Jobs smaller than short_job_size go in a short lane. They can use any
+    slot, while other jobs can never take the last short_reserved slots, so
+    quick scripts are not stuck behind long ones.
+
+    Methods are not synchronized; subclasses that are used from several
+    threads hold a lock around them.
+    """
+
+    ticket_class = Ticket
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        short_reserved: int = 1,
+        max_queue_per_client: int = 8,
+        max_queue: int = 256,
+        short_job_size: int = 200,
+        max_wait: float = 30.0,
+        weights: Optional[Dict[str, float]] = None,
+        samples: int = 1024,
+    ):
+        self.max_concurrency = max_concurrency
+        self.short_reserved = min(short_reserved, max_concurrency - 1)
+        self.max_queue_per_client = max_queue_per_client
+        self.max_queue = max_queue
+        self.short_job_size = short_job_size
+        self.max_wait = max_wait
+        self.weights = weights or {}
+
+        self._short: List[Ticket] = []
+        self._long: List[Ticket] = []
+        self._seq = itertools.count()
+        self._virtual_time = 0.0
+        # client -> finish tag of its latest job
+        self._last_finish: Dict[str, float] = {}
+        # client -> jobs queued or running
+        self._active: Dict[str, int] = {}
+        self._queued: Dict[str, int] = {}
+        self._queued_total = 0
+        self._running = 0
+        self._running_long = 0
+
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._waits: Deque[float] = deque(maxlen=samples)
+        self._execs: Deque[float] = deque(maxlen=samples)
+
+    def is_short(self, size: int) -> bool:
+        return size < self.short_job_size
+
+    def submit(self, client: str, size: int) -> Ticket:
+        """Queue a job of size units (e.g. bytes of code); raises QueueFull"""
+        if self._queued_total >= self.max_queue:
+            self.rejected += 1
+            raise QueueFull('Execution queue is full')
+        if self._queued.get(client, 0) >= self.max_queue_per_client:
+            self.rejected += 1
+            raise QueueFull('Too many queued jobs for this client')
+        cost = max(size, 1) / self.weights.get(client, 1.0)
+        start_tag = max(self._virtual_time, self._last_finish.get(client, 0.0))
+        ticket = self.ticket_class(client, self.is_short(size), start_tag, start_tag + cost, next(self._seq))
+        self._last_finish[client] = ticket.finish_tag
+        self._queued[client] = self._queued.get(client, 0) + 1
+        self._active[client] = self._active.get(client, 0) + 1
+        self._queued_total += 1
+        heapq.heappush(self._short if ticket.short else self._long, ticket)
+        self._dispatch()
+        return ticket
+
+    def release(self, ticket: Ticket):
+        """Mark a running job as finished and start the next ones"""
+        ticket.finished = time.monotonic()
+        self._running -= 1
+        if not ticket.short:
+            self._running_long -= 1
+        self.completed += 1
+        self._waits.append(ticket.queue_wait)
+        self._execs.append(ticket.exec_time)
+        self._forget(ticket.client)
+        self._dispatch()
+
+    def cancel(self, ticket: Ticket):
+        """Give up a queued job's place; it will never be dispatched"""
+        ticket.cancelled = True
+        self._dequeue(ticket)
+        self._forget(ticket.client)
+
+    def _dispatch(self):
+        """Start queued jobs, smallest finish tag first, while slots are free"""
+        while self._running < self.max_concurrency:
+            self._drop_cancelled(self._short)
+            self._drop_cancelled(self._long)
+            candidates = []
+            if self._short:
+                candidates.append(self._short)
+            if self._long and self._running_long < self.max_concurrency - self.short_reserved:
+                candidates.append(self._long)
+            if not candidates:
+                return
+            lane = min(candidates, key=lambda heap: heap[0])
+            ticket = heapq.heappop(lane)
+            self._dequeue(ticket)
+            self._virtual_time = max(self._virtual_time, ticket.start_tag)
+            self._running += 1
+            if not ticket.short:
+                self._running_long += 1
+            ticket.started = time.monotonic()
+            ticket.notify()
+
+    def _drop_cancelled(self, heap: List[Ticket]):
+        while heap and heap[0].cancelled:
+            heapq.heappop(heap)
+
+    def _dequeue(self, ticket: Ticket):
+        self._queued[ticket.client] -= 1
+        if not self._queued[ticket.client]:
+            del self._queued[ticket.client]
+        self._queued_total -= 1
+
+    def _forget(self, client: str):
+        """Drop per-client state once a client has no queued or running jobs"""
+        self._active[client] -= 1
+        if not self._active[client]:
+            del self._active[client]
+            # The finish tag only matters while it is ahead of virtual time
+            if self._last_finish.get(client, 0.0) <= self._virtual_time:
+                self._last_finish.pop(client, None)
+        if not self._active:
+            # Idle: no one is owed service, so every client starts afresh
+            self._last_finish.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        waits = list(self._waits)
+        execs = list(self._execs)
+        return {
+            'running': self._running,
+            'queued': self._queued_total,
+            'queued_short': sum(not t.cancelled for t in self._short),
+            'clients_waiting': len(self._queued),
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'timed_out': self.timed_out,
+            'queue_wait_ms': {
+                'p50': percentile(waits, 0.5) * 1e3,
+                'p95': percentile(waits, 0.95) * 1e3,
+                'p99': percentile(waits, 0.99) * 1e3,
+            },
+            'exec_ms': {
+                'p50': percentile(execs, 0.5) * 1e3,
+                'p95': percentile(execs, 0.95) * 1e3,
+                'p99': percentile(execs, 0.99) * 1e3,
+            },
+        }
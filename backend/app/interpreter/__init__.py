@@ -6,7 +6,25 @@ allowing users to write Python code using English-like commands.
 """
 
 from .interpreter import AdvancedInterpreter
+from .diagnostics import ParseSessions
+from .loader import DataDirectory, DataLoadError
+from .output import CHANNELS, OutputBuffer, OutputRecord
+from .variable_store import CompactVariableStore
+from .snapshot import SessionSnapshots, SnapshotError, load_snapshot, save_snapshot
 
 __version__ = '0.1.0'
 __author__ = 'Anish Shinde'
-__all__ = ['AdvancedInterpreter'] 
\ No newline at end of file
+__all__ = [
+    'AdvancedInterpreter',
+    'CHANNELS',
+    'OutputBuffer',
+    'OutputRecord',
+    'ParseSessions',
+    'CompactVariableStore',
+    'DataDirectory',
+    'DataLoadError',
+    'SessionSnapshots',
+    'SnapshotError',
+    'load_snapshot',
+    'save_snapshot',
+] 
\ No newline at end of file
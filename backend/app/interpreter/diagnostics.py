@@ -0,0 +1,239 @@
+"""
+Parse-only diagnostics for editors.
+
+Lines are matched against the interpreter's command grammar without running
+anything. Whether a line is recognized depends only on its own text, so
+results are cached per line text and shared by every document; an edited
+document only re-parses the lines that changed.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from .interpreter import AdvancedInterpreter
+from .suggestions import SUGGESTIONS
+
+# Kinds of parsed lines
+BLANK = 'blank'
+COMMENT = 'comment'
+COMMAND = 'command'
+BLOCK = 'block'       # an "If ...:" header
+ERROR = 'error'       # no command matches
+
+class ConflictError(Exception):
+    """Raised when an edit targets an unknown document or an old version"""
+
+def _span(text: str, start: int, end: int, offset: int) -> Dict[str, Any]:
+    return {'start': start + offset, 'end': end + offset, 'text': text[start:end]}
+
+class LineParser:
+    """Parse single lines, caching results by line text"""
+
+    def __init__(self, max_entries: int = 20000):
+        self.max_entries = max_entries
+        self._interpreter = AdvancedInterpreter()
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def parse(self, raw: str) -> Dict[str, Any]:
+        """
+        Parse one source line. Column offsets refer to raw, including its
+        indentation. The returned dict is shared and must not be modified.
+        """
+        result = self._cache.get(raw)
+        if result is not None:
+            self._cache.move_to_end(raw)
+            self.hits += 1
+            return result
+        self.misses += 1
+        result = self._parse(raw)
+        self._cache[raw] = result
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return result
+
+    def _parse(self, raw: str) -> Dict[str, Any]:
+        line = raw.strip()
+        if not line:
+            return {'kind': BLANK}
+        if line.startswith('#'):
+            return {'kind': COMMENT}
+        offset = len(raw) - len(raw.lstrip())
+
+        # Same test as parse_program: the header's condition is evaluated
+        # rather than matched against the grammar
+        if line.lower().startswith('if') and line.endswith(':'):
+            condition = line[2:-1]
+            start = 2 + len(condition) - len(condition.lstrip())
+            end = len(line) - 1 - (len(condition) - len(condition.rstrip()))
+            return {
+                'kind': BLOCK,
+                'category': 'conditional',
+                'command': 'evaluate_condition',
+                'args': [_span(line, start, max(start, end), offset)],
+            }
+
+        decode = self._interpreter.decode_command
+        command = decode(line)
+        if command is None:
+            return {
+                'kind': ERROR,
+                'message': f"I don't understand: {line}",
+                'start': offset,
+                'end': offset + len(line),
+                # No session here, so only keywords are corrected
+                'suggestions': SUGGESTIONS.suggest(line, validate=lambda text: decode(text) is not None),
+            }
+        match = command.match
+        return {
+            'kind': COMMAND,
+            'category': command.category,
+            'command': command.handler,
+            'args': [
+                _span(line, *match.span(group), offset)
+                for group in range(1, match.re.groups + 1)
+                if match.start(group) != -1
+            ],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+def number_results(results: List[Dict[str, Any]], first_line: int = 1) -> List[Dict[str, Any]]:
+    """Attach 1-based line numbers to parse results"""
+    return [dict(result, line=number) for number, result in enumerate(results, start=first_line)]
+
+class Document:
+    """Lines of an open editor buffer and their parse results"""
+
+    __slots__ = ('lines', 'results', 'version', 'errors')
+
+    def __init__(self, lines: List[str], results: List[Dict[str, Any]]):
+        self.lines = lines
+        self.results = results
+        self.version = 1
+        self.errors = sum(result['kind'] == ERROR for result in results)
+
+class ParseSessions:
+    """
+    Open documents by id, for incremental parsing.
+
+    A client opens a document with its full text, then sends line-range
+    replacements against the version it last saw. Documents are evicted
+    least recently used first; an edit to an evicted document raises
+    ConflictError and the client resends the full text.
+    """
+
+    DOC_ID = re.compile(r'[A-Za-z0-9_-]{1,64}')
+
+    def __init__(self, max_documents: int = 1000, parser: Optional[LineParser] = None):
+        self.max_documents = max_documents
+        self.parser = parser if parser is not None else LineParser()
+        self._documents: "OrderedDict[str, Document]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def parse(self, code: str) -> Dict[str, Any]:
+        """Parse a whole buffer without keeping any state"""
+        with self._lock:
+            results = [self.parser.parse(line) for line in code.split('\n')]
+        return {
+            'lines': number_results(results),
+            'line_count': len(results),
+            'diagnostics': sum(result['kind'] == ERROR for result in results),
+        }
+
+    def open(self, doc_id: str, code: str) -> Dict[str, Any]:
+        """Parse a whole buffer and keep it as doc_id, replacing any earlier one"""
+        self._check_id(doc_id)
+        lines = code.split('\n')
+        with self._lock:
+            document = Document(lines, [self.parser.parse(line) for line in lines])
+            self._documents[doc_id] = document
+            self._documents.move_to_end(doc_id)
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+            return {
+                'doc_id': doc_id,
+                'version': document.version,
+                'lines': number_results(document.results),
+                'line_count': len(lines),
+                'diagnostics': document.errors,
+            }
+
+    def edit(self, doc_id: str, version: int, changes: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Apply line-range replacements in order and return results for the new
+        lines only. Each change has 0-based "start" and exclusive "end" line
+        indices into the document as left by the previous change, and the
+        replacement "lines"; lines outside the ranges keep their results.
+        """
+        self._check_id(doc_id)
+        parsed = []
+        with self._lock:
+            document = self._documents.get(doc_id)
+            if document is None:
+                raise ConflictError(f"Unknown document: {doc_id}")
+            if version != document.version:
+                raise ConflictError(f"Document {doc_id} is at version {document.version}, not {version}")
+            self._documents.move_to_end(doc_id)
+
+            if not isinstance(changes, list):
+                raise ValueError("changes must be a list")
+            edits = [self._validate_change(change) for change in changes]
+            # Check every range before touching the document
+            line_count = len(document.lines)
+            for start, end, lines in edits:
+                if not 0 <= start <= end <= line_count:
+                    raise ValueError(f"Line range {start}-{end} is outside a document of {line_count} lines")
+                line_count += len(lines) - (end - start)
+
+            for start, end, lines in edits:
+                results = [self.parser.parse(line) for line in lines]
+                document.errors -= sum(result['kind'] == ERROR for result in document.results[start:end])
+                document.errors += sum(result['kind'] == ERROR for result in results)
+                document.lines[start:end] = lines
+                document.results[start:end] = results
+                parsed.append({'start': start, 'end': end, 'lines': number_results(results, start + 1)})
+            document.version += 1
+            return {
+                'doc_id': doc_id,
+                'version': document.version,
+                'changes': parsed,
+                'line_count': len(document.lines),
+                'diagnostics': document.errors,
+            }
+
+    def close(self, doc_id: str) -> bool:
+        with self._lock:
+            return self._documents.pop(doc_id, None) is not None
+
+    def _check_id(self, doc_id: str):
+        if not isinstance(doc_id, str) or not self.DOC_ID.fullmatch(doc_id):
+            raise ValueError(f"Invalid document id: {doc_id!r}")
+
+    @staticmethod
+    def _validate_change(change: Any):
+        if not isinstance(change, dict):
+            raise ValueError("Each change must be an object")
+        start, end, lines = change.get('start'), change.get('end'), change.get('lines')
+        for name, value in (('start', start), ('end', end)):
+            if isinstance(value, bool) or not isinstance(value, int):
+                raise ValueError(f"Change {name} must be an integer")
+        if not isinstance(lines, list) or not all(isinstance(line, str) and '\n' not in line for line in lines):
+            raise ValueError("Change lines must be a list of single-line strings")
+        return start, end, lines
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {'documents': len(self._documents)}
+            stats['line_cache'] = self.parser.stats()
+            return stats
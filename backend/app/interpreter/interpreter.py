@@ -1,9 +1,18 @@
 import re
 import math
 import random
-from typing import Dict, Any, List
+import itertools
+from typing import Dict, Any, Iterable, List, Match, MutableMapping, NamedTuple, Optional, Tuple, Union
 import logging
 import traceback
+from array import array
+
+from .loader import DataDirectory, DataLoadError
+from .optimizer import optimize_program
+from .output import ECHO, ERROR, LazyData, OutputBuffer
+from .program import AddRun, Block, Line, Sort, Statement, parse_program
+from .suggestions import SUGGESTIONS, IndexPrefix, NgramIndex
+from .variable_store import CompactVariableStore, mapping_nbytes
 
 # Configure logging
 logging.basicConfig(
@@ -16,184 +25,377 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Shared, immutable tables built once at import time rather than per instance
+
+# Safe built-in functions exposed to evaluated expressions
+SAFE_BUILTINS = {
+    'abs': abs,
+    'len': len,
+    'max': max,
+    'min': min,
+    'sum': sum,
+    'round': round,
+    'str': str,
+    'int': int,
+    'float': float,
+    'list': list,
+    'dict': dict,
+    'set': set,
+    'tuple': tuple,
+    'math': math,
+    'random': random,
+}
+
+# Command patterns by category, compiled case-insensitively
+COMMAND_PATTERNS = {
+    category: tuple(re.compile(pattern, re.IGNORECASE) for pattern in patterns)
+    for category, patterns in {
+        'create_var': [
+            r'(?:Make|Create|Set|Let|Define) (?:a |an |the )?(?:new )?(?:number|string|list|dict|set|variable)? ?(?:called |named |as )?(\w+) (?:equal to|to|be|as|with) (.*)',
+        ],
+        'print': [
+            r'(?:Print|Show|Display|Output) (?:the )?(?:value of )?([^,]+)',
+            r'(?:Print|Show|Display|Output) ["\'](.+?)["\']',
+        ],
+        'math_ops': [
+            r'(?:Add|Plus|Increase) (\d+(?:\.\d+)?|\w+) (?:to|into) (\w+)',
+            r'(?:Multiply) (\w+) by (\d+(?:\.\d+)?|\w+)',
+            r'(?:Divide) (\w+) by (\d+(?:\.\d+)?|\w+)',
+            r'(?:Double) (\w+)',
+        ],
+        'string_ops': [
+            r'Convert (\w+) to (uppercase|lowercase)',
+            r'Join (\w+) with ["\'](.+?)["\']',
+        ],
+        'list_ops': [
+            r'(?:Add|Append) (\d+|\w+|(?:["\']).*?(?:["\'])) to (\w+)',
+            r'(?:Remove) (\d+|\w+|(?:["\']).*?(?:["\'])) from (\w+)',
+            r'Sort (\w+)',
+        ],
+        'math_funcs': [
+            r'Calculate(?: the)? square root of (\d+)',
+            r'Find(?: the)? maximum of (\w+)',
+            r'Generate(?: a)? random number between (\d+)(?:,| and )(\d+)',
+        ],
+        'string_format': [
+            r'Format string ["\'](.+?)["\'] with ["\'](.+?)["\']',
+        ],
+        'load': [
+            r'Load (?:the )?(\w+) from ["\']?([\w./-]+?)["\']?(?: into (\w+))?$',
+        ],
+        'conditional': [
+            r'If (.*?) is (bigger than|less than|equal to) (\d+):',
+        ],
+    }.items()
+}
+
+# Quoted-string printing, checked before the general command patterns
+DIRECT_PRINT_PATTERN = re.compile(r'(?:Print|Show|Display|Output) ["\'](.+?)["\']')
+
+MATH_OPERATION_PATTERNS = (
+    ('add', re.compile(r'Add|Plus|Increase', re.IGNORECASE)),
+    ('multiply', re.compile(r'Multiply', re.IGNORECASE)),
+    ('divide', re.compile(r'Divide', re.IGNORECASE)),
+    ('double', re.compile(r'Double', re.IGNORECASE)),
+)
+
+# Evaluation namespace shared by unseeded interpreters
+EVAL_GLOBALS = {"__builtins__": SAFE_BUILTINS}
+
+# Determinism classes reported by classify_determinism()
+DETERMINISTIC = 'deterministic'        # same code, same output
+RANDOM = 'random'                      # deterministic once the random generator is seeded
+NONDETERMINISTIC = 'nondeterministic'  # depends on input or other outside state
+
+# Words that make a script's output depend on more than its source text
+RANDOM_PATTERN = re.compile(r'\brandom\b', re.IGNORECASE)
+INPUT_PATTERN = re.compile(r'\binput\b', re.IGNORECASE)
+# Loaded files can change between runs
+LOAD_PATTERN = re.compile(r'load\b', re.IGNORECASE)
+
+# Natural language comparison phrases and their Python operators, applied in order
+CONDITION_TRANSLATIONS = (
+    ('is bigger than', '>'),
+    ('is greater than', '>'),
+    ('is less than', '<'),
+    ('equals', '=='),
+    ('is equal to', '=='),
+    ('is not equal to', '!='),
+    ('is greater than or equal to', '>='),
+    ('is less than or equal to', '<='),
+    ('and', 'and'),
+    ('or', 'or'),
+    ('not', 'not'),
+    ('contains', 'in'),
+    ('is in', 'in'),
+    ('is', '=='),
+)
+
+class Command(NamedTuple):
+    """A line matched against the command grammar"""
+    category: str
+    handler: str     # name of the AdvancedInterpreter method that runs it
+    args: Tuple
+    match: Match
+
 class AdvancedInterpreter:
-    def __init__(self):
-        self.variables: Dict[str, Any] = {}
-        self.output: List[str] = []
-        
-        # Initialize safe built-in functions
-        self.safe_builtins = {
-            'abs': abs,
-            'len': len,
-            'max': max,
-            'min': min,
-            'sum': sum,
-            'round': round,
-            'str': str,
-            'int': int,
-            'float': float,
-            'list': list,
-            'dict': dict,
-            'set': set,
-            'tuple': tuple,
-            'math': math,
-            'random': random,
-        }
-
-        # Define command patterns
-        self.command_patterns = {
-            'create_var': [
-                r'(?:Make|Create|Set|Let|Define) (?:a |an |the )?(?:new )?(?:number|string|list|dict|set|variable)? ?(?:called |named |as )?(\w+) (?:equal to|to|be|as|with) (.*)',
-            ],
-            'print': [
-                r'(?:Print|Show|Display|Output) (?:the )?(?:value of )?([^,]+)',
-                r'(?:Print|Show|Display|Output) ["\'](.+?)["\']',
-            ],
-            'math_ops': [
-                r'(?:Add|Plus|Increase) (\d+(?:\.\d+)?|\w+) (?:to|into) (\w+)',
-                r'(?:Multiply) (\w+) by (\d+(?:\.\d+)?|\w+)',
-                r'(?:Divide) (\w+) by (\d+(?:\.\d+)?|\w+)',
-                r'(?:Double) (\w+)',
-            ],
-            'string_ops': [
-                r'Convert (\w+) to (uppercase|lowercase)',
-                r'Join (\w+) with ["\'](.+?)["\']',
-            ],
-            'list_ops': [
-                r'(?:Add|Append) (\d+|\w+|(?:["\']).*?(?:["\'])) to (\w+)',
-                r'(?:Remove) (\d+|\w+|(?:["\']).*?(?:["\'])) from (\w+)',
-                r'Sort (\w+)',
-            ],
-            'math_funcs': [
-                r'Calculate(?: the)? square root of (\d+)',
-                r'Find(?: the)? maximum of (\w+)',
-                r'Generate(?: a)? random number between (\d+)(?:,| and )(\d+)',
-            ],
-            'string_format': [
-                r'Format string ["\'](.+?)["\'] with ["\'](.+?)["\']',
-            ],
-            'conditional': [
-                r'If (.*?) is (bigger than|less than|equal to) (\d+):',
-            ],
-        }
-
-    def process_code(self, code: str) -> str:
-        """Process multiple lines of code"""
-        self.output = []
+    # Per-instance state is the variable store, the output buffer, for seeded
+    # runs a private random generator and evaluation namespace, an index of
+    # variable names built on the first unrecognized line, and the directory
+    # "Load" commands read from
+    __slots__ = ('variables', 'output', 'rng', 'eval_globals', 'name_index', 'data_dir')
+
+    safe_builtins = SAFE_BUILTINS
+    command_patterns = COMMAND_PATTERNS
+
+    def __init__(
+        self,
+        variables: Optional[MutableMapping[str, Any]] = None,
+        compact: bool = False,
+        data_dir: Optional[DataDirectory] = None,
+    ):
+        if variables is None:
+            variables = CompactVariableStore() if compact else {}
+        self.variables: MutableMapping[str, Any] = variables
+        self.output = OutputBuffer()
+        self.rng = random
+        self.eval_globals = EVAL_GLOBALS
+        self.name_index: Optional[NgramIndex] = None
+        self.data_dir = data_dir
+
+    def seed(self, seed: int):
+        """Use a private random generator seeded with seed, for reproducible runs"""
+        self.rng = random.Random(seed)
+        self.eval_globals = {"__builtins__": SAFE_BUILTINS, "random": self.rng}
+
+    @staticmethod
+    def classify_determinism(code: str) -> str:
+        """Classify whether running code twice gives the same output"""
+        result = DETERMINISTIC
+        for line in code.split('\n'):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if INPUT_PATTERN.search(line) or LOAD_PATTERN.match(line):
+                return NONDETERMINISTIC
+            if RANDOM_PATTERN.search(line):
+                result = RANDOM
+        return result
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by this session's variables"""
+        return mapping_nbytes(self.variables)
+
+    def process_code(
+        self,
+        code: str,
+        channels: Optional[Iterable[str]] = None,
+        seed: Optional[int] = None,
+        optimize: bool = False,
+    ) -> str:
+        """
+        Process multiple lines of code.
+
+        Output is collected as typed records in self.output; only records on
+        the requested channels (default: all) are kept and rendered. A seed
+        makes random numbers reproducible. With optimize=True the program is
+        rewritten by the optimizer first; this only happens when the echo
+        channel is not requested, as optimized runs skip echo messages.
+        """
+        self.output = OutputBuffer(channels)
+        if seed is not None:
+            self.seed(seed)
         try:
-            lines = code.strip().split('\n')
-            i = 0
-            while i < len(lines):
-                line = lines[i].strip()
-                if line and not line.startswith('#'):
-                    if line.lower().startswith('if') and line.endswith(':'):
-                        # Handle conditional blocks
-                        condition = line[2:-1].strip()
-                        block_lines = []
-                        i += 1
-                        while i < len(lines) and (lines[i].startswith('    ') or lines[i].startswith('\t')):
-                            block_lines.append(lines[i].strip())
-                            i += 1
-                        if self.evaluate_condition(condition):
-                            for block_line in block_lines:
-                                self.process_line(block_line)
-                        continue
-                    else:
-                        self.process_line(line)
-                i += 1
-            return '\n'.join(self.output)
+            program = parse_program(code)
+            if optimize and not self.output.wants(ECHO):
+                program = optimize_program(program, self)
+            self.run_program(program)
+            return self.output.render()
         except Exception as e:
             error_msg = f"Error processing code: {str(e)}"
             logger.error(f"{error_msg}\n{traceback.format_exc()}")
-            self.output.append(f"Error: {str(e)}")
-            return '\n'.join(self.output)
+            self.output.error(f"Error: {str(e)}")
+            return self.output.render()
+
+    def run_program(self, program: List[Statement]):
+        """Execute parsed (and possibly optimized) statements in order"""
+        # Variables whose latest sort succeeded, for skipping redundant sorts
+        sorted_vars: Dict[str, bool] = {}
+        for statement in program:
+            if type(statement) is Line:
+                self.output.line = statement.number
+                self.process_line(statement.text)
+            elif type(statement) is Block:
+                # Handle conditional blocks
+                self.output.line = statement.number
+                if self.evaluate_condition(statement.condition):
+                    for line in statement.body:
+                        self.output.line = line.number
+                        self.process_line(line.text)
+            elif type(statement) is AddRun:
+                self.add_run(statement)
+            elif type(statement) is Sort:
+                if statement.redundant and sorted_vars.get(statement.var_name):
+                    continue
+                self.output.line = statement.line.number
+                sorted_vars[statement.var_name] = self.process_line(statement.line.text) is True
+
+    def add_run(self, run: AddRun):
+        """Apply a folded run of additions to one variable"""
+        value = self.variables[run.var_name] if run.var_name in self.variables else None
+        if type(value) not in (int, float):
+            # Each line reports its own error, exactly as without folding
+            for line in run.lines:
+                self.output.line = line.number
+                self.process_line(line.text)
+            return
+
+        amounts = run.amounts
+        # Integral values stay exact in float arithmetic up to 2**53, so one
+        # addition of the total gives the same result as adding step by step
+        if all(amount.is_integer() for amount in amounts):
+            total = sum(amounts)
+            # Compare before converting: huge ints cannot become floats
+            if abs(value) <= 2 ** 53 - total and float(value).is_integer():
+                self.variables[run.var_name] = value + total
+                return
+
+        for index, amount in enumerate(amounts):
+            try:
+                value = value + amount
+            except Exception:
+                # Let the remaining lines fail and report as they would unfolded
+                self.variables[run.var_name] = value
+                for line in run.lines[index:]:
+                    self.output.line = line.number
+                    self.process_line(line.text)
+                return
+        self.variables[run.var_name] = value
+
+    @classmethod
+    def decode_command(cls, line: str) -> Optional[Command]:
+        """Match a stripped line against the command grammar without running it"""
+        # Handle direct string printing first
+        if line.startswith(('Print', 'Show', 'Display', 'Output')) and ('"' in line or "'" in line):
+            match = DIRECT_PRINT_PATTERN.match(line)
+            if match:
+                return Command('print', 'print_text', (match.group(1),), match)
+
+        for category, patterns in cls.command_patterns.items():
+            for pattern in patterns:
+                match = pattern.match(line)
+                if match:
+                    if category == 'create_var':
+                        name, value = match.groups()
+                        return Command(category, 'create_variable', (name, value), match)
+                    elif category == 'print':
+                        var_name = match.group(1).strip()
+                        return Command(category, 'print_value', (var_name,), match)
+                    elif category == 'math_ops':
+                        if 'Double' in pattern.pattern:
+                            var_name = match.group(1)
+                            return Command(category, 'math_operation', ('double', 2, var_name), match)
+                        else:
+                            if 'Multiply' in line or 'Divide' in line:
+                                var_name, amount = match.groups()
+                            else:
+                                amount, var_name = match.groups()
+                            operation = cls._determine_math_operation(line)
+                            return Command(category, 'math_operation', (operation, amount, var_name), match)
+                    elif category == 'string_ops':
+                        if 'Convert' in line:
+                            var_name, operation = match.groups()
+                            return Command(category, 'string_operation', (var_name, operation), match)
+                        elif 'Join' in line:
+                            var_name, text = match.groups()
+                            return Command(category, 'string_join', (var_name, text), match)
+                    elif category == 'list_ops':
+                        if 'Sort' in pattern.pattern:
+                            var_name = match.group(1)
+                            return Command(category, 'list_operation', ('sort', None, var_name), match)
+                        else:
+                            value, var_name = match.groups()
+                            operation = 'remove' if line[:6].lower() == 'remove' else 'add'
+                            return Command(category, 'list_operation', (operation, value, var_name), match)
+                    elif category == 'math_funcs':
+                        if 'random' in pattern.pattern:
+                            start, end = match.groups()
+                            return Command(category, 'math_function', ('random', f"{start},{end}"), match)
+                        elif 'square root' in pattern.pattern:
+                            value = match.group(1)
+                            return Command(category, 'math_function', ('sqrt', value), match)
+                        else:
+                            value = match.group(1)
+                            return Command(category, 'math_function', ('max', value), match)
+                    elif category == 'string_format':
+                        template, value = match.groups()
+                        return Command(category, 'string_format', (template, value), match)
+                    elif category == 'load':
+                        name, filename, target = match.groups()
+                        return Command(category, 'load_data', (name, filename, target), match)
+                    elif category == 'conditional':
+                        var_name, operator, value = match.groups()
+                        return Command(category, 'handle_conditional', (var_name, operator, value), match)
+        return None
 
     def process_line(self, line: str):
         """Process a single line of natural language input"""
         try:
             line = line.strip()
             logger.info(f"Processing line: {line}")
-            
-            # Handle direct string printing first
-            if line.startswith(('Print', 'Show', 'Display', 'Output')) and ('"' in line or "'" in line):
-                match = re.match(r'(?:Print|Show|Display|Output) ["\'](.+?)["\']', line)
-                if match:
-                    self.output.append(match.group(1))
-                    return
 
-            for category, patterns in self.command_patterns.items():
-                for pattern in patterns:
-                    match = re.match(pattern, line, re.IGNORECASE)
-                    if match:
-                        logger.info(f"Matched pattern in category: {category}")
-                        if category == 'create_var':
-                            name, value = match.groups()
-                            return self.create_variable(name, value)
-                        elif category == 'print':
-                            var_name = match.group(1).strip()
-                            return self.print_value(var_name)
-                        elif category == 'math_ops':
-                            if 'Double' in pattern:
-                                var_name = match.group(1)
-                                return self.math_operation('double', 2, var_name)
-                            else:
-                                if 'Multiply' in line or 'Divide' in line:
-                                    var_name, amount = match.groups()
-                                else:
-                                    amount, var_name = match.groups()
-                                operation = self._determine_math_operation(line)
-                                return self.math_operation(operation, amount, var_name)
-                        elif category == 'string_ops':
-                            if 'Convert' in line:
-                                var_name, operation = match.groups()
-                                return self.string_operation(var_name, operation)
-                            elif 'Join' in line:
-                                var_name, text = match.groups()
-                                return self.string_join(var_name, text)
-                        elif category == 'list_ops':
-                            if 'Sort' in pattern:
-                                var_name = match.group(1)
-                                return self.list_operation('sort', None, var_name)
-                            else:
-                                value, var_name = match.groups()
-                                operation = 'add' if 'Add' in line else 'remove'
-                                return self.list_operation(operation, value, var_name)
-                        elif category == 'math_funcs':
-                            if 'random' in pattern:
-                                start, end = match.groups()
-                                return self.math_function('random', f"{start},{end}")
-                            elif 'square root' in pattern:
-                                value = match.group(1)
-                                return self.math_function('sqrt', value)
-                            else:
-                                value = match.group(1)
-                                return self.math_function('max', value)
-                        elif category == 'string_format':
-                            template, value = match.groups()
-                            return self.string_format(template, value)
-                        elif category == 'conditional':
-                            var_name, operator, value = match.groups()
-                            return self.handle_conditional(var_name, operator, value)
+            command = self.decode_command(line)
+            if command is not None:
+                logger.info(f"Matched pattern in category: {command.category}")
+                return getattr(self, command.handler)(*command.args)
 
             logger.warning(f"No matching pattern found for: {line}")
-            self.output.append(f"I don't understand: {line}")
+            if self.output.wants(ERROR):
+                # Suggestions are only built if the record's details are rendered,
+                # from the names defined so far; the closure holds the name index
+                # but not the session, so cached records do not keep it alive
+                index = self.names()
+                names = index.prefix(len(index))
+                suggest_for = self.suggest_for
+                details = LazyData(lambda: {'suggestions': suggest_for(line, names)})
+                self.output.error(f"I don't understand: {line}", details)
 
         except Exception as e:
             error_msg = f"Error processing line: {str(e)}"
             stack_trace = traceback.format_exc()
             logger.error(f"{error_msg}\n{stack_trace}")
-            self.output.append(f"Error: {str(e)}")
-
-    def _determine_math_operation(self, line: str) -> str:
+            self.output.error(f"Error: {str(e)}")
+
+    def suggest(self, line: str, limit: int = 3) -> List[Dict[str, Any]]:
+        """Closest commands for an unrecognized line, using this session's variable names"""
+        return self.suggest_for(line, self.names(), limit)
+
+    def names(self) -> NgramIndex:
+        """This session's variable names, indexed for spelling correction"""
+        if self.name_index is None:
+            self.name_index = NgramIndex()
+        # Scripts only ever add variables, and stores keep insertion order, so
+        # a changed count means the names past the indexed ones are new
+        if len(self.name_index) != len(self.variables):
+            self.name_index.update(itertools.islice(self.variables, len(self.name_index), None))
+        return self.name_index
+
+    @classmethod
+    def suggest_for(cls, line: str, names: Union[NgramIndex, IndexPrefix], limit: int = 3) -> List[Dict[str, Any]]:
+        """Closest commands for an unrecognized line, correcting to the given variable names"""
+        return SUGGESTIONS.suggest(
+            line,
+            names=names,
+            validate=lambda text: cls.decode_command(text) is not None,
+            limit=limit,
+        )
+
+    @staticmethod
+    def _determine_math_operation(line: str) -> str:
         """Helper method to determine the math operation from the command"""
-        if re.search(r'Add|Plus|Increase', line, re.IGNORECASE):
-            return 'add'
-        elif re.search(r'Multiply', line, re.IGNORECASE):
-            return 'multiply'
-        elif re.search(r'Divide', line, re.IGNORECASE):
-            return 'divide'
-        elif re.search(r'Double', line, re.IGNORECASE):
-            return 'double'
+        for operation, pattern in MATH_OPERATION_PATTERNS:
+            if pattern.search(line):
+                return operation
         return 'unknown'
 
     def create_variable(self, name: str, value: str):
@@ -203,7 +405,7 @@ class AdvancedInterpreter:
             clean_value = value.strip('"\'')
             try:
                 # Attempt to evaluate the value as a Python expression
-                evaluated_value = eval(clean_value, {"__builtins__": self.safe_builtins}, self.variables)
+                evaluated_value = eval(clean_value, self.eval_globals, self.variables)
                 logger.debug(f"Evaluated value: {evaluated_value} (type: {type(evaluated_value)})")
             except Exception as eval_error:
                 # If evaluation fails, treat the value as a raw string
@@ -211,41 +413,48 @@ class AdvancedInterpreter:
                 evaluated_value = clean_value
 
             self.variables[name] = evaluated_value
-            self.output.append(f"Created {name} = {evaluated_value}")
+            self.output.echo("Created {} = {}", name, evaluated_value)
             logger.info(f"Successfully created variable: {name} = {evaluated_value}")
             
         except Exception as e:
             error_msg = f"Error creating variable '{name}': {str(e)}"
             stack_trace = traceback.format_exc()
             logger.error(f"{error_msg}\n{stack_trace}")
-            self.output.append(f"Error creating variable: {str(e)}")
+            self.output.error(f"Error creating variable: {str(e)}")
+
+    def print_text(self, text: str):
+        """Print literal text"""
+        self.output.print(text)
 
     def print_value(self, value: str):
         """Print a value or variable"""
         try:
             clean_value = value.strip()
             if clean_value in self.variables:
-                self.output.append(str(self.variables[clean_value]))
+                self.output.print(str(self.variables[clean_value]))
             else:
                 try:
-                    result = eval(clean_value, {"__builtins__": self.safe_builtins}, self.variables)
-                    self.output.append(str(result))
+                    result = eval(clean_value, self.eval_globals, self.variables)
+                    self.output.print(str(result))
                 except:
-                    self.output.append(clean_value)
+                    self.output.print(clean_value)
         except Exception as e:
-            self.output.append(f"Error printing value: {str(e)}")
+            self.output.error(f"Error printing value: {str(e)}")
             logger.error(f"Error in print_value: {str(e)}")
 
     def math_operation(self, operation: str, amount: Any, var_name: str):
         """Handle basic math operations"""
         try:
             if var_name not in self.variables:
-                self.output.append(f"Variable '{var_name}' not found")
+                self.output.error(f"Variable '{var_name}' not found")
                 return
 
             original = self.variables[var_name]
+            if operation == 'add' and isinstance(original, list):
+                # "Add 5 to numbers" appends, like "Append 5 to numbers"
+                return self.list_operation('add', amount, var_name)
             if not isinstance(original, (int, float)):
-                self.output.append(f"Cannot perform math operation on non-numeric value: {var_name}")
+                self.output.error(f"Cannot perform math operation on non-numeric value: {var_name}")
                 return
 
             # Convert amount to number if it's a string
@@ -256,7 +465,7 @@ class AdvancedInterpreter:
                     if amount in self.variables:
                         amount = self.variables[amount]
                     else:
-                        self.output.append(f"Invalid number: {amount}")
+                        self.output.error(f"Invalid number: {amount}")
                         return
 
             result = None
@@ -266,77 +475,103 @@ class AdvancedInterpreter:
                 result = original * amount
             elif operation == 'divide':
                 if amount == 0:
-                    self.output.append("Cannot divide by zero")
+                    self.output.error("Cannot divide by zero")
                     return
                 result = original / amount
             elif operation == 'double':
                 result = original * 2
 
             self.variables[var_name] = result
-            self.output.append(f"Updated {var_name} from {original} to {result}")
+            self.output.echo("Updated {} from {} to {}", var_name, original, result)
 
         except Exception as e:
-            self.output.append(f"Error in math operation: {str(e)}")
+            self.output.error(f"Error in math operation: {str(e)}")
             logger.error(f"Error in math_operation: {str(e)}")
 
     def string_operation(self, var_name: str, operation: str):
         """Handle string operations"""
         try:
             if var_name not in self.variables:
-                self.output.append(f"Variable '{var_name}' not found")
+                self.output.error(f"Variable '{var_name}' not found")
                 return
 
             value = self.variables[var_name]
             if not isinstance(value, str):
-                self.output.append(f"Cannot perform string operation on non-string value: {var_name}")
+                self.output.error(f"Cannot perform string operation on non-string value: {var_name}")
                 return
 
             if operation.lower() == 'uppercase':
                 result = value.upper()
                 self.variables[var_name] = result
-                self.output.append(f"Updated {var_name} to {result}")
+                self.output.echo("Updated {} to {}", var_name, result)
             elif operation.lower() == 'lowercase':
                 result = value.lower()
                 self.variables[var_name] = result
-                self.output.append(f"Updated {var_name} to {result}")
+                self.output.echo("Updated {} to {}", var_name, result)
             else:
-                self.output.append(f"Unknown string operation: {operation}")
+                self.output.error(f"Unknown string operation: {operation}")
 
         except Exception as e:
-            self.output.append(f"Error in string operation: {str(e)}")
+            self.output.error(f"Error in string operation: {str(e)}")
             logger.error(f"Error in string_operation: {str(e)}")
 
     def string_join(self, var_name: str, text: str):
         """Handle joining strings"""
         try:
             if var_name not in self.variables:
-                self.output.append(f"Variable '{var_name}' not found")
+                self.output.error(f"Variable '{var_name}' not found")
                 return
 
             value = self.variables[var_name]
             if not isinstance(value, str):
-                self.output.append(f"Cannot join non-string value: {var_name}")
+                self.output.error(f"Cannot join non-string value: {var_name}")
                 return
 
             text = text.strip('"\'')
             result = value + text
             self.variables[var_name] = result
-            self.output.append(f"Updated {var_name} to {result}")
+            self.output.echo("Updated {} to {}", var_name, result)
 
         except Exception as e:
-            self.output.append(f"Error joining strings: {str(e)}")
+            self.output.error(f"Error joining strings: {str(e)}")
             logger.error(f"Error in string_join: {str(e)}")
 
+    def load_data(self, name: str, filename: str, target: Optional[str] = None):
+        """Load a CSV column or JSON array from the data directory into a variable"""
+        target = target or name
+        if self.data_dir is None:
+            self.output.error("Loading files is not enabled")
+            return
+        try:
+            values = self.data_dir.load(filename, name)
+        except DataLoadError as e:
+            self.output.error(f"Cannot load {filename}: {str(e)}")
+            return
+        except OSError as e:
+            self.output.error(f"Cannot read {filename}: {e.strerror}")
+            logger.error(f"Error in load_data: {str(e)}")
+            return
+
+        if type(values) is array:
+            if hasattr(self.variables, 'set_array'):
+                # Numeric data stays in its typed array
+                self.variables.set_array(target, values)
+            else:
+                self.variables[target] = values.tolist()
+        else:
+            self.variables[target] = values
+        self.output.echo("Loaded {} values from {} into {}", len(values), filename, target)
+
     def list_operation(self, operation: str, value: Any, var_name: str):
-        """Handle list operations"""
+        """Handle list operations, returning True when the list was updated"""
         try:
             if var_name not in self.variables:
-                self.output.append(f"Variable '{var_name}' not found")
+                self.output.error(f"Variable '{var_name}' not found")
                 return
 
             lst = self.variables[var_name]
             if not isinstance(lst, list):
-                self.output.append(f"Cannot perform list operation on non-list value: {var_name}")
+                self.output.error(f"Cannot perform list operation on non-list value: {var_name}")
                 return
 
             if operation == 'add':
@@ -350,7 +585,8 @@ class AdvancedInterpreter:
                 
                 lst.append(element)
                 self.variables[var_name] = lst
-                self.output.append(f"Updated {var_name} to {lst}")
+                self.output.echo("Updated {} to {}", var_name, lst)
+                return True
 
             elif operation == 'remove':
                 try:
@@ -361,20 +597,22 @@ class AdvancedInterpreter:
                 if element in lst:
                     lst.remove(element)
                     self.variables[var_name] = lst
-                    self.output.append(f"Updated {var_name} to {lst}")
+                    self.output.echo("Updated {} to {}", var_name, lst)
+                    return True
                 else:
-                    self.output.append(f"Element {element} not found in {var_name}")
+                    self.output.error(f"Element {element} not found in {var_name}")
 
             elif operation == 'sort':
                 try:
                     lst.sort()
                     self.variables[var_name] = lst
-                    self.output.append(f"Updated {var_name} to {lst}")
+                    self.output.echo("Updated {} to {}", var_name, lst)
+                    return True
                 except TypeError:
-                    self.output.append(f"Cannot sort {var_name} - list contains mixed types")
+                    self.output.error(f"Cannot sort {var_name} - list contains mixed types")
 
         except Exception as e:
-            self.output.append(f"Error in list operation: {str(e)}")
+            self.output.error(f"Error in list operation: {str(e)}")
             logger.error(f"Error in list_operation: {str(e)}")
 
     def math_function(self, func: str, value: Any):
@@ -384,33 +622,33 @@ class AdvancedInterpreter:
                 try:
                     num = float(value)
                     result = math.sqrt(num)
-                    self.output.append(f"Square root of {value} is {result}")
+                    self.output.print(f"Square root of {value} is {result}")
                 except ValueError:
-                    self.output.append(f"Cannot calculate square root of non-numeric value: {value}")
+                    self.output.error(f"Cannot calculate square root of non-numeric value: {value}")
             
             elif func == 'max':
                 if value in self.variables and isinstance(self.variables[value], list):
                     try:
                         result = max(self.variables[value])
-                        self.output.append(f"Maximum of {value} is {result}")
+                        self.output.print(f"Maximum of {value} is {result}")
                     except TypeError:
-                        self.output.append(f"Cannot find maximum of list with mixed types")
+                        self.output.error(f"Cannot find maximum of list with mixed types")
                 else:
-                    self.output.append(f"'{value}' is not a list")
+                    self.output.error(f"'{value}' is not a list")
             
             elif func == 'random':
                 try:
                     start, end = map(int, value.split(','))
-                    result = random.randint(start, end)
-                    self.output.append(f"Generated random number between {start} and {end}: {result}")
+                    result = self.rng.randint(start, end)
+                    self.output.print(f"Generated random number between {start} and {end}: {result}")
                 except ValueError:
-                    self.output.append(f"Invalid range for random number: {value}")
+                    self.output.error(f"Invalid range for random number: {value}")
             
             else:
-                self.output.append(f"Unknown math function: {func}")
+                self.output.error(f"Unknown math function: {func}")
                 
         except Exception as e:
-            self.output.append(f"Error in math function: {str(e)}")
+            self.output.error(f"Error in math function: {str(e)}")
             logger.error(f"Error in math_function: {str(e)}")
 
     def string_format(self, template: str, value: str):
@@ -423,14 +661,14 @@ class AdvancedInterpreter:
             # Format the string
             try:
                 formatted = template.format(value)
-                self.output.append(formatted)
+                self.output.print(formatted)
             except KeyError:
-                self.output.append(f"Invalid format string: {template}")
+                self.output.error(f"Invalid format string: {template}")
             except IndexError:
-                self.output.append(f"Missing values for format string: {template}")
+                self.output.error(f"Missing values for format string: {template}")
                 
         except Exception as e:
-            self.output.append(f"Error formatting string: {str(e)}")
+            self.output.error(f"Error formatting string: {str(e)}")
             logger.error(f"Error in string_format: {str(e)}")
 
     def evaluate_condition(self, condition: str) -> bool:
@@ -439,32 +677,15 @@ class AdvancedInterpreter:
             # Translate natural language condition to Python condition
             condition = self.translate_condition(condition)
             logger.info(f"Evaluating condition: {condition}")
-            return eval(condition, {"__builtins__": self.safe_builtins}, self.variables)
+            return eval(condition, self.eval_globals, self.variables)
         except Exception as e:
-            self.output.append(f"Error evaluating condition: {str(e)}")
+            self.output.error(f"Error evaluating condition: {str(e)}")
             logger.error(f"Error in evaluate_condition method: {str(e)}")
             return False
 
     def translate_condition(self, condition: str) -> str:
         """Translate natural language conditions to Python syntax"""
-        translations = {
-            'is bigger than': '>',
-            'is greater than': '>',
-            'is less than': '<',
-            'equals': '==',
-            'is equal to': '==',
-            'is not equal to': '!=',
-            'is greater than or equal to': '>=',
-            'is less than or equal to': '<=',
-            'and': 'and',
-            'or': 'or',
-            'not': 'not',
-            'contains': 'in',
-            'is in': 'in',
-            'is': '=='
-        }
-
-        for phrase, symbol in translations.items():
+        for phrase, symbol in CONDITION_TRANSLATIONS:
             condition = condition.replace(phrase, symbol)
         logger.info(f"Translated condition to Python syntax: {condition}")
         return condition
@@ -473,14 +694,14 @@ class AdvancedInterpreter:
         """Handle conditional statements"""
         try:
             if var_name not in self.variables:
-                self.output.append(f"Variable '{var_name}' not found")
+                self.output.error(f"Variable '{var_name}' not found")
                 return False
             
             var_value = self.variables[var_name]
             try:
                 value = float(value)
             except ValueError:
-                self.output.append(f"Cannot compare with non-numeric value: {value}")
+                self.output.error(f"Cannot compare with non-numeric value: {value}")
                 return False
             
             if operator == 'bigger than':
@@ -490,11 +711,11 @@ class AdvancedInterpreter:
             elif operator == 'equal to':
                 return var_value == value
             else:
-                self.output.append(f"Unknown comparison operator: {operator}")
+                self.output.error(f"Unknown comparison operator: {operator}")
                 return False
                 
         except Exception as e:
-            self.output.append(f"Error in conditional: {str(e)}")
+            self.output.error(f"Error in conditional: {str(e)}")
             logger.error(f"Error in handle_conditional: {str(e)}")
             return False
  
\ No newline at end of file
@@ -0,0 +1,274 @@
+"""
+Streaming loaders for "Load <name> from <file>" commands.
+
+Files are read from a single data directory and parsed in batches, so large
+numeric files go straight into typed arrays instead of building a list of
+Python objects first. CSV files are read row by row through the csv module;
+a JSON file holding a flat array is read in fixed-size chunks, and any other
+JSON document is parsed whole. Every load is capped at max_bytes.
+"""
+
+from array import array
+import csv
+import json
+import os
+import re
+from typing import Any, Iterable, Iterator, List, Optional, Union
+
+from .variable_store import FLOAT_TYPECODE, INT_TYPECODE, INT64_MAX, INT64_MIN
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Rows converted together when loading a CSV file
+CSV_BATCH_ROWS = 8192
+# Characters read at a time when streaming a one-column CSV file or JSON array
+CSV_CHUNK_CHARS = 1 << 20
+JSON_CHUNK_CHARS = 1 << 20
+
+# Characters that need the csv module: delimiters, quoting and spaces
+_CSV_SYNTAX = re.compile(r'[,"\' \t]')
+
+class DataLoadError(Exception):
+    """Raised when a data file cannot be found, read or parsed"""
+
+def _number(text: str) -> Union[int, float, str]:
+    """A CSV field as an int or float if it is one, else the text itself"""
+    try:
+        return int(text)
+    except ValueError:
+        try:
+            return float(text)
+        except ValueError:
+            return text
+
+def _has_long_int(fields: List[str]) -> bool:
+    """Whether any field is an integer beyond int64, which a float would round"""
+    # Such an integer has at least 19 digits, so short batches are cleared at once
+    if max(map(len, fields), default=0) < 19:
+        return False
+    return any(type(value) is int and not INT64_MIN <= value <= INT64_MAX for value in map(_number, fields))
+
+class ValueBuilder:
+    """
+    Accumulates loaded values in the most compact form that holds them all:
+    an int64 array, a float64 array once any value is fractional, or a plain
+    list once any value is not a number or is an integer beyond int64.
+    """
+
+    __slots__ = ('values',)
+
+    def __init__(self):
+        self.values: Union[array, list] = array(INT_TYPECODE)
+
+    def extend_text(self, fields: List[str]):
+        """Add CSV fields, converting each batch in one pass where possible"""
+        values = self.values
+        if type(values) is array:
+            if values.typecode == INT_TYPECODE:
+                try:
+                    values.extend(array(INT_TYPECODE, map(int, fields)))
+                    return
+                except (ValueError, OverflowError):
+                    pass
+            try:
+                floats = array(FLOAT_TYPECODE, map(float, fields))
+            except ValueError:
+                self.values = values.tolist()
+            else:
+                if not _has_long_int(fields):
+                    self._promote().extend(floats)
+                    return
+                # Keep long integers exact rather than rounding them to floats
+                self.values = values.tolist()
+        self.values.extend(map(_number, fields))
+
+    def extend(self, items: List[Any]):
+        """Add already parsed values, such as the items of a JSON array"""
+        values = self.values
+        if type(values) is array:
+            # Exact type checks keep bools, and ints beyond int64, out of arrays
+            ints = all(type(item) is int and INT64_MIN <= item <= INT64_MAX for item in items)
+            if ints and values.typecode == INT_TYPECODE:
+                values.extend(items)
+                return
+            if ints or all(type(item) is float or (type(item) is int and INT64_MIN <= item <= INT64_MAX)
+                           for item in items):
+                self._promote().extend(map(float, items))
+                return
+            self.values = values.tolist()
+        self.values.extend(items)
+
+    def _promote(self) -> array:
+        if self.values.typecode == INT_TYPECODE:
+            self.values = array(FLOAT_TYPECODE, self.values)
+        return self.values
+
+class DataDirectory:
+    """Resolves file names inside one directory and loads them"""
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = os.path.realpath(root)
+        self.max_bytes = max_bytes
+
+    def resolve(self, filename: str) -> str:
+        """Absolute path of filename, which must stay inside the data directory"""
+        path = os.path.realpath(os.path.join(self.root, filename))
+        if os.path.commonpath([self.root, path]) != self.root or path == self.root:
+            raise DataLoadError(f"{filename} is outside the data directory")
+        if not os.path.isfile(path):
+            raise DataLoadError(f"File not found: {filename}")
+        size = os.path.getsize(path)
+        if size > self.max_bytes:
+            raise DataLoadError(f"{filename} is {size} bytes; the limit is {self.max_bytes}")
+        return path
+
+    def load(self, filename: str, name: str) -> Union[array, list]:
+        """
+        Load the values called name from filename: a CSV column or JSON key
+        of that name, or the whole file if it holds a single column or array.
+        """
+        path = self.resolve(filename)
+        extension = os.path.splitext(path)[1].lower()
+        try:
+            with open(path, encoding='utf-8', newline='') as data:
+                if extension == '.csv':
+                    return load_csv(data, name)
+                if extension == '.json':
+                    return load_json(data, name, self.max_bytes)
+        except UnicodeDecodeError as e:
+            raise DataLoadError(f"{filename} is not UTF-8 text: {e}")
+        except csv.Error as e:
+            raise DataLoadError(f"Invalid CSV in {filename}: {e}")
+        raise DataLoadError(f"Unsupported file type: {filename} (use .csv or .json)")
+
+def _batches(rows: Iterable[List[str]], size: int) -> Iterator[List[List[str]]]:
+    batch = []
+    for row in rows:
+        if row:
+            batch.append(row)
+            if len(batch) == size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+def _is_number(text: str) -> bool:
+    return not isinstance(_number(text), str)
+
+def _plain_column(data) -> Iterator[List[str]]:
+    """
+    Fields of a one-column file without quoting or spaces, split a chunk at
+    a time; ValueError is raised at the first chunk that needs the csv module.
+    """
+    pending = ''
+    while True:
+        chunk = data.read(CSV_CHUNK_CHARS)
+        if _CSV_SYNTAX.search(chunk):
+            raise ValueError("Not a plain column")
+        if not chunk:
+            break
+        pending += chunk
+        cut = max(pending.rfind('\n'), pending.rfind('\r'))
+        if cut != -1:
+            # Splitting on whitespace also drops blank lines, as csv.reader does
+            yield pending[:cut].split()
+            pending = pending[cut + 1:]
+    if pending.split():
+        yield pending.split()
+
+def _is_header(fields: List[str], name: str, following: Optional[List[str]]) -> bool:
+    """A header names the columns: it holds the requested name, or only text above a row with numbers"""
+    return name in fields or (
+        not any(_is_number(field) for field in fields)
+        and following is not None and any(_is_number(field) for field in following)
+    )
+
+def load_csv(data, name: str) -> Union[array, list]:
+    """Load one column of a CSV file"""
+    builder = ValueBuilder()
+    try:
+        first = True
+        for fields in _plain_column(data):
+            if first and fields:
+                first = False
+                if _is_header(fields[:1], name, fields[1:2] or None):
+                    fields = fields[1:]
+            builder.extend_text(fields)
+        return builder.values
+    except ValueError:
+        data.seek(0)
+
+    rows = _batches(csv.reader(data), CSV_BATCH_ROWS)
+    batch = next(rows, [])
+    if not batch:
+        return array(INT_TYPECODE)
+
+    first = batch[0]
+    has_header = _is_header(first, name, batch[1] if len(batch) > 1 else None)
+    if has_header and name in first:
+        column = first.index(name)
+    elif len(first) == 1:
+        column = 0
+    else:
+        columns = ', '.join(first) if has_header else f"{len(first)} unnamed columns"
+        raise DataLoadError(f"Choose a column to load; the file has {columns}")
+    if has_header:
+        batch = batch[1:]
+
+    builder = ValueBuilder()
+    while batch is not None:
+        try:
+            builder.extend_text([row[column] for row in batch])
+        except IndexError:
+            raise DataLoadError(f"A row has fewer than {column + 1} columns")
+        batch = next(rows, None)
+    return builder.values
+
+def _array_chunks(data, first: str) -> Iterator[List[Any]]:
+    """
+    Items of a top-level JSON array, parsed a chunk at a time. Each chunk is
+    cut after its last comma and parsed as an array of its own; a cut inside
+    a string or nested value makes that parse fail, and ValueError is raised.
+    """
+    pending = first
+    while True:
+        chunk = data.read(JSON_CHUNK_CHARS)
+        if not chunk:
+            break
+        pending += chunk
+        cut = pending.rfind(',')
+        if cut != -1:
+            yield json.loads('[' + pending[:cut] + ']')
+            pending = pending[cut + 1:]
+    tail = pending.rstrip()
+    if not tail.endswith(']'):
+        raise ValueError("Unterminated array")
+    if tail[:-1].strip():
+        yield json.loads('[' + tail[:-1] + ']')
+
+def load_json(data, name: str, max_bytes: int = DEFAULT_MAX_BYTES) -> Union[array, list]:
+    """Load a JSON array, or the array stored under key name in a JSON object"""
+    start = data.read(JSON_CHUNK_CHARS).lstrip()
+    if start.startswith('['):
+        builder = ValueBuilder()
+        try:
+            for items in _array_chunks(data, start[1:]):
+                builder.extend(items)
+            return builder.values
+        except ValueError:
+            # Strings with commas or nested values: parse the document whole
+            data.seek(0)
+
+    data.seek(0)
+    try:
+        document = json.loads(data.read(max_bytes + 1))
+    except ValueError as e:
+        raise DataLoadError(f"Invalid JSON: {e}")
+    if isinstance(document, dict):
+        if name not in document:
+            raise DataLoadError(f"No key {name!r} in the file; it has {', '.join(map(str, document)) or 'no keys'}")
+        document = document[name]
+    if not isinstance(document, list):
+        raise DataLoadError(f"Expected a list of values, found {type(document).__name__}")
+    builder = ValueBuilder()
+    builder.extend(document)
+    return builder.values
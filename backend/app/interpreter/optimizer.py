@@ -0,0 +1,158 @@
+"""
+Optional optimization pass over parsed programs.
+
+The pass relies on the echo channel being switched off: folded or skipped
+lines would otherwise produce different "Updated ..." messages. Print and
+error output, and the final variable values, stay the same as an
+unoptimized run. It performs three rewrites:
+
+* consecutive "Add <number> to <var>" lines become one AddRun step;
+* a "Sort <var>" that follows a sort of the same variable, with nothing in
+  between that could change it, is marked redundant and skipped at run time
+  when the earlier sort succeeded;
+* "Make <var> equal to <value>" is dropped when the value has no side
+  effects and the variable is reassigned before anything mentions it.
+"""
+
+from bisect import bisect_right
+import re
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+
+from .program import AddRun, Block, Line, Sort, Statement
+
+if TYPE_CHECKING:
+    from .interpreter import Command
+
+# String literals without a prefix, so f-strings are left for the checks below
+_STRING_LITERAL = re.compile(r'(?<!\w)(?:\'(?:\\.|[^\'\\])*\'|"(?:\\.|[^"\\])*")')
+
+# Commands that never touch variables or only change scalars, so they cannot
+# reorder a list that was just sorted
+_NON_MUTATING = {'print_text', 'string_operation', 'string_join', 'math_function', 'string_format'}
+
+_WORD = re.compile(r'\w+')
+
+def mentioned_names(statement: Statement) -> Set[str]:
+    """Every word in a statement, which covers any variable it could use"""
+    if type(statement) is Block:
+        text = '\n'.join([statement.condition] + [line.text for line in statement.body])
+    else:
+        text = statement.text
+    return set(_WORD.findall(text))
+
+def is_side_effect_free(expression: str) -> bool:
+    """Whether evaluating expression can change anything: no calls and no assignment"""
+    code = _STRING_LITERAL.sub('""', expression)
+    return '(' not in code and ':=' not in code
+
+def _foldable_addition(command) -> Optional[float]:
+    """The numeric amount of an "Add <number> to <var>" command, if it is one"""
+    if command is None or command.handler != 'math_operation':
+        return None
+    operation, amount, _ = command.args
+    if operation != 'add':
+        return None
+    try:
+        return float(amount)
+    except ValueError:
+        # A variable name: its value could change between the lines
+        return None
+
+def _is_dead_store(commands: list, occurrences: Dict[str, List[int]], index: int, name: str) -> bool:
+    """Whether the variable assigned at index is reassigned before any mention"""
+    # The name can be absent from its own line: "Make numbers ..." creates "s"
+    positions = occurrences.get(name, [])
+    after = bisect_right(positions, index)
+    if after == len(positions):
+        # Never mentioned again: the final value is still observable by the caller
+        return False
+    command = commands[positions[after]]
+    if command is None or command.handler != 'create_variable':
+        return False
+    next_name, next_value = command.args
+    return next_name == name and name not in _WORD.findall(next_value)
+
+def optimize_program(program: List[Statement], interpreter) -> List[Statement]:
+    """Rewrite top-level statements; conditional blocks are left untouched"""
+    # Decoding is pure, so repeated lines are matched against the grammar once
+    decoded: Dict[str, Optional['Command']] = {}
+    names: Dict[str, Set[str]] = {}
+    commands = []
+    # Variable name -> indices of the statements that mention it, in order
+    occurrences: Dict[str, List[int]] = {}
+    for position, statement in enumerate(program):
+        if type(statement) is Line:
+            text = statement.text
+            if text not in decoded:
+                decoded[text] = interpreter.decode_command(text)
+                names[text] = mentioned_names(statement)
+            commands.append(decoded[text])
+            mentioned = names[text]
+        else:
+            commands.append(None)
+            mentioned = mentioned_names(statement)
+        for name in mentioned:
+            occurrences.setdefault(name, []).append(position)
+
+    optimized: List[Statement] = []
+    # Last sorted variable with no possibly-mutating statement since
+    last_sorted: Optional[str] = None
+    index = 0
+    while index < len(program):
+        statement = program[index]
+        command = commands[index]
+
+        amount = _foldable_addition(command)
+        if amount is not None:
+            var_name = command.args[2]
+            lines = [statement]
+            amounts = [amount]
+            while index + 1 < len(program):
+                next_command = commands[index + 1]
+                next_amount = _foldable_addition(next_command)
+                if next_amount is None or next_command.args[2] != var_name:
+                    break
+                index += 1
+                lines.append(program[index])
+                amounts.append(next_amount)
+            optimized.append(AddRun(var_name, lines, amounts) if len(lines) > 1 else statement)
+            # Adding to a list appends to it, and var_name may be another
+            # name for the sorted list ("Make b equal to numbers")
+            last_sorted = None
+            index += 1
+            continue
+
+        if command is not None and command.handler == 'list_operation' and command.args[0] == 'sort':
+            var_name = command.args[2]
+            optimized.append(Sort(var_name, statement, redundant=last_sorted == var_name))
+            last_sorted = var_name
+            index += 1
+            continue
+
+        if command is not None and command.handler == 'create_variable':
+            name, value = command.args
+            if is_side_effect_free(value.strip('"\'')) and _is_dead_store(commands, occurrences, index, name):
+                index += 1
+                continue
+
+        if not _preserves_sort(command, statement, last_sorted):
+            last_sorted = None
+        optimized.append(statement)
+        index += 1
+    return optimized
+
+def _preserves_sort(command, statement: Statement, var_name: Optional[str]) -> bool:
+    """Whether statement certainly leaves the sorted list var_name unchanged"""
+    if var_name is None or type(statement) is not Line:
+        return False
+    if command is None:
+        # Unrecognized lines only report an error
+        return True
+    if command.handler in _NON_MUTATING:
+        return True
+    if command.handler == 'math_operation':
+        # Adding to a list appends, through any alias of it; other math only
+        # rebinds numbers
+        return command.args[0] != 'add'
+    # Printing a bare name only reads it
+    return command.handler == 'print_value' and command.args[0].isidentifier()
@@ -0,0 +1,125 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional
+
+# Output channels
+PRINT = 'print'   # values the script asked to print, and computed results
+ECHO = 'echo'     # confirmations such as "Created x = 1" or "Updated x to 2"
+ERROR = 'error'   # errors and unrecognized lines
+
+CHANNELS = (PRINT, ECHO, ERROR)
+
+class LazyData(Mapping):
+    """Record details built by compute on first access, then kept"""
+
+    __slots__ = ('_compute', '_data')
+
+    def __init__(self, compute: Callable[[], Dict[str, Any]]):
+        self._compute: Optional[Callable[[], Dict[str, Any]]] = compute
+        self._data: Optional[Dict[str, Any]] = None
+
+    def _resolve(self) -> Dict[str, Any]:
+        if self._data is None:
+            self._data = self._compute()
+            self._compute = None
+        return self._data
+
+    def __getitem__(self, key: str) -> Any:
+        return self._resolve()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._resolve())
+
+    def __len__(self) -> int:
+        return len(self._resolve())
+
+class OutputRecord(NamedTuple):
+    kind: str
+    text: str
+    line: Optional[int] = None
+    # Structured details, such as suggestions for an unrecognized line
+    data: Optional[Mapping[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        record = {'kind': self.kind, 'text': self.text, 'line': self.line}
+        if self.data is not None:
+            record['data'] = dict(self.data)
+        return record
+
+def parse_channels(channels: Optional[Iterable[str]]) -> Optional[frozenset]:
+    """Validate a list of channel names; None means every channel"""
+    if channels is None:
+        return None
+    if isinstance(channels, str):
+        channels = [channels]
+    selected = frozenset(channels)
+    unknown = selected.difference(CHANNELS)
+    if unknown:
+        raise ValueError(f"Unknown output channels: {', '.join(sorted(unknown))}")
+    return selected
+
+class OutputBuffer:
+    """
+    Typed output records for one run of the interpreter.
+
+    Records on channels that were not requested are dropped at emission, and
+    echo messages are only formatted when the echo channel is wanted. Iterating
+    or indexing the buffer yields record text, like the plain list of strings
+    it replaces.
+    """
+
+    __slots__ = ('records', 'channels', 'line')
+
+    def __init__(self, channels: Optional[Iterable[str]] = None):
+        self.records: List[OutputRecord] = []
+        self.channels = parse_channels(channels)
+        # Source line number of the statement being executed, if known
+        self.line: Optional[int] = None
+
+    @classmethod
+    def from_records(cls, records: Iterable[OutputRecord], channels: Optional[Iterable[str]] = None) -> 'OutputBuffer':
+        """Build a buffer holding the records that are on the requested channels"""
+        buffer = cls(channels)
+        buffer.records = [record for record in records if buffer.wants(record.kind)]
+        return buffer
+
+    def wants(self, kind: str) -> bool:
+        return self.channels is None or kind in self.channels
+
+    def emit(self, kind: str, text: str, data: Optional[Mapping[str, Any]] = None):
+        if self.wants(kind):
+            self.records.append(OutputRecord(kind, text, self.line, data))
+
+    def print(self, text: str):
+        self.emit(PRINT, text)
+
+    def echo(self, template: str, *args):
+        """Record a confirmation message, formatting it only if it is wanted"""
+        if self.wants(ECHO):
+            self.records.append(OutputRecord(ECHO, template.format(*args), self.line))
+
+    def error(self, text: str, data: Optional[Mapping[str, Any]] = None):
+        self.emit(ERROR, text, data)
+
+    def select(self, kinds: Optional[Iterable[str]] = None) -> List[OutputRecord]:
+        if kinds is None:
+            return list(self.records)
+        kinds = parse_channels(kinds)
+        return [record for record in self.records if record.kind in kinds]
+
+    def render(self, kinds: Optional[Iterable[str]] = None) -> str:
+        """Render records as newline-separated text"""
+        return '\n'.join(record.text for record in self.select(kinds))
+
+    def to_list(self, kinds: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        return [record.to_dict() for record in self.select(kinds)]
+
+    def clear(self):
+        self.records.clear()
+
+    def __iter__(self) -> Iterator[str]:
+        return (record.text for record in self.records)
+
+    def __getitem__(self, index: int) -> str:
+        return self.records[index].text
+
+    def __len__(self) -> int:
+        return len(self.records)
@@ -0,0 +1,52 @@
+from typing import List, NamedTuple, Union
+
+class Line(NamedTuple):
+    """A single command and its line number in the submitted source"""
+    number: int
+    text: str
+
+class Block(NamedTuple):
+    """An "If ...:" header and the indented lines that run when it holds"""
+    number: int
+    condition: str
+    body: List[Line]
+
+class AddRun(NamedTuple):
+    """Consecutive "Add <number> to <var>" lines folded into one step"""
+    var_name: str
+    lines: List[Line]
+    amounts: List[float]
+
+class Sort(NamedTuple):
+    """
+    A "Sort <var>" line. A redundant sort follows an earlier sort of the same
+    variable with nothing in between that could have changed it.
+    """
+    var_name: str
+    line: Line
+    redundant: bool
+
+Statement = Union[Line, Block, AddRun, Sort]
+
+def parse_program(code: str) -> List[Statement]:
+    """Split source into top-level statements, dropping blank and comment lines"""
+    program: List[Statement] = []
+    # Number lines as in the submitted source, before stripping
+    first_line = code[:len(code) - len(code.lstrip())].count('\n') + 1
+    lines = code.strip().split('\n')
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        number = first_line + i
+        i += 1
+        if not line or line.startswith('#'):
+            continue
+        if line.lower().startswith('if') and line.endswith(':'):
+            body = []
+            while i < len(lines) and (lines[i].startswith('    ') or lines[i].startswith('\t')):
+                body.append(Line(first_line + i, lines[i].strip()))
+                i += 1
+            program.append(Block(number, line[2:-1].strip(), body))
+        else:
+            program.append(Line(number, line))
+    return program
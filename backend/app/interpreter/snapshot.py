@@ -0,0 +1,251 @@
+"""
+On-disk snapshots of interpreter sessions.
+
+A snapshot file is laid out as:
+
+    MAGIC (8 bytes) | header length (uint32, little endian) | header | array data
+
+The header is a marshal-encoded dict describing every variable. Scalars and
+other plain values are stored inline in the header; numeric lists are
+written as raw machine-typed arrays after it, each aligned to 8 bytes, so
+they can be reopened lazily as memoryviews over an mmap of the file. A
+variable bound to the same object as an earlier one is written as an alias
+of it, and restored as the same object.
+"""
+
+from array import array
+from contextlib import contextmanager
+import logging
+import marshal
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: sessions are only locked within one process
+    fcntl = None
+
+from .variable_store import (
+    CompactVariableStore,
+    TYPED_SEQUENCES,
+    compact_list_typecode,
+)
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'NPSNAP01'
+# Version 2 added alias entries; version 1 files are still readable
+FORMAT_VERSION = 2
+_READABLE_VERSIONS = (1, 2)
+_LENGTH = struct.Struct('<I')
+_ALIGNMENT = 8
+# Marshal version 4 is readable by every supported Python release
+_MARSHAL_VERSION = 4
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file cannot be read"""
+
+def _typed_view(value: Any, typecode: Optional[str]):
+    """Return value as an array or memoryview if it has typed storage"""
+    if type(value) in TYPED_SEQUENCES:
+        return value
+    if typecode is not None:
+        return array(typecode, value)
+    return None
+
+def _is_marshalable(value: Any) -> bool:
+    try:
+        marshal.dumps(value, _MARSHAL_VERSION)
+    except ValueError:
+        return False
+    return True
+
+def save_snapshot(variables, path: str) -> List[str]:
+    """
+    Write a session's variables to path atomically.
+
+    Returns the names of variables that could not be serialized (modules,
+    functions and other non-data values); those are skipped.
+    """
+    raw = variables.raw if isinstance(variables, CompactVariableStore) else variables.__getitem__
+    entries = []
+    arrays = []
+    skipped = []
+    # id of each value written -> the first name it was written under
+    written: Dict[int, str] = {}
+    offset = 0
+    for name in list(variables):
+        value = raw(name)
+        target = written.get(id(value))
+        if target is not None:
+            entries.append((name, 'alias', target))
+            continue
+        written[id(value)] = name
+        typecode = compact_list_typecode(value) if type(value) is list else None
+        data = _typed_view(value, typecode)
+        if data is not None:
+            typecode = data.typecode if type(data) is array else data.format
+            entries.append((name, 'array', (typecode, offset, len(data))))
+            arrays.append(data)
+            nbytes = len(data) * data.itemsize
+            offset += nbytes + (-nbytes % _ALIGNMENT)
+        elif _is_marshalable(value):
+            entries.append((name, 'value', value))
+        else:
+            skipped.append(name)
+
+    if skipped:
+        logger.warning(f"Skipping non-serializable variables in snapshot: {', '.join(skipped)}")
+
+    header = marshal.dumps({
+        'version': FORMAT_VERSION,
+        'byteorder': sys.byteorder,
+        'entries': entries,
+    }, _MARSHAL_VERSION)
+    prefix_length = len(MAGIC) + _LENGTH.size + len(header)
+    padding = -prefix_length % _ALIGNMENT
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.snapshot-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC)
+            f.write(_LENGTH.pack(len(header) + padding))
+            f.write(header)
+            f.write(b'\0' * padding)
+            for data in arrays:
+                chunk = memoryview(data).cast('B')
+                f.write(chunk)
+                f.write(b'\0' * (-len(chunk) % _ALIGNMENT))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return skipped
+
+def _read_header(buffer) -> Tuple[Dict[str, Any], int]:
+    if bytes(buffer[:len(MAGIC)]) != MAGIC:
+        raise SnapshotError("Not a session snapshot")
+    start = len(MAGIC) + _LENGTH.size
+    (length,) = _LENGTH.unpack(buffer[len(MAGIC):start])
+    try:
+        header = marshal.loads(bytes(buffer[start:start + length]))
+    except (EOFError, ValueError, TypeError) as e:
+        raise SnapshotError(f"Corrupt snapshot header: {e}")
+    if not isinstance(header, dict) or header.get('version') not in _READABLE_VERSIONS:
+        raise SnapshotError("Unsupported snapshot version")
+    return header, start + length
+
+def load_snapshot(path: str, lazy: bool = True) -> CompactVariableStore:
+    """
+    Restore a session's variables from a snapshot file.
+
+    With lazy=True numeric lists are memoryviews over a read-only mmap of the
+    file, so restore cost does not grow with their size; pages are only read
+    when a variable is used. Otherwise everything is copied into memory.
+    """
+    store = CompactVariableStore()
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < len(MAGIC) + _LENGTH.size:
+            raise SnapshotError("Not a session snapshot")
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    view = memoryview(mapped)
+    # Views handed to the store; released if the restore fails part way
+    exported = []
+    restored = False
+    try:
+        header, data_start = _read_header(view)
+        swap = header.get('byteorder') != sys.byteorder
+        for name, kind, payload in header['entries']:
+            if kind == 'value':
+                store[name] = payload
+                continue
+            if kind == 'alias':
+                # Reading unpacks a typed target, so both names share one list
+                store[name] = store[payload]
+                continue
+            typecode, offset, count = payload
+            itemsize = array(typecode).itemsize
+            begin = data_start + offset
+            end = begin + count * itemsize
+            if end > len(view):
+                raise SnapshotError(f"Truncated data for variable '{name}'")
+            if lazy and not swap:
+                exported.append(view[begin:end].cast(typecode))
+                store.set_array(name, exported[-1])
+            else:
+                values = array(typecode)
+                values.frombytes(view[begin:end])
+                if swap:
+                    values.byteswap()
+                store.set_array(name, values)
+        restored = True
+    finally:
+        if not restored:
+            for values in exported:
+                values.release()
+        # Lazily restored variables keep their own exports of the mapping alive
+        view.release()
+        if not (lazy and restored):
+            mapped.close()
+    return store
+
+class SessionSnapshots:
+    """Directory of per-session snapshot files, keyed by session id"""
+
+    SESSION_ID = re.compile(r'[A-Za-z0-9_-]{1,64}')
+
+    def __init__(self, directory: str, lazy: bool = True):
+        self.directory = directory
+        self.lazy = lazy
+        os.makedirs(directory, exist_ok=True)
+        # Fallback for platforms without fcntl; only serializes this process
+        self._local_lock = threading.Lock()
+
+    def path_for(self, session_id: str) -> str:
+        if not isinstance(session_id, str) or not self.SESSION_ID.fullmatch(session_id):
+            raise ValueError(f"Invalid session id: {session_id!r}")
+        return os.path.join(self.directory, f"{session_id}.snap")
+
+    def load(self, session_id: str) -> Optional[CompactVariableStore]:
+        """Restore a session, or return None if it has no snapshot"""
+        path = self.path_for(session_id)
+        if not os.path.exists(path):
+            return None
+        return load_snapshot(path, lazy=self.lazy)
+
+    @contextmanager
+    def lock(self, session_id: str) -> Iterator[None]:
+        """
+        Hold a session exclusively, across threads and worker processes, so
+        that a load, run and save is not interleaved with another one. The
+        lock is an flock on a separate lock file, since saving replaces the
+        snapshot file itself; lock files are left in place.
+        """
+        path = self.path_for(session_id)[:-len('.snap')] + '.lock'
+        if fcntl is None:
+            with self._local_lock:
+                yield
+            return
+        with open(path, 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def save(self, session_id: str, variables) -> List[str]:
+        return save_snapshot(variables, self.path_for(session_id))
+
+    def delete(self, session_id: str):
+        path = self.path_for(session_id)
+        if os.path.exists(path):
+            os.remove(path)
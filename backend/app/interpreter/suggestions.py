@@ -0,0 +1,273 @@
+"""
+"Did you mean" suggestions for lines that match no command.
+
+Words are looked up through a character-bigram index: only the keywords and
+variable names sharing the most bigrams with a word are compared with it by
+edit distance, instead of scanning every candidate. Templates are then found
+through their keywords.
+"""
+
+import re
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+# Canonical form of every command in the grammar; words in angle brackets are
+# placeholders, the rest are keywords
+COMMAND_TEMPLATES = (
+    'Make <variable> equal to <value>',
+    'Print <variable>',
+    'Print "<text>"',
+    'Add <number> to <variable>',
+    'Multiply <variable> by <number>',
+    'Divide <variable> by <number>',
+    'Double <variable>',
+    'Convert <variable> to uppercase',
+    'Convert <variable> to lowercase',
+    'Join <variable> with "<text>"',
+    'Append <value> to <variable>',
+    'Remove <value> from <variable>',
+    'Sort <variable>',
+    'Calculate square root of <number>',
+    'Find maximum of <variable>',
+    'Generate random number between <number> and <number>',
+    'Format string "<text>" with "<text>"',
+    'Load <variable> from <file>',
+    'Load <name> from <file> into <variable>',
+    'If <condition>:',
+)
+
+# Words less similar than this are not treated as misspellings of each other
+MIN_SIMILARITY = 0.5
+# Candidates compared by edit distance per looked-up word
+MAX_CANDIDATES = 8
+# Bound on memoized keyword lookups
+MAX_MEMOIZED_WORDS = 10000
+
+_PLACEHOLDER = re.compile(r'<\w+>')
+_STRING_LITERAL = re.compile(r'"[^"]*"|\'[^\']*\'')
+_TOKEN = re.compile(r'"[^"]*"|\'[^\']*\'|[^\s"\']+')
+_WORD = re.compile(r'[A-Za-z_]\w*$')
+
+def bigrams(word: str) -> Set[str]:
+    """Character bigrams of a word, padded to mark its first and last letter"""
+    padded = f" {word.lower()} "
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+def edit_distance(a: str, b: str, limit: Optional[int] = None) -> int:
+    """
+    Optimal string alignment distance: edits, counting a swap of neighbours
+    as one. With a limit, any distance above it is reported as limit + 1.
+    """
+    if limit is not None and abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        char = a[i - 1]
+        current = [i] * (len(b) + 1)
+        for j in range(1, len(b) + 1):
+            # Plain comparisons: this loop dominates suggestion time
+            distance = previous[j - 1] + (char != b[j - 1])
+            if previous[j] < distance:
+                distance = previous[j] + 1
+            if current[j - 1] < distance:
+                distance = current[j - 1] + 1
+            if i > 1 and j > 1 and char == b[j - 2] and a[i - 2] == b[j - 1] and previous2[j - 2] < distance:
+                distance = previous2[j - 2] + 1
+            current[j] = distance
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    if limit is not None and previous[len(b)] > limit:
+        return limit + 1
+    return previous[len(b)]
+
+def similarity(a: str, b: str, threshold: float = 0.0) -> float:
+    """1.0 for equal words down to 0.0; 0.0 for anything below threshold"""
+    a, b = a.lower(), b.lower()
+    longest = max(len(a), len(b), 1)
+    limit = int(longest * (1.0 - threshold))
+    score = 1.0 - edit_distance(a, b, limit) / longest
+    return score if score >= threshold else 0.0
+
+class NgramIndex:
+    """Words indexed by their character bigrams, for approximate lookup"""
+
+    __slots__ = ('_postings', '_words')
+
+    def __init__(self, words: Iterable[str] = ()):
+        self._postings: Dict[str, List[str]] = {}
+        # word -> position in the order words were added
+        self._words: Dict[str, int] = {}
+        self.update(words)
+
+    def add(self, word: str):
+        if word in self._words:
+            return
+        self._words[word] = len(self._words)
+        for gram in bigrams(word):
+            self._postings.setdefault(gram, []).append(word)
+
+    def update(self, words: Iterable[str]):
+        for word in words:
+            if word not in self._words:
+                self.add(word)
+
+    def prefix(self, count: int) -> 'IndexPrefix':
+        """A view of the first count words added, unaffected by later additions"""
+        return IndexPrefix(self, count)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._words
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def similar(self, word: str, threshold: float = MIN_SIMILARITY, first: Optional[int] = None) -> Dict[str, float]:
+        """
+        Indexed words close to word, with their similarity (1.0 is identical).
+        With first, only the first words added, up to that many, are considered.
+        """
+        if first is not None and first >= len(self._words):
+            first = None
+        position = self._words.get(word)
+        if position is not None and (first is None or position < first):
+            return {word: 1.0}
+        grams = bigrams(word)
+        shared = Counter()
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings:
+                if first is not None:
+                    postings = [candidate for candidate in postings if self._words[candidate] < first]
+                shared.update(postings)
+        similar = {}
+        for candidate, count in shared.most_common(MAX_CANDIDATES):
+            # One edit changes at most three bigrams, so candidates sharing too
+            # few cannot be within the edit distance the threshold allows
+            limit = int(max(len(word), len(candidate)) * (1.0 - threshold))
+            if count < len(grams) - 3 * limit:
+                continue
+            score = similarity(word, candidate, threshold)
+            if score:
+                similar[candidate] = score
+        return similar
+
+    def best(self, word: str, threshold: float = MIN_SIMILARITY, first: Optional[int] = None) -> Optional[Tuple[str, float]]:
+        similar = self.similar(word, threshold, first)
+        if not similar:
+            return None
+        # Ties go to the shorter, then alphabetically first, word for stable output
+        candidate = min(similar, key=lambda w: (-similar[w], len(w), w))
+        return candidate, similar[candidate]
+
+class IndexPrefix:
+    """The words an NgramIndex held at one point, for lookups made later"""
+
+    __slots__ = ('index', 'count')
+
+    def __init__(self, index: NgramIndex, count: int):
+        self.index = index
+        self.count = count
+
+    def __contains__(self, word: str) -> bool:
+        position = self.index._words.get(word)
+        return position is not None and position < self.count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def best(self, word: str, threshold: float = MIN_SIMILARITY) -> Optional[Tuple[str, float]]:
+        return self.index.best(word, threshold, self.count)
+
+class SuggestionIndex:
+    """Ranks command templates, and spelling corrections, for an unmatched line"""
+
+    def __init__(self, templates: Iterable[str] = COMMAND_TEMPLATES):
+        self.templates: List[Tuple[str, Tuple[str, ...]]] = []
+        self._by_keyword: Dict[str, List[int]] = {}
+        for template in templates:
+            keywords = tuple(_PLACEHOLDER.sub(' ', _STRING_LITERAL.sub(' ', template)).lower().replace(':', ' ').split())
+            for keyword in set(keywords):
+                self._by_keyword.setdefault(keyword, []).append(len(self.templates))
+            self.templates.append((template, keywords))
+        self.keywords = NgramIndex(self._by_keyword)
+        # Keywords never change, so their lookups are memoized per word
+        self._keyword_matches: Dict[str, Dict[str, float]] = {}
+
+    def keyword_matches(self, word: str) -> Dict[str, float]:
+        word = word.lower()
+        matches = self._keyword_matches.get(word)
+        if matches is None:
+            matches = self.keywords.similar(word)
+            if len(self._keyword_matches) >= MAX_MEMOIZED_WORDS:
+                self._keyword_matches.clear()
+            self._keyword_matches[word] = matches
+        return matches
+
+    def suggest(
+        self,
+        line: str,
+        names: Optional[Union[NgramIndex, IndexPrefix]] = None,
+        validate: Optional[Callable[[str], bool]] = None,
+        limit: int = 3,
+    ) -> List[Dict[str, Any]]:
+        """
+        Up to limit suggestions, best first. A "correction" rewrites misspelled
+        keywords and variable names in line and is only offered when validate
+        (normally a grammar match) accepts it; "template" entries are the
+        closest command forms.
+        """
+        words = [token for token in _TOKEN.findall(line) if _WORD.match(token)]
+        # Keyword similarities for each word of the line
+        matches = [self.keyword_matches(word) for word in words]
+
+        suggestions = []
+        correction = self._correct(line, matches, names)
+        if correction is not None and (validate is None or validate(correction)):
+            suggestions.append({'kind': 'correction', 'text': correction})
+
+        scores: Dict[int, float] = {}
+        candidates = {index for similar in matches for keyword in similar for index in self._by_keyword[keyword]}
+        for index in candidates:
+            _, keywords = self.templates[index]
+            coverage = sum(max((similar.get(keyword, 0.0) for similar in matches), default=0.0)
+                           for keyword in keywords) / len(keywords)
+            # The first word names the command, so it counts as much as the rest
+            verb = matches[0].get(keywords[0], 0.0) if matches else 0.0
+            scores[index] = (coverage + verb) / 2
+        ranked = sorted(scores, key=lambda index: (-scores[index], index))
+        for index in ranked[:limit - len(suggestions)]:
+            suggestions.append({'kind': 'template', 'text': self.templates[index][0], 'score': round(scores[index], 3)})
+        return suggestions
+
+    def _correct(self, line: str, matches: List[Dict[str, float]], names: Optional[Union[NgramIndex, IndexPrefix]]) -> Optional[str]:
+        """line with unknown words replaced by their closest keyword or variable"""
+        tokens = _TOKEN.findall(line)
+        corrected = []
+        word_index = 0
+        changed = False
+        for position, token in enumerate(tokens):
+            if not _WORD.match(token):
+                corrected.append(token)
+                continue
+            similar = matches[word_index]
+            word_index += 1
+            if token.lower() in similar and similar[token.lower()] == 1.0 or (names is not None and token in names):
+                corrected.append(token)
+                continue
+            best = max(similar.items(), key=lambda item: (item[1], -len(item[0])), default=None)
+            name = names.best(token) if names is not None else None
+            if name is not None and (best is None or name[1] > best[1]):
+                replacement = name[0]
+            elif best is not None:
+                replacement = best[0].capitalize() if position == 0 else best[0]
+            else:
+                corrected.append(token)
+                continue
+            corrected.append(replacement)
+            changed = True
+        return ' '.join(corrected) if changed else None
+
+# Shared index over the built-in command templates
+SUGGESTIONS = SuggestionIndex()
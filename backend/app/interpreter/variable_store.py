@@ -0,0 +1,124 @@
+from array import array
+from collections.abc import MutableMapping
+import sys
+from typing import Any, Dict, Iterator, List, Optional
+
+# Range representable by the signed 64-bit typecode used for integers
+INT64_MIN = -(1 << 63)
+INT64_MAX = (1 << 63) - 1
+
+INT_TYPECODE = 'q'
+FLOAT_TYPECODE = 'd'
+
+# Typed sequences the store keeps as-is: in-memory arrays and read-only
+# memoryviews over memory-mapped snapshot files
+TYPED_SEQUENCES = (array, memoryview)
+
+def compact_typecode(value: Any) -> Optional[str]:
+    """Return the array typecode a value can be stored as, or None"""
+    if type(value) is int:
+        return INT_TYPECODE if INT64_MIN <= value <= INT64_MAX else None
+    if type(value) is float:
+        return FLOAT_TYPECODE
+    return None
+
+def compact_list_typecode(values: List[Any]) -> Optional[str]:
+    """Return the typecode for a homogeneous, non-empty numeric list, or None"""
+    if not values:
+        return None
+    typecode = compact_typecode(values[0])
+    if typecode is None:
+        return None
+    # Exact type checks: bools and mixed int/float lists stay as Python objects
+    # so that they round-trip unchanged
+    for item in values:
+        if compact_typecode(item) != typecode:
+            return None
+    return typecode
+
+def object_nbytes(value: Any) -> int:
+    """Approximate memory held by a plain Python value, including its items"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(object_nbytes(k) + object_nbytes(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(object_nbytes(item) for item in value)
+    return size
+
+def mapping_nbytes(variables) -> int:
+    """Approximate memory held by a variable mapping and everything in it"""
+    if hasattr(variables, 'nbytes'):
+        return variables.nbytes()
+    return object_nbytes(dict(variables))
+
+class CompactVariableStore(MutableMapping):
+    """
+    Variable mapping that can hold numeric arrays without unpacking them.
+
+    Arrays handed over through set_array (loaded data files and restored
+    snapshots, including memory-mapped ones) stay packed until first read.
+    They then become a plain list that is kept and returned on every later
+    read, so a list the program can see is always the same object and
+    in-place changes and aliases behave exactly as with a dict.
+
+    Everything else, including every value a program builds, is stored as
+    given. Packing a list would need a copy that detaches its aliases, and
+    a typed slot per scalar costs as much as the number object it replaces,
+    so the store only saves memory on data that is loaded or restored and
+    then left unread. It can be passed as the locals mapping to eval().
+    """
+
+    def __init__(self, initial: Optional[Dict[str, Any]] = None):
+        # name -> value, or an array or memoryview not read since it was set
+        self._objects: Dict[str, Any] = {}
+        if initial:
+            self.update(initial)
+
+    def __getitem__(self, name: str) -> Any:
+        value = self._objects[name]
+        if type(value) in TYPED_SEQUENCES:
+            # Unpack once; the caller may mutate or alias the list
+            value = self._objects[name] = value.tolist()
+        return value
+
+    def __setitem__(self, name: str, value: Any):
+        self._objects[name] = value
+
+    def __delitem__(self, name: str):
+        del self._objects[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._objects
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._objects)
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.items())!r})"
+
+    def set_array(self, name: str, values):
+        """Store an array or typed memoryview without a round-trip through a list"""
+        typecode = values.typecode if type(values) is array else values.format
+        if typecode not in (INT_TYPECODE, FLOAT_TYPECODE):
+            raise ValueError(f"Unsupported array typecode: {typecode}")
+        self._objects[name] = values
+
+    def raw(self, name: str) -> Any:
+        """Return the stored representation: a typed sequence or the value"""
+        return self._objects[name]
+
+    def is_packed(self, name: str) -> bool:
+        """Whether name still holds an array that has not been read"""
+        return type(self._objects.get(name)) in TYPED_SEQUENCES
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the store, its names and its values"""
+        size = sys.getsizeof(self) + sys.getsizeof(self._objects)
+        for name, value in self._objects.items():
+            size += sys.getsizeof(name)
+            # Mapped memoryviews count only their header; pages stay on disk until read
+            size += sys.getsizeof(value) if type(value) in TYPED_SEQUENCES else object_nbytes(value)
+        return size
@@ -1,10 +1,138 @@
+from contextlib import nullcontext
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import logging
-from .interpreter.interpreter import AdvancedInterpreter
+import os
+import threading
+from .interpreter.diagnostics import ConflictError, ParseSessions
+from .interpreter.interpreter import AdvancedInterpreter, DETERMINISTIC, RANDOM
+from .interpreter.loader import DEFAULT_MAX_BYTES, DataDirectory
+from .interpreter.output import CHANNELS, ECHO, OutputBuffer, parse_channels
+from .interpreter.snapshot import SessionSnapshots, SnapshotError
+from .result_cache import ResultCache
+from .scheduler import FairScheduler, QueueFull, QueueTimeout, parse_weights
 
 app = Flask(__name__)
 CORS(app)
+app.config['COMPACT_VARIABLES'] = os.environ.get('COMPACT_VARIABLES', '').lower() in ('1', 'true', 'yes')
+# Directory for per-session snapshots; sessions are not persisted when unset
+app.config['SESSION_DIR'] = os.environ.get('SESSION_DIR')
+# Result cache for deterministic scripts; a size of 0 disables it
+app.config['RESULT_CACHE_SIZE'] = int(os.environ.get('RESULT_CACHE_SIZE', '1024'))
+app.config['RESULT_CACHE_BYTES'] = int(os.environ.get('RESULT_CACHE_BYTES', str(16 * 1024 * 1024)))
+app.config['RESULT_CACHE_TTL'] = float(os.environ.get('RESULT_CACHE_TTL', '3600'))
+# Directory that "Load <var> from <file>" reads from; loading is disabled when unset
+app.config['DATA_DIR'] = os.environ.get('DATA_DIR')
+app.config['DATA_MAX_BYTES'] = int(os.environ.get('DATA_MAX_BYTES', str(DEFAULT_MAX_BYTES)))
+# Editor buffers kept for incremental parsing
+app.config['PARSE_DOCUMENTS'] = int(os.environ.get('PARSE_DOCUMENTS', '1000'))
+# Scripts run at once per process. Keep it below the server's request threads
+# per process (gunicorn --threads, 8 in the Dockerfile): with no more threads
+# than slots, requests never queue and fair scheduling never engages
+app.config['SCHEDULER_CONCURRENCY'] = int(os.environ.get('SCHEDULER_CONCURRENCY', '4'))
+# Slots only scripts shorter than SCHEDULER_SHORT_JOB_BYTES may use
+app.config['SCHEDULER_SHORT_RESERVED'] = int(os.environ.get('SCHEDULER_SHORT_RESERVED', '1'))
+app.config['SCHEDULER_SHORT_JOB_BYTES'] = int(os.environ.get('SCHEDULER_SHORT_JOB_BYTES', '200'))
+# Queued scripts allowed per client and in total before requests get a 429
+app.config['SCHEDULER_CLIENT_QUEUE'] = int(os.environ.get('SCHEDULER_CLIENT_QUEUE', '8'))
+app.config['SCHEDULER_QUEUE'] = int(os.environ.get('SCHEDULER_QUEUE', '256'))
+app.config['SCHEDULER_MAX_WAIT'] = float(os.environ.get('SCHEDULER_MAX_WAIT', '30'))
+# Relative shares as "client=weight,...", where client is an API key or session id
+app.config['SCHEDULER_WEIGHTS'] = os.environ.get('SCHEDULER_WEIGHTS', '')
+
+# Shared objects, created on first use so tests can change app.config first.
+# Request threads can race to create one, so creation happens under a lock
+_init_lock = threading.Lock()
+_snapshots = None
+_result_cache = None
+_parse_sessions = None
+_data_dir = None
+_scheduler = None
+
+def get_snapshots():
+    global _snapshots
+    if _snapshots is None and app.config['SESSION_DIR']:
+        with _init_lock:
+            if _snapshots is None:
+                _snapshots = SessionSnapshots(app.config['SESSION_DIR'])
+    return _snapshots
+
+def get_result_cache():
+    global _result_cache
+    if _result_cache is None and app.config['RESULT_CACHE_SIZE'] > 0:
+        with _init_lock:
+            if _result_cache is None:
+                _result_cache = ResultCache(
+                    max_entries=app.config['RESULT_CACHE_SIZE'],
+                    max_bytes=app.config['RESULT_CACHE_BYTES'],
+                    ttl=app.config['RESULT_CACHE_TTL'],
+                )
+    return _result_cache
+
+def get_data_dir():
+    global _data_dir
+    if _data_dir is None and app.config['DATA_DIR']:
+        with _init_lock:
+            if _data_dir is None:
+                _data_dir = DataDirectory(app.config['DATA_DIR'], max_bytes=app.config['DATA_MAX_BYTES'])
+    return _data_dir
+
+def get_parse_sessions():
+    global _parse_sessions
+    if _parse_sessions is None:
+        with _init_lock:
+            if _parse_sessions is None:
+                _parse_sessions = ParseSessions(max_documents=app.config['PARSE_DOCUMENTS'])
+    return _parse_sessions
+
+def get_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        with _init_lock:
+            if _scheduler is None:
+                _scheduler = FairScheduler(
+                    max_concurrency=app.config['SCHEDULER_CONCURRENCY'],
+                    short_reserved=app.config['SCHEDULER_SHORT_RESERVED'],
+                    max_queue_per_client=app.config['SCHEDULER_CLIENT_QUEUE'],
+                    max_queue=app.config['SCHEDULER_QUEUE'],
+                    short_job_size=app.config['SCHEDULER_SHORT_JOB_BYTES'],
+                    max_wait=app.config['SCHEDULER_MAX_WAIT'],
+                    weights=parse_weights(app.config['SCHEDULER_WEIGHTS']),
+                )
+    return _scheduler
+
+def client_id(session_id):
+    """
+    Who a request is scheduled for: its API key, else its session, else its
+    address.
+
+    The key and session id are taken as sent, not checked, so a client that
+    sends a new one with every request gets a fresh per-client queue each
+    time. Per-client caps and weights only hold behind a gateway that
+    validates X-API-Key; the total queue cap (SCHEDULER_QUEUE) still bounds
+    every client together.
+    """
+    api_key = request.headers.get('X-API-Key')
+    if api_key:
+        return api_key
+    if session_id:
+        return session_id
+    return f"addr:{request.remote_addr}"
+
+# Channels an optimized run records: everything but echo, which it skips
+OPTIMIZED_CHANNELS = frozenset(CHANNELS) - {ECHO}
+
+def result_cache_key(code, seed, session_id, optimize=False):
+    """Cache key for a run, or None if its output may vary between runs"""
+    cache = get_result_cache()
+    if cache is None:
+        return None
+    determinism = AdvancedInterpreter.classify_determinism(code)
+    # Session runs depend on stored variables, not just on the script
+    if session_id or determinism not in (DETERMINISTIC, RANDOM) or (determinism == RANDOM and seed is None):
+        cache.record_bypass()
+        return None
+    return cache.key(code, seed if determinism == RANDOM else None, optimized=optimize)
 
 @app.route('/api/run_code', methods=['POST'])
 def run_code():
@@ -13,12 +141,131 @@ def run_code():
         if not code.strip():
             return jsonify({'output': 'Please write some code first!'})
             
-        interpreter = AdvancedInterpreter()
-        output = interpreter.process_code(code)
-        return jsonify({'output': output})
+        # Optional subset of 'print', 'echo' and 'error' to return
+        try:
+            channels = parse_channels(request.json.get('channels'))
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Optional seed that makes random numbers, and so the result, reproducible
+        seed = request.json.get('seed')
+        if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int)):
+            return jsonify({'error': 'seed must be an integer'}), 400
+
+        session_id = request.json.get('session_id')
+        snapshots = get_snapshots() if session_id else None
+        if snapshots:
+            try:
+                snapshots.path_for(session_id)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+
+        # Optional optimizer pass; only applied when the requested channels
+        # leave out echo, since optimized runs skip echo messages
+        optimize = bool(request.json.get('optimize', False)) and channels is not None and ECHO not in channels
+
+        cache_key = result_cache_key(code, seed, session_id, optimize)
+        records = get_result_cache().get(cache_key) if cache_key else None
+        ticket = None
+        if records is not None:
+            output = OutputBuffer.from_records(records, channels)
+            cache_status = 'hit'
+        else:
+            # Cache hits skip the queue; everything else waits for a fair turn
+            try:
+                with get_scheduler().slot(client_id(session_id), len(code)) as ticket:
+                    output = execute(code, channels, seed, session_id, cache_key, optimize)
+            except QueueFull as e:
+                response = jsonify({'error': str(e)})
+                response.headers['Retry-After'] = '1'
+                return response, 429
+            except QueueTimeout as e:
+                return jsonify({'error': str(e)}), 503
+            cache_status = 'miss' if cache_key else 'bypass'
+
+        response = {'output': output.render()}
+        if request.json.get('format') == 'records':
+            response['records'] = output.to_list()
+        response = jsonify(response)
+        response.headers['X-Result-Cache'] = cache_status
+        if ticket is not None:
+            response.headers['X-Queue-Wait-Ms'] = f"{ticket.queue_wait * 1e3:.1f}"
+            response.headers['X-Exec-Ms'] = f"{ticket.exec_time * 1e3:.1f}"
+        return response
     except Exception as e:
         logging.error(f"Error running code: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+def execute(code, channels, seed, session_id, cache_key, optimize=False):
+    """Run code in a fresh or restored session and return its output buffer"""
+    snapshots = get_snapshots() if session_id else None
+    # Load, run and save as one step, or concurrent requests for a session
+    # would each overwrite the other's changes
+    with snapshots.lock(session_id) if snapshots else nullcontext():
+        variables = None
+        if snapshots:
+            try:
+                variables = snapshots.load(session_id)
+            except SnapshotError as e:
+                logging.warning(f"Discarding unreadable snapshot for session {session_id}: {str(e)}")
+
+        interpreter = AdvancedInterpreter(
+            variables=variables,
+            compact=app.config['COMPACT_VARIABLES'],
+            data_dir=get_data_dir(),
+        )
+        # Cached runs keep every channel they can record, so later requests
+        # with the same key can select any of them
+        if cache_key:
+            run_channels = OPTIMIZED_CHANNELS if optimize else None
+        else:
+            run_channels = channels
+        interpreter.process_code(code, channels=run_channels, seed=seed, optimize=optimize)
+        if snapshots:
+            snapshots.save(session_id, interpreter.variables)
+    if cache_key:
+        get_result_cache().put(cache_key, interpreter.output.records)
+        return OutputBuffer.from_records(interpreter.output.records, channels)
+    return interpreter.output
+
+@app.route('/api/parse', methods=['POST'])
+def parse_code():
+    """
+    Match lines against the command grammar without running them.
+
+    {"code": ...} parses a whole buffer. Adding "doc_id" keeps the buffer so
+    later requests can send {"doc_id", "version", "changes"} with only the
+    edited line ranges; a 409 response means the client should resend the
+    full code.
+    """
+    try:
+        data = request.json
+        doc_id = data.get('doc_id')
+        sessions = get_parse_sessions()
+        if 'changes' in data:
+            return jsonify(sessions.edit(doc_id, data.get('version'), data['changes']))
+        code = data.get('code')
+        if not isinstance(code, str):
+            return jsonify({'error': 'code must be a string'}), 400
+        if doc_id is None:
+            return jsonify(sessions.parse(code))
+        return jsonify(sessions.open(doc_id, code))
+    except ConflictError as e:
+        return jsonify({'error': str(e), 'resync': True}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logging.error(f"Error parsing code: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    cache = get_result_cache()
+    return jsonify({
+        'result_cache': cache.stats() if cache else None,
+        'parse': get_parse_sessions().stats(),
+        'scheduler': get_scheduler().stats(),
+    })
+
 if __name__ == '__main__':
-    app.run(debug=True) 
\ No newline at end of file
+    app.run(debug=True)
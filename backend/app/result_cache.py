@@ -0,0 +1,96 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .interpreter.output import OutputRecord
+
+class ResultCache:
+    """
+    Bounded, expiring cache of interpreter output keyed by script hash.
+
+    Entries hold the output records of every channel, so one cached run can
+    serve requests for any channel selection. Limits apply to the number of
+    entries, the total size of their text, and their age.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 16 * 1024 * 1024, ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # key -> (expiry time, size in bytes, records)
+        self._entries: "OrderedDict[str, Tuple[float, int, Tuple[OutputRecord, ...]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def key(code: str, seed: Optional[int] = None, optimized: bool = False) -> str:
+        digest = hashlib.sha256()
+        digest.update(b'' if seed is None else str(seed).encode())
+        # Optimized runs record no echo messages, so they are cached apart
+        digest.update(b'\0O\0' if optimized else b'\0')
+        digest.update(code.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[List[OutputRecord]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, size, records = entry
+            if expires <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(records)
+
+    def put(self, key: str, records: List[OutputRecord]):
+        size = sum(len(record.text) for record in records)
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, tuple(records))
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def record_bypass(self):
+        """Count a request that was not eligible for caching"""
+        with self._lock:
+            self.bypasses += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'bypasses': self.bypasses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
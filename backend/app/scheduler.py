@@ -0,0 +1,68 @@
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+from .fair_queue import FairQueue, QueueFull, QueueTimeout, Ticket, parse_weights
+
+__all__ = ['FairScheduler', 'QueueFull', 'QueueTimeout', 'ThreadTicket', 'parse_weights']
+
+class ThreadTicket(Ticket):
+    """A ticket whose event is set when its job may run"""
+
+    __slots__ = ('event',)
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.event = threading.Event()
+
+    def notify(self):
+        self.event.set()
+
+class FairScheduler(FairQueue):
+    """
+    Weighted fair queuing (see FairQueue) for request threads: each thread
+    blocks in wait() until its job is dispatched, and every change to the
+    queue is made under one lock.
+    """
+
+    ticket_class = ThreadTicket
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+
+    def submit(self, client: str, size: int) -> ThreadTicket:
+        """Queue a job of size units (e.g. bytes of code); raises QueueFull"""
+        with self._lock:
+            return super().submit(client, size)
+
+    def wait(self, ticket: ThreadTicket):
+        """Block until ticket may run; raises QueueTimeout after max_wait"""
+        if ticket.event.wait(self.max_wait):
+            return
+        with self._lock:
+            if ticket.started is not None:
+                # Dispatched just as the wait ran out
+                return
+            self.cancel(ticket)
+            self.timed_out += 1
+        raise QueueTimeout(f"Waited more than {self.max_wait:g}s for an execution slot")
+
+    def release(self, ticket: ThreadTicket):
+        """Mark a running job as finished and start the next ones"""
+        with self._lock:
+            super().release(ticket)
+
+    @contextmanager
+    def slot(self, client: str, size: int) -> Iterator[ThreadTicket]:
+        """Run the body once client's job is scheduled"""
+        ticket = self.submit(client, size)
+        self.wait(ticket)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return super().stats()
@@ -0,0 +1,45 @@
+"""
+Measure AdvancedInterpreter construction cost and per-instance memory.
+
+Usage: python benchmarks/bench_construction.py [--instances N]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.interpreter.interpreter import AdvancedInterpreter
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--instances', type=int, default=100_000)
+    args = parser.parse_args()
+
+    AdvancedInterpreter()
+    start = time.perf_counter()
+    for _ in range(args.instances):
+        AdvancedInterpreter()
+    per_instance_us = (time.perf_counter() - start) / args.instances * 1e6
+
+    tracemalloc.start()
+    instances = [AdvancedInterpreter() for _ in range(args.instances)]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Subtract the list holding the instances
+    per_instance_bytes = (allocated - sys.getsizeof(instances)) / len(instances)
+
+    start = time.perf_counter()
+    for _ in range(args.instances // 10):
+        AdvancedInterpreter().process_code("Print 'hello'")
+    per_request_us = (time.perf_counter() - start) / (args.instances // 10) * 1e6
+
+    print(f"construction: {per_instance_us:.2f} us/instance")
+    print(f"memory:       {per_instance_bytes:.0f} bytes/instance")
+    print(f"construct + one-line script: {per_request_us:.2f} us")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Measure "Load" command throughput in MB/s against an eval'd list literal.
+
+Usage: python benchmarks/bench_loader.py [--values N]
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.interpreter.interpreter import AdvancedInterpreter
+from app.interpreter.loader import DataDirectory
+
+def run(code, data_dir):
+    interpreter = AdvancedInterpreter(compact=True, data_dir=data_dir)
+    interpreter.process_code(code, channels=['error'])
+    assert not interpreter.output.records, interpreter.output.render()
+
+def timed(code, data_dir):
+    """Best of three wall times, then peak allocation from a separate run"""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        run(code, data_dir)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    run(code, data_dir)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--values', type=int, default=1_000_000)
+    args = parser.parse_args()
+    # Per-line logging would dominate the timings
+    logging.disable(logging.CRITICAL)
+    rng = random.Random(0)
+    ints = [rng.randint(-10 ** 9, 10 ** 9) for _ in range(args.values)]
+    floats = [rng.uniform(-1000, 1000) for _ in range(args.values)]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_dir = DataDirectory(tmpdir, max_bytes=1 << 30)
+        files = {
+            'ints.csv': 'value\n' + '\n'.join(map(str, ints)) + '\n',
+            'floats.csv': '\n'.join(map(repr, floats)) + '\n',
+            'table.csv': 'id,value,label\n' + ''.join(f"{i},{v},row{i}\n" for i, v in enumerate(ints)),
+            'ints.json': json.dumps(ints),
+            'floats.json': json.dumps(floats),
+        }
+        for name, text in files.items():
+            with open(os.path.join(tmpdir, name), 'w') as f:
+                f.write(text)
+
+        for name, text in files.items():
+            megabytes = len(text) / 1e6
+            elapsed, peak = timed(f"Load value from {name} into data", data_dir)
+            print(f"Load {name:12} {megabytes:7.1f} MB  {megabytes / elapsed:7.1f} MB/s  peak {peak / 1e6:7.1f} MB")
+
+        literal = f"Make data equal to {ints!r}"
+        megabytes = len(literal) / 1e6
+        elapsed, peak = timed(literal, data_dir)
+        print(f"Make literal      {megabytes:7.1f} MB  {megabytes / elapsed:7.1f} MB/s  peak {peak / 1e6:7.1f} MB")
+
+if __name__ == '__main__':
+    main()
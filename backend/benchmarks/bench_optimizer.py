@@ -0,0 +1,49 @@
+"""
+Compare optimized and unoptimized runs of long interpreter scripts.
+
+Usage: python benchmarks/bench_optimizer.py [--lines N] [--repeat N]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.interpreter.interpreter import AdvancedInterpreter
+
+def scripts(lines):
+    return {
+        'additions': "Make count equal to 0\n" + "Add 1 to count\n" * lines + "Print count",
+        'repeat sorts': "Make data equal to [5, 3, 9, 1, 7]\n" + "Sort data\nPrint data\n" * (lines // 2),
+        'dead stores': "".join(f"Make x equal to {i}\n" for i in range(lines)) + "Print x",
+    }
+
+def best_time(code, optimize, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        interpreter = AdvancedInterpreter()
+        start = time.perf_counter()
+        interpreter.process_code(code, channels=['print', 'error'], optimize=optimize)
+        best = min(best, time.perf_counter() - start)
+    return best, interpreter.output.render()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--lines', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    # Per-line logging would dominate the timings
+    logging.disable(logging.CRITICAL)
+
+    for name, code in scripts(args.lines).items():
+        plain, plain_output = best_time(code, False, args.repeat)
+        optimized, optimized_output = best_time(code, True, args.repeat)
+        assert plain_output == optimized_output, name
+        print(f"{name:13} plain {plain * 1e3:8.2f} ms  optimized {optimized * 1e3:8.2f} ms  "
+              f"speedup {plain / optimized:5.1f}x")
+
+if __name__ == '__main__':
+    main()
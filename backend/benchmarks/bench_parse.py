@@ -0,0 +1,99 @@
+"""
+Measure /api/parse latency for as-you-type edits on large buffers.
+
+Opens a generated buffer, then replays single-line keystroke edits against
+it, reporting p50/p99 latency in-process and through the Flask endpoint.
+
+Usage: python benchmarks/bench_parse.py [--lines N] [--edits N]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import app
+from app.interpreter.diagnostics import ParseSessions
+
+TEMPLATES = [
+    "Make a number called {name} equal to {n}",
+    "Add {n} to {name}",
+    "Multiply {name} by {n}",
+    "Print {name}",
+    'Print "{name} is done"',
+    "Sort {name}",
+    "If {name} is bigger than {n}:",
+    "    Print {name}",
+    "Find the maximum of {name}",
+    "Something the grammar does not know {n}",
+]
+
+def generate(lines, rng):
+    names = ['score', 'count', 'total', 'items', 'x', 'y']
+    return [rng.choice(TEMPLATES).format(name=rng.choice(names), n=rng.randint(0, 500)) for _ in range(lines)]
+
+def keystrokes(buffer, edits, rng):
+    """Type characters onto the end of random lines, one request per key"""
+    for _ in range(edits):
+        index = rng.randrange(len(buffer))
+        buffer[index] += rng.choice('abcdefghij 0123456789')
+        yield index, buffer[index]
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return (statistics.median(samples) * 1e3, samples[int(len(samples) * 0.99) - 1] * 1e3)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--lines', type=int, default=1000)
+    parser.add_argument('--edits', type=int, default=2000)
+    args = parser.parse_args()
+    rng = random.Random(0)
+    buffer = generate(args.lines, rng)
+    code = '\n'.join(buffer)
+
+    sessions = ParseSessions()
+    start = time.perf_counter()
+    sessions.parse(code)
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    sessions.parse(code)
+    warm = time.perf_counter() - start
+    print(f"full parse of {args.lines} lines: cold {cold * 1e3:.2f} ms, warm {warm * 1e3:.2f} ms")
+
+    sessions.open('bench', code)
+    samples = []
+    version = 1
+    for index, line in keystrokes(list(buffer), args.edits, rng):
+        start = time.perf_counter()
+        version = sessions.edit('bench', version, [{'start': index, 'end': index + 1, 'lines': [line]}])['version']
+        samples.append(time.perf_counter() - start)
+    print("incremental edit (in-process):  p50 %.3f ms  p99 %.3f ms" % percentiles(samples))
+
+    client = app.test_client()
+    version = client.post('/api/parse', json={'doc_id': 'bench', 'code': code}).get_json()['version']
+    samples = []
+    for index, line in keystrokes(list(buffer), args.edits, rng):
+        start = time.perf_counter()
+        response = client.post('/api/parse', json={
+            'doc_id': 'bench',
+            'version': version,
+            'changes': [{'start': index, 'end': index + 1, 'lines': [line]}],
+        })
+        samples.append(time.perf_counter() - start)
+        version = response.get_json()['version']
+    print("incremental edit (endpoint):    p50 %.3f ms  p99 %.3f ms" % percentiles(samples))
+
+    samples = []
+    for _ in range(200):
+        start = time.perf_counter()
+        client.post('/api/parse', json={'code': code})
+        samples.append(time.perf_counter() - start)
+    print("full re-parse (endpoint):       p50 %.3f ms  p99 %.3f ms" % percentiles(samples))
+
+if __name__ == '__main__':
+    main()
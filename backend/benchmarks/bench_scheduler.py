@@ -0,0 +1,75 @@
+"""
+Measure how long a light client's short scripts wait while another client
+floods the server with long ones, under fair scheduling and plain FIFO.
+
+Jobs sleep for a time proportional to their size, standing in for script
+execution, so the numbers reflect scheduling rather than interpreter speed.
+
+Usage: python benchmarks/bench_scheduler.py [--batch N] [--slots N]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.scheduler import FairScheduler, QueueFull
+
+LONG_SIZE = 4000
+SHORT_SIZE = 20
+# Seconds of simulated execution per byte of script
+SECONDS_PER_BYTE = 5e-6
+
+def job(scheduler, client, size, waits, rejected):
+    try:
+        with scheduler.slot(client, size) as ticket:
+            time.sleep(size * SECONDS_PER_BYTE)
+        waits.append(ticket.queue_wait)
+    except QueueFull:
+        rejected.append(client)
+
+def run(scheduler, batch, short_jobs, fifo):
+    heavy_waits, light_waits, rejected = [], [], []
+    threads = [
+        threading.Thread(target=job, args=(scheduler, 'shared' if fifo else 'heavy', LONG_SIZE, heavy_waits, rejected))
+        for _ in range(batch)
+    ]
+    for thread in threads:
+        thread.start()
+    start = time.perf_counter()
+    for _ in range(short_jobs):
+        thread = threading.Thread(target=job, args=(scheduler, 'shared' if fifo else 'light', SHORT_SIZE, light_waits, rejected))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    return heavy_waits, light_waits, rejected, time.perf_counter() - start
+
+def report(name, heavy, light, rejected, elapsed):
+    light = sorted(light)
+    print(f"{name:5} light p50 {statistics.median(light) * 1e3:7.1f} ms  "
+          f"p99 {light[int(len(light) * 0.99)] * 1e3:7.1f} ms  "
+          f"heavy mean {statistics.mean(heavy) * 1e3:7.1f} ms  "
+          f"rejected {len(rejected)}  elapsed {elapsed:.2f} s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--batch', type=int, default=64, help='long scripts sent at once by the heavy client')
+    parser.add_argument('--short', type=int, default=50, help='short scripts sent by the light client')
+    parser.add_argument('--slots', type=int, default=4)
+    args = parser.parse_args()
+    print(f"{args.batch} x {LONG_SIZE}-byte scripts vs {args.short} x {SHORT_SIZE}-byte scripts, {args.slots} slots")
+
+    fifo = FairScheduler(max_concurrency=args.slots, short_reserved=0, short_job_size=0,
+                         max_queue_per_client=args.batch + args.short, max_queue=args.batch + args.short)
+    report('fifo', *run(fifo, args.batch, args.short, fifo=True))
+    fair = FairScheduler(max_concurrency=args.slots, max_queue_per_client=args.batch, max_queue=args.batch + args.short)
+    report('fair', *run(fair, args.batch, args.short, fifo=False))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Measure snapshot and restore time as session data grows.
+
+Usage: python benchmarks/bench_snapshot.py [--sizes 10000,100000,1000000] [--repeat N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.interpreter.snapshot import load_snapshot, save_snapshot
+
+def make_session(n_values, seed=0):
+    rng = random.Random(seed)
+    return {
+        'count': n_values,
+        'name': 'benchmark',
+        'ints': [rng.randint(0, 10**9) for _ in range(n_values)],
+        'floats': [rng.random() for _ in range(n_values)],
+    }
+
+def best_of(repeat, fn, *args, **kwargs):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'values':>10} {'file MB':>8} {'save ms':>9} {'lazy ms':>9} "
+          f"{'eager ms':>9} {'lazy+read ms':>13}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'session.snap')
+        for size in (int(s) for s in args.sizes.split(',')):
+            session = make_session(size)
+            save_time = best_of(args.repeat, save_snapshot, session, path)
+            lazy_time = best_of(args.repeat, load_snapshot, path, lazy=True)
+            eager_time = best_of(args.repeat, load_snapshot, path, lazy=False)
+
+            def lazy_then_read():
+                store = load_snapshot(path, lazy=True)
+                return sum(store['ints'])
+
+            read_time = best_of(args.repeat, lazy_then_read)
+            print(f"{size:>10} {os.path.getsize(path) / 1e6:>8.2f} {save_time * 1e3:>9.2f} "
+                  f"{lazy_time * 1e3:>9.3f} {eager_time * 1e3:>9.2f} {read_time * 1e3:>13.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Measure "did you mean" suggestion latency per unrecognized line: running
+the line, then rendering the suggestions in its error record's details.
+
+Usage: python benchmarks/bench_suggestions.py [--variables N] [--lines N]
+"""
+
+import argparse
+import logging
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.interpreter.interpreter import AdvancedInterpreter
+
+LINES = [
+    "Ad 5 to {name}",
+    "Prnt {name}",
+    "Srot {name}",
+    "Multipy {name} by 3",
+    "Convert {name} to uppercse",
+    "Genrate a random number betwen 1 and 5",
+    "Find the maximm of {name}",
+    "Hello world",
+]
+
+def misspell(word, rng):
+    if len(word) < 3:
+        return word
+    i = rng.randrange(len(word) - 1)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--variables', type=int, default=1000)
+    parser.add_argument('--lines', type=int, default=5000)
+    args = parser.parse_args()
+    # Per-line logging would dominate the timings
+    logging.disable(logging.CRITICAL)
+    rng = random.Random(0)
+
+    interpreter = AdvancedInterpreter()
+    for _ in range(args.variables):
+        name = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10)))
+        interpreter.variables[name] = 0
+    names = list(interpreter.variables)
+    # Builds the name index, as the first unrecognized line of a session would
+    start = time.perf_counter()
+    interpreter.suggest("Prnt x")
+    first = time.perf_counter() - start
+
+    samples = []
+    for _ in range(args.lines):
+        line = rng.choice(LINES).format(name=misspell(rng.choice(names), rng))
+        start = time.perf_counter()
+        interpreter.process_line(line)
+        interpreter.output.records[-1].data['suggestions']
+        samples.append(time.perf_counter() - start)
+        interpreter.output.clear()
+    samples.sort()
+    print(f"{args.variables} variables; first call (indexing names) {first * 1e3:.2f} ms")
+    print(f"per line: mean {statistics.mean(samples) * 1e3:.3f} ms  "
+          f"p50 {samples[len(samples) // 2] * 1e3:.3f} ms  p99 {samples[int(len(samples) * 0.99)] * 1e3:.3f} ms")
+
+if __name__ == '__main__':
+    main()
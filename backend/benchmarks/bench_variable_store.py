@@ -0,0 +1,82 @@
+"""
+Compare per-session memory of a plain dict and CompactVariableStore.
+
+Sessions are built by running a program through AdvancedInterpreter, then
+restored from a snapshot. Values a program builds take the same memory in
+either store; only restored arrays that are not read yet stay packed.
+
+Usage: python benchmarks/bench_variable_store.py [--scalars N] [--lists N] [--list-length N]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.interpreter.interpreter import AdvancedInterpreter
+from app.interpreter.snapshot import load_snapshot, save_snapshot
+from app.interpreter.variable_store import mapping_nbytes
+
+def make_program(n_scalars, n_lists, list_length, seed=0):
+    rng = random.Random(seed)
+    lines = []
+    for i in range(n_scalars):
+        value = rng.randint(1000, 10**9) if i % 2 else rng.random()
+        lines.append(f"Make x{i} equal to {value!r}")
+    for i in range(n_lists):
+        if i % 2:
+            values = [rng.randint(1000, 10**9) for _ in range(list_length)]
+        else:
+            values = [rng.random() for _ in range(list_length)]
+        lines.append(f"Make a list called values{i} equal to {values!r}")
+    return '\n'.join(lines)
+
+def build(code, compact):
+    interpreter = AdvancedInterpreter(compact=compact)
+    start = time.perf_counter()
+    interpreter.process_code(code, channels=['error'])
+    elapsed = time.perf_counter() - start
+    assert not interpreter.output.records, interpreter.output.render()
+    return interpreter.variables, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scalars', type=int, default=5_000)
+    parser.add_argument('--lists', type=int, default=100)
+    parser.add_argument('--list-length', type=int, default=1_000)
+    args = parser.parse_args()
+    # Per-line logging would dominate the timings
+    logging.disable(logging.CRITICAL)
+
+    code = make_program(args.scalars, args.lists, args.list_length)
+    plain, plain_time = build(code, compact=False)
+    compact, compact_time = build(code, compact=True)
+    plain_bytes = mapping_nbytes(plain)
+    compact_bytes = mapping_nbytes(compact)
+
+    print(f"scalars={args.scalars} lists={args.lists} list_length={args.list_length}")
+    print(f"built by the program:  dict {plain_bytes / 1e6:.2f} MB ({plain_time * 1e3:.0f} ms), "
+          f"compact {compact_bytes / 1e6:.2f} MB ({compact_time * 1e3:.0f} ms)")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'session.snap')
+        save_snapshot(plain, path)
+        for lazy in (False, True):
+            restored = load_snapshot(path, lazy=lazy)
+            before = restored.nbytes()
+            start = time.perf_counter()
+            for name in list(restored):
+                restored[name]
+            read_time = time.perf_counter() - start
+            label = 'mapped' if lazy else 'loaded'
+            print(f"restored ({label}):     {before / 1e6:.2f} MB unread ({plain_bytes / before:.2f}x smaller), "
+                  f"{restored.nbytes() / 1e6:.2f} MB after reading every variable ({read_time * 1e3:.1f} ms)")
+            del restored
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+import unittest
+from app import app
+from app.interpreter.diagnostics import ConflictError, LineParser, ParseSessions
+
+SCRIPT = """Make a number called score equal to 10
+# comment
+Add 5 to score
+Blah blah
+If score is bigger than 12:
+    Print "High score!"
+"""
+
+class TestLineParser(unittest.TestCase):
+    def setUp(self):
+        self.parser = LineParser()
+
+    def test_command_spans(self):
+        result = self.parser.parse("Add 5 to score")
+        self.assertEqual(result['category'], 'math_ops')
+        self.assertEqual(result['command'], 'math_operation')
+        self.assertEqual([(a['start'], a['end'], a['text']) for a in result['args']], [(4, 5, '5'), (9, 14, 'score')])
+
+    def test_spans_include_indentation(self):
+        result = self.parser.parse('    Print "High score!"')
+        self.assertEqual(result['command'], 'print_text')
+        self.assertEqual(result['args'], [{'start': 11, 'end': 22, 'text': 'High score!'}])
+
+    def test_block_header_and_unrecognized_line(self):
+        header = self.parser.parse("If score is bigger than 12:")
+        self.assertEqual(header['kind'], 'block')
+        self.assertEqual(header['args'][0]['text'], 'score is bigger than 12')
+        error = self.parser.parse("  Blah blah")
+        self.assertEqual(error, {
+            'kind': 'error',
+            'message': "I don't understand: Blah blah",
+            'start': 2,
+            'end': 11,
+            'suggestions': [],
+        })
+
+    def test_results_are_cached_by_text(self):
+        first = self.parser.parse("Print score")
+        self.assertIs(self.parser.parse("Print score"), first)
+        self.assertEqual(self.parser.stats()['hits'], 1)
+
+class TestParseSessions(unittest.TestCase):
+    def setUp(self):
+        self.sessions = ParseSessions(max_documents=2)
+
+    def test_incremental_edits_match_full_parse(self):
+        opened = self.sessions.open('doc', SCRIPT)
+        self.assertEqual(opened['diagnostics'], 1)
+        edited = self.sessions.edit('doc', 1, [
+            {'start': 3, 'end': 4, 'lines': ["Print score"]},
+            {'start': 0, 'end': 0, 'lines': ["Blah", "More blah"]},
+        ])
+        self.assertEqual(edited['version'], 2)
+        self.assertEqual(edited['diagnostics'], 2)
+        self.assertEqual(edited['changes'][0]['lines'][0]['line'], 4)
+        self.assertEqual([r['line'] for r in edited['changes'][1]['lines']], [1, 2])
+
+        lines = SCRIPT.split('\n')
+        lines[3:4] = ["Print score"]
+        lines[0:0] = ["Blah", "More blah"]
+        full = self.sessions.parse('\n'.join(lines))
+        self.assertEqual(full['diagnostics'], edited['diagnostics'])
+        self.assertEqual(full['line_count'], edited['line_count'])
+
+    def test_stale_version_and_eviction(self):
+        self.sessions.open('a', SCRIPT)
+        with self.assertRaises(ConflictError):
+            self.sessions.edit('a', 5, [])
+        self.sessions.open('b', SCRIPT)
+        self.sessions.open('c', SCRIPT)
+        with self.assertRaises(ConflictError):
+            self.sessions.edit('a', 1, [])
+
+    def test_invalid_range_leaves_document_unchanged(self):
+        self.sessions.open('doc', SCRIPT)
+        with self.assertRaises(ValueError):
+            self.sessions.edit('doc', 1, [
+                {'start': 0, 'end': 1, 'lines': []},
+                {'start': 5, 'end': 99, 'lines': []},
+            ])
+        self.assertEqual(self.sessions.edit('doc', 1, [])['line_count'], len(SCRIPT.split('\n')))
+
+class TestParseEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_parse_and_edit(self):
+        response = self.client.post('/api/parse', json={'doc_id': 'editor-1', 'code': SCRIPT})
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['lines'][3]['kind'], 'error')
+
+        response = self.client.post('/api/parse', json={
+            'doc_id': 'editor-1',
+            'version': data['version'],
+            'changes': [{'start': 3, 'end': 4, 'lines': ['Print score']}],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['diagnostics'], 0)
+
+        response = self.client.post('/api/parse', json={'doc_id': 'editor-1', 'version': 1, 'changes': []})
+        self.assertEqual(response.status_code, 409)
+        self.assertTrue(response.get_json()['resync'])
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.post('/api/parse', json={'code': 5}).status_code, 400)
+        self.assertEqual(self.client.post('/api/parse', json={'doc_id': '../x', 'code': ''}).status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,4 +5,11 @@ class TestAdvancedInterpreter(unittest.TestCase):
     def setUp(self):
         self.interpreter = AdvancedInterpreter()
     
-    # ... (keep all existing test methods) 
\ No newline at end of file
+    # ... (keep all existing test methods)
+
+    def test_instances_share_immutable_tables(self):
+        """Builtins and compiled patterns are built once, not per instance"""
+        other = AdvancedInterpreter()
+        self.assertIs(self.interpreter.safe_builtins, other.safe_builtins)
+        self.assertIs(self.interpreter.command_patterns, other.command_patterns)
+        self.assertFalse(hasattr(self.interpreter, '__dict__'))
@@ -0,0 +1,119 @@
+import json
+import os
+import tempfile
+import unittest
+from array import array
+from unittest import mock
+from app import app
+from app.interpreter import AdvancedInterpreter, DataDirectory, DataLoadError
+from app.interpreter import loader
+
+class TestDataDirectory(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.data = DataDirectory(self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, text):
+        with open(os.path.join(self.tmpdir.name, name), 'w') as f:
+            f.write(text)
+
+    def test_csv_columns(self):
+        self.write('scores.csv', 'name,score,ratio\na,1,0.5\nb,3,1.5\n\nc,2,2\n')
+        self.assertEqual(self.data.load('scores.csv', 'score'), array('q', [1, 3, 2]))
+        self.assertEqual(self.data.load('scores.csv', 'ratio'), array('d', [0.5, 1.5, 2.0]))
+        self.assertEqual(self.data.load('scores.csv', 'name'), ['a', 'b', 'c'])
+        with self.assertRaises(DataLoadError):
+            self.data.load('scores.csv', 'missing')
+
+    def test_csv_single_column_in_batches(self):
+        self.write('numbers.csv', '\n'.join(map(str, range(10))) + '\n2.5\nx\n')
+        with mock.patch.object(loader, 'CSV_BATCH_ROWS', 3):
+            values = self.data.load('numbers.csv', 'numbers')
+        self.assertEqual(values, [float(i) for i in range(10)] + [2.5, 'x'])
+
+    def test_csv_plain_column_falls_back_to_csv_module(self):
+        self.write('words.csv', 'numbers\r\n' + '1\r\n' * 20 + '"a, b"\r\n')
+        with mock.patch.object(loader, 'CSV_CHUNK_CHARS', 8):
+            values = self.data.load('words.csv', 'numbers')
+        self.assertEqual(values, [1] * 20 + ['a, b'])
+
+    def test_json_streaming_and_fallback(self):
+        self.write('flat.json', json.dumps(list(range(1000))))
+        self.write('strings.json', json.dumps(['a,b'] * 50 + [1]))
+        self.write('object.json', json.dumps({'values': [1, 2.5], 'other': 1}))
+        with mock.patch.object(loader, 'JSON_CHUNK_CHARS', 64):
+            self.assertEqual(self.data.load('flat.json', 'x'), array('q', range(1000)))
+            self.assertEqual(self.data.load('strings.json', 'x'), ['a,b'] * 50 + [1])
+        self.assertEqual(self.data.load('object.json', 'values'), array('d', [1.0, 2.5]))
+        with self.assertRaises(DataLoadError):
+            self.data.load('object.json', 'other')
+
+    def test_mixed_values_keep_their_types(self):
+        self.write('mixed.json', json.dumps([1, True, 2 ** 70]))
+        values = self.data.load('mixed.json', 'x')
+        self.assertEqual(values, [1, True, 2 ** 70])
+        self.assertIs(type(values[1]), bool)
+
+    def test_csv_long_integers_stay_exact(self):
+        self.write('long.csv', 'x\n1\n2.5\n' + str(2 ** 70) + '\n')
+        self.write('later.csv', 'x\n' + '1\n' * 3 + str(-2 ** 63 - 1) + '\n1e30\n')
+        values = self.data.load('long.csv', 'x')
+        self.assertEqual(values, [1.0, 2.5, 2 ** 70])
+        self.assertIs(type(values[2]), int)
+        with mock.patch.object(loader, 'CSV_BATCH_ROWS', 2):
+            values = self.data.load('later.csv', 'x')
+        self.assertEqual(values, [1, 1, 1, -2 ** 63 - 1, 1e30])
+        self.assertEqual([type(value) for value in values], [int] * 4 + [float])
+        self.write('edge.csv', 'x\n' + str(2 ** 63 - 1) + '\n' + str(-2 ** 63) + '\n')
+        self.assertEqual(self.data.load('edge.csv', 'x'), array('q', [2 ** 63 - 1, -2 ** 63]))
+
+    def test_restrictions(self):
+        self.write('big.csv', '1\n' * 100)
+        self.write('notes.txt', '1\n')
+        for filename in ('../outside.csv', '/etc/passwd', 'nope.csv', 'notes.txt'):
+            with self.assertRaises(DataLoadError):
+                self.data.load(filename, 'x')
+        with self.assertRaises(DataLoadError):
+            DataDirectory(self.tmpdir.name, max_bytes=10).load('big.csv', 'x')
+
+class TestLoadCommand(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.tmpdir.name, 'data.csv'), 'w') as f:
+            f.write('score\n5\n3\n9\n')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_list_commands_on_loaded_data(self):
+        for compact in (False, True):
+            interpreter = AdvancedInterpreter(compact=compact, data_dir=DataDirectory(self.tmpdir.name))
+            output = interpreter.process_code(
+                "Load score from data.csv into scores\nSort scores\nAdd 1 to scores\n"
+                "Append 4 to scores\nRemove 9 from scores\nPrint scores\nFind maximum of scores",
+                channels=['print', 'error'],
+            )
+            self.assertEqual(output, "[3, 5, 1, 4]\nMaximum of scores is 5")
+
+    def test_compact_store_keeps_array(self):
+        interpreter = AdvancedInterpreter(compact=True, data_dir=DataDirectory(self.tmpdir.name))
+        interpreter.process_code("Load score from data.csv")
+        self.assertEqual(interpreter.variables.raw('score'), array('q', [5, 3, 9]))
+
+    def test_disabled_without_data_directory(self):
+        output = AdvancedInterpreter().process_code("Load score from data.csv")
+        self.assertEqual(output, "Loading files is not enabled")
+
+    def test_endpoint_bypasses_result_cache(self):
+        client = app.test_client()
+        with mock.patch.dict(app.config, {'DATA_DIR': self.tmpdir.name}), \
+                mock.patch('app.main._data_dir', None):
+            response = client.post('/api/run_code', json={'code': "Load score from data.csv\nPrint score"})
+        self.assertEqual(response.get_json()['output'], "Loaded 3 values from data.csv into score\n[5, 3, 9]")
+        self.assertEqual(response.headers['X-Result-Cache'], 'bypass')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import random
+import unittest
+from app.interpreter import AdvancedInterpreter
+from app.interpreter.program import AddRun, Sort, parse_program
+from app.interpreter.optimizer import optimize_program
+
+# Channels that optimized runs must reproduce exactly
+VISIBLE = ['print', 'error']
+
+NAMES = ['count', 'total', 'numbers', 'words', 'ratio', 'missing']
+
+def random_value(rng):
+    return rng.choice([
+        str(rng.randint(-5, 5)),
+        f"{rng.uniform(-3, 3):.2f}",
+        str(2 ** 53),
+        str(10 ** 400),
+        "True",
+        "[3, 1, 2]",
+        "[2.5, 1, 'a']",
+        "[float('nan'), 1, 0]",
+        "'hello'",
+        "count + 1",
+        "numbers.pop()",
+        "[x := 4]",
+        "Hello World",
+        # Aliases: a later "Add 1 to <name>" appends to the shared list
+        "numbers",
+        "words",
+        "count",
+    ])
+
+def random_line(rng):
+    name = rng.choice(NAMES)
+    other = rng.choice(NAMES)
+    amount = rng.choice(['1', '2', '0.5', '0.1', 'inf', 'nan', other])
+    return rng.choice([
+        f"Make {name} equal to {random_value(rng)}",
+        f"Set {name} to {random_value(rng)}",
+        f"Add {amount} to {name}",
+        f"Add {amount} to {name}",
+        f"Add {amount} to {name}",
+        f"Sort {name}",
+        f"Sort {name}",
+        f"Remove 1 from {name}",
+        f"Append {amount} to {name}",
+        f"Double {name}",
+        f"Print {name}",
+        f"Print {name} + 1",
+        f"Print {other}.sort(reverse=True)",
+        f"Find maximum of {name}",
+        f"Convert {name} to uppercase",
+        "Print 'checkpoint'",
+        "Blah blah",
+        f"If {name} is bigger than 3:\n    Add 1 to {name}\n    Print {name}",
+    ])
+
+def random_script(rng, length):
+    lines = []
+    while len(lines) < length:
+        line = random_line(rng)
+        # Repeat lines to create foldable runs and redundant sorts
+        lines.extend([line] * rng.choice([1, 1, 2, 5]))
+    return '\n'.join(lines)
+
+def run(code, optimize):
+    interpreter = AdvancedInterpreter()
+    output = interpreter.process_code(code, channels=VISIBLE, optimize=optimize)
+    # Compare final values; insertion order can differ when a dead store is dropped
+    return output, repr(sorted(interpreter.variables.items()))
+
+class TestOptimizer(unittest.TestCase):
+    def test_folds_additions_and_marks_redundant_sorts(self):
+        program = optimize_program(parse_program(
+            "Make count equal to 0\n" + "Add 1 to count\n" * 100 +
+            "Make numbers equal to [3, 1, 2]\nSort numbers\nPrint numbers\nSort numbers"
+        ), AdvancedInterpreter())
+        runs = [s for s in program if type(s) is AddRun]
+        sorts = [s.redundant for s in program if type(s) is Sort]
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(len(runs[0].lines), 100)
+        self.assertEqual(sorts, [False, True])
+
+    def test_alias_of_a_sorted_list(self):
+        code = (
+            "Make a list called nums equal to [3, 1, 2]\nMake b equal to nums\n"
+            "Sort nums\nAdd 0 to b\nSort nums\nPrint nums"
+        )
+        program = optimize_program(parse_program(code), AdvancedInterpreter())
+        self.assertEqual([s.redundant for s in program if type(s) is Sort], [False, False])
+        self.assertEqual(run(code, optimize=True), run(code, optimize=False))
+        self.assertIn('[0, 1, 2, 3]', run(code, optimize=True)[0])
+
+    def test_drops_dead_stores(self):
+        program = optimize_program(parse_program(
+            "Make x equal to 1\nMake y equal to 2\nSet x to 3\nPrint x\nMake z equal to numbers.pop()\nSet z to 1"
+        ), AdvancedInterpreter())
+        texts = [s.text for s in program]
+        self.assertNotIn("Make x equal to 1", texts)
+        self.assertIn("Make y equal to 2", texts)
+        self.assertIn("Make z equal to numbers.pop()", texts)
+
+    def test_echo_disables_optimization(self):
+        code = "Make count equal to 0\nAdd 1 to count\nAdd 1 to count"
+        self.assertEqual(
+            AdvancedInterpreter().process_code(code, optimize=True),
+            AdvancedInterpreter().process_code(code),
+        )
+
+    def test_differential_against_unoptimized(self):
+        """Optimized runs match unoptimized runs on generated scripts"""
+        rng = random.Random(1234)
+        for _ in range(300):
+            code = random_script(rng, rng.randint(1, 40))
+            self.assertEqual(run(code, optimize=True), run(code, optimize=False), code)
+
+if __name__ == '__main__':
+    unittest.main()
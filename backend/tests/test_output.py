@@ -0,0 +1,77 @@
+import unittest
+from app import app
+from app.interpreter import AdvancedInterpreter, OutputBuffer
+
+SCRIPT = """Make a number called score equal to 10
+
+Add 5 to score
+Print score
+Blah blah
+If score is bigger than 12:
+    Print "High score!"
+"""
+
+class TestOutputBuffer(unittest.TestCase):
+    def setUp(self):
+        self.interpreter = AdvancedInterpreter()
+
+    def test_records_are_typed_with_line_numbers(self):
+        """Each record carries its channel and source line"""
+        self.interpreter.process_code(SCRIPT)
+        records = [(r.kind, r.line) for r in self.interpreter.output.records]
+        self.assertEqual(records, [
+            ('echo', 1),
+            ('echo', 3),
+            ('print', 4),
+            ('error', 5),
+            ('print', 7),
+        ])
+
+    def test_channel_selection(self):
+        """Only the requested channels are kept and rendered"""
+        full = self.interpreter.process_code(SCRIPT)
+        self.assertEqual(
+            self.interpreter.output.render(['print']),
+            AdvancedInterpreter().process_code(SCRIPT, channels=['print']),
+        )
+        self.assertEqual(self.interpreter.output.render(), full)
+        self.assertEqual(
+            AdvancedInterpreter().process_code(SCRIPT, channels=['error']),
+            "I don't understand: Blah blah",
+        )
+
+    def test_echo_skips_formatting_when_unwanted(self):
+        """Echo templates are not formatted when the channel is off"""
+        class Unprintable:
+            def __str__(self):
+                raise AssertionError("formatted")
+
+        buffer = OutputBuffer(channels=['print'])
+        buffer.echo("Created {} = {}", 'x', Unprintable())
+        self.assertEqual(len(buffer), 0)
+
+    def test_rejects_unknown_channels(self):
+        with self.assertRaises(ValueError):
+            OutputBuffer(channels=['stdout'])
+
+class TestRunCodeEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_channels_and_records(self):
+        response = self.client.post('/api/run_code', json={
+            'code': SCRIPT,
+            'channels': ['print', 'error'],
+            'format': 'records',
+        })
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['output'], "15.0\nI don't understand: Blah blah\nHigh score!")
+        self.assertEqual([r['kind'] for r in data['records']], ['print', 'error', 'print'])
+
+    def test_invalid_channels(self):
+        response = self.client.post('/api/run_code', json={'code': SCRIPT, 'channels': ['bogus']})
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from unittest import mock
+from app import app
+from app import main
+from app.interpreter import AdvancedInterpreter
+from app.interpreter.interpreter import DETERMINISTIC, NONDETERMINISTIC, RANDOM
+from app.interpreter.optimizer import optimize_program
+from app.interpreter.output import OutputRecord
+from app.result_cache import ResultCache
+
+class TestDeterminism(unittest.TestCase):
+    def test_classification(self):
+        cases = [
+            ("Make x equal to 1\nPrint x", DETERMINISTIC),
+            ("# random comment only\nPrint 'hi'", DETERMINISTIC),
+            ("Generate random number between 1 and 10", RANDOM),
+            ("Set x to random.randint(1, 6)", RANDOM),
+            ("Set name to input()", NONDETERMINISTIC),
+        ]
+        for code, expected in cases:
+            self.assertEqual(AdvancedInterpreter.classify_determinism(code), expected, code)
+
+    def test_seed_makes_random_reproducible(self):
+        code = "Generate random number between 1 and 1000000\nSet x to random.random()\nPrint x"
+        first = AdvancedInterpreter().process_code(code, seed=7)
+        second = AdvancedInterpreter().process_code(code, seed=7)
+        self.assertEqual(first, second)
+
+class TestResultCache(unittest.TestCase):
+    def test_entry_and_byte_limits(self):
+        cache = ResultCache(max_entries=2, max_bytes=10)
+        cache.put('a', [OutputRecord('print', 'aaaa')])
+        cache.put('b', [OutputRecord('print', 'bbbb')])
+        cache.put('c', [OutputRecord('print', 'cccc')])
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('c')[0].text, 'cccc')
+        cache.put('big', [OutputRecord('print', 'x' * 11)])
+        self.assertIsNone(cache.get('big'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_ttl(self):
+        cache = ResultCache(ttl=0)
+        cache.put('a', [OutputRecord('print', 'a')])
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['expirations'], 1)
+
+class TestRunCodeCaching(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        main.get_result_cache().clear()
+
+    def run_code(self, **payload):
+        response = self.client.post('/api/run_code', json=payload)
+        return response.headers.get('X-Result-Cache'), response.get_json()
+
+    def test_pure_scripts_are_cached(self):
+        code = "Make x equal to 2\nPrint x"
+        self.assertEqual(self.run_code(code=code)[0], 'miss')
+        status, data = self.run_code(code=code, channels=['print'])
+        self.assertEqual(status, 'hit')
+        self.assertEqual(data['output'], '2')
+
+    def test_random_scripts_need_a_seed(self):
+        code = "Generate random number between 1 and 10"
+        self.assertEqual(self.run_code(code=code)[0], 'bypass')
+        self.assertEqual(self.run_code(code=code, seed=3)[0], 'miss')
+        self.assertEqual(self.run_code(code=code, seed=3)[0], 'hit')
+        self.assertEqual(self.run_code(code=code, seed=4)[0], 'miss')
+
+    def test_optimized_runs_are_optimized_and_cached_apart(self):
+        code = "Make count equal to 0\nAdd 1 to count\nAdd 1 to count\nPrint count"
+        with mock.patch('app.interpreter.interpreter.optimize_program', wraps=optimize_program) as optimizer:
+            status, data = self.run_code(code=code, optimize=True, channels=['print', 'error'])
+            self.assertEqual((status, data['output']), ('miss', '2.0'))
+            self.assertEqual(optimizer.call_count, 1)
+            # The optimized entry has no echo records, so echo requests miss it
+            status, data = self.run_code(code=code, optimize=True)
+            self.assertEqual(status, 'miss')
+            self.assertIn('Updated count', data['output'])
+            self.assertEqual(self.run_code(code=code, optimize=True, channels=['print'])[0], 'hit')
+            self.assertEqual(optimizer.call_count, 1)
+
+    def test_invalid_seed(self):
+        response = self.client.post('/api/run_code', json={'code': 'Print 1', 'seed': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
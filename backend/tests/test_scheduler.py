@@ -0,0 +1,138 @@
+import threading
+import time
+import unittest
+from unittest import mock
+from app import app
+from app import main
+from app.scheduler import FairScheduler, QueueFull, QueueTimeout, parse_weights
+
+def started(tickets):
+    return [ticket for ticket in tickets if ticket.event.is_set()]
+
+class TestFairScheduler(unittest.TestCase):
+    def run_in_order(self, scheduler, tickets):
+        """Release running jobs one at a time and return the clients in start order"""
+        order = []
+        pending = list(tickets)
+        while pending:
+            running = started(pending)
+            self.assertEqual(len(running), 1)
+            order.append(running[0].client)
+            pending.remove(running[0])
+            scheduler.release(running[0])
+        return order
+
+    def test_clients_are_interleaved(self):
+        scheduler = FairScheduler(max_concurrency=1, short_reserved=0, short_job_size=0)
+        blocker = scheduler.submit('c', 100)
+        batch = [scheduler.submit('a', 100) for _ in range(4)]
+        single = scheduler.submit('b', 100)
+        scheduler.release(blocker)
+        self.assertEqual(self.run_in_order(scheduler, batch + [single]), ['a', 'b', 'a', 'a', 'a'])
+
+    def test_weights(self):
+        scheduler = FairScheduler(max_concurrency=1, short_reserved=0, short_job_size=0, weights={'a': 2})
+        blocker = scheduler.submit('c', 100)
+        tickets = [scheduler.submit(client, 100) for client in 'ab' * 4]
+        scheduler.release(blocker)
+        order = self.run_in_order(scheduler, tickets)
+        self.assertEqual(order[:6].count('a'), 4)
+
+    def test_large_jobs_cost_more(self):
+        scheduler = FairScheduler(max_concurrency=1, short_reserved=0, short_job_size=0)
+        blocker = scheduler.submit('c', 100)
+        tickets = [scheduler.submit('big', 1000), scheduler.submit('big', 1000)]
+        tickets += [scheduler.submit('small', 100) for _ in range(3)]
+        scheduler.release(blocker)
+        self.assertEqual(self.run_in_order(scheduler, tickets), ['small'] * 3 + ['big'] * 2)
+
+    def test_short_lane(self):
+        scheduler = FairScheduler(max_concurrency=2, short_reserved=1, short_job_size=50)
+        long_jobs = [scheduler.submit('a', 500) for _ in range(2)]
+        self.assertEqual(len(started(long_jobs)), 1)
+        short = scheduler.submit('b', 10)
+        self.assertTrue(short.event.is_set())
+        self.assertEqual(scheduler.stats()['running'], 2)
+
+    def test_queue_limits(self):
+        scheduler = FairScheduler(max_concurrency=1, max_queue_per_client=2, max_queue=3)
+        scheduler.submit('a', 10)
+        scheduler.submit('a', 10)
+        scheduler.submit('a', 10)
+        with self.assertRaises(QueueFull):
+            scheduler.submit('a', 10)
+        scheduler.submit('b', 10)
+        with self.assertRaises(QueueFull):
+            scheduler.submit('c', 10)
+        self.assertEqual(scheduler.stats()['rejected'], 2)
+
+    def test_wait_timeout(self):
+        scheduler = FairScheduler(max_concurrency=1, max_wait=0.01)
+        running = scheduler.submit('a', 10)
+        queued = scheduler.submit('b', 10)
+        with self.assertRaises(QueueTimeout):
+            scheduler.wait(queued)
+        next_job = scheduler.submit('b', 10)
+        scheduler.release(running)
+        self.assertTrue(next_job.event.is_set())
+        stats = scheduler.stats()
+        self.assertEqual((stats['timed_out'], stats['queued'], stats['running']), (1, 0, 1))
+
+    def test_idle_clients_are_forgotten(self):
+        scheduler = FairScheduler(max_concurrency=1)
+        for client in ('a', 'b', 'c'):
+            with scheduler.slot(client, 10) as ticket:
+                self.assertGreaterEqual(ticket.queue_wait, 0)
+        self.assertEqual(scheduler._last_finish, {})
+        self.assertEqual(scheduler._active, {})
+
+    def test_parse_weights(self):
+        self.assertEqual(parse_weights('a=2, b=0.5'), {'a': 2.0, 'b': 0.5})
+        self.assertEqual(parse_weights(''), {})
+
+class TestRunCodeScheduling(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        self.scheduler = main._scheduler
+        main.get_result_cache().clear()
+
+    def tearDown(self):
+        main._scheduler = self.scheduler
+
+    def test_timings_are_reported(self):
+        main._scheduler = FairScheduler()
+        response = self.client.post('/api/run_code', json={'code': 'Print "scheduled"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('X-Queue-Wait-Ms', response.headers)
+        self.assertIn('X-Exec-Ms', response.headers)
+        self.assertEqual(main._scheduler.stats()['completed'], 1)
+
+    def test_full_queue_is_rejected(self):
+        main._scheduler = FairScheduler(max_concurrency=1)
+        blocker = main._scheduler.submit('other', 10)
+        main._scheduler.max_queue = 0
+        # Nondeterministic, so the result cache cannot answer it
+        response = self.client.post('/api/run_code', json={'code': 'Set name to input()'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '1')
+        main._scheduler.release(blocker)
+        self.assertEqual(self.client.get('/api/metrics').get_json()['scheduler']['rejected'], 1)
+
+    def test_scheduler_is_created_once(self):
+        def slow_scheduler(**kwargs):
+            time.sleep(0.01)
+            return FairScheduler(**kwargs)
+
+        main._scheduler = None
+        schedulers = []
+        with mock.patch.object(main, 'FairScheduler', side_effect=slow_scheduler) as factory:
+            threads = [threading.Thread(target=lambda: schedulers.append(main.get_scheduler())) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(factory.call_count, 1)
+        self.assertEqual(len({id(scheduler) for scheduler in schedulers}), 1)
+
+if __name__ == '__main__':
+    unittest.main()
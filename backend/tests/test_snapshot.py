@@ -0,0 +1,147 @@
+import math
+import mmap
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from app.interpreter import (
+    AdvancedInterpreter,
+    SessionSnapshots,
+    SnapshotError,
+    load_snapshot,
+    save_snapshot,
+)
+from app import main
+from app.interpreter.snapshot import MAGIC
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'session.snap')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_round_trip(self):
+        """Lazy and eager restores return the saved values"""
+        variables = {
+            'score': 10,
+            'ratio': 0.25,
+            'name': 'Alice',
+            'numbers': list(range(1000)),
+            'weights': [0.5, 1.5],
+            'mixed': [1, 'two'],
+            'tags': {'a', 'b'},
+        }
+        self.assertEqual(save_snapshot(variables, self.path), [])
+        for lazy in (True, False):
+            restored = load_snapshot(self.path, lazy=lazy)
+            self.assertEqual(dict(restored.items()), variables)
+
+    def test_lazy_restore_maps_arrays(self):
+        """Numeric lists come back as memoryviews until they are rewritten"""
+        save_snapshot({'numbers': [3, 1, 2]}, self.path)
+        restored = load_snapshot(self.path)
+        self.assertIsInstance(restored.raw('numbers'), memoryview)
+
+        interpreter = AdvancedInterpreter(variables=restored)
+        interpreter.process_code("Sort numbers")
+        self.assertEqual(restored['numbers'], [1, 2, 3])
+        save_snapshot(restored, self.path)
+        self.assertEqual(load_snapshot(self.path)['numbers'], [1, 2, 3])
+
+    def test_skips_unserializable_values(self):
+        """Modules and other non-data values are skipped and reported"""
+        skipped = save_snapshot({'m': math, 'x': 1}, self.path)
+        self.assertEqual(skipped, ['m'])
+        self.assertEqual(dict(load_snapshot(self.path).items()), {'x': 1})
+
+    def test_rejects_invalid_files(self):
+        """Files that are not snapshots raise SnapshotError"""
+        with open(self.path, 'wb') as f:
+            f.write(b'not a snapshot at all')
+        with self.assertRaises(SnapshotError):
+            load_snapshot(self.path)
+
+    def test_failed_restore_closes_the_mapping(self):
+        """A lazy restore that fails closes its mmap, even after mapping some arrays"""
+        mappings = []
+
+        class RecordingMmap(mmap.mmap):
+            def __init__(self, *args, **kwargs):
+                mappings.append(self)
+
+        save_snapshot({'a': [1, 2, 3], 'b': [4.0, 5.0, 6.0]}, self.path)
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 8)
+        bad_header = os.path.join(self.tmpdir.name, 'bad.snap')
+        with open(bad_header, 'wb') as f:
+            f.write(MAGIC + b'\x10\0\0\0' + b'\xff' * 16)
+        for path in (self.path, bad_header):
+            with mock.patch('mmap.mmap', RecordingMmap), self.assertRaises(SnapshotError):
+                load_snapshot(path, lazy=True)
+            self.assertTrue(mappings[-1].closed)
+
+    def test_aliases_are_restored_as_one_object(self):
+        interpreter = AdvancedInterpreter()
+        interpreter.process_code("Make a list called nums equal to [3, 1, 2]\nMake b equal to nums\nMake m equal to [1, 'a']\nMake n equal to m")
+        save_snapshot(interpreter.variables, self.path)
+        for lazy in (True, False):
+            restored = AdvancedInterpreter(variables=load_snapshot(self.path, lazy=lazy))
+            restored.process_code("Append 9 to b\nAppend 0 to n")
+            self.assertEqual(restored.variables['nums'], [3, 1, 2, 9])
+            self.assertIs(restored.variables['nums'], restored.variables['b'])
+            self.assertEqual(restored.variables['m'], [1, 'a', 0])
+
+    def test_session_lock_is_exclusive(self):
+        sessions = SessionSnapshots(self.tmpdir.name)
+        events = []
+
+        def second():
+            with sessions.lock('user-1'):
+                events.append('second')
+
+        with sessions.lock('user-1'):
+            thread = threading.Thread(target=second)
+            thread.start()
+            time.sleep(0.05)
+            events.append('first done')
+        thread.join()
+        self.assertEqual(events, ['first done', 'second'])
+
+    def test_concurrent_requests_keep_every_update(self):
+        client = main.app.test_client()
+        with mock.patch.dict(main.app.config, {'SESSION_DIR': self.tmpdir.name}), \
+                mock.patch.object(main, '_snapshots', None):
+            client.post('/api/run_code', json={'code': 'Make count equal to 0', 'session_id': 'shared'})
+            threads = [
+                threading.Thread(target=client.post, args=('/api/run_code',),
+                                 kwargs={'json': {'code': 'Add 1 to count', 'session_id': 'shared'}})
+                for _ in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            response = client.post('/api/run_code', json={'code': 'Print count', 'session_id': 'shared'})
+        self.assertEqual(response.get_json()['output'], '4.0')
+
+    def test_session_snapshots(self):
+        """Sessions persist across interpreter instances"""
+        sessions = SessionSnapshots(self.tmpdir.name)
+        self.assertIsNone(sessions.load('user-1'))
+
+        first = AdvancedInterpreter()
+        first.process_code("Make a number called score equal to 10")
+        sessions.save('user-1', first.variables)
+
+        second = AdvancedInterpreter(variables=sessions.load('user-1'))
+        self.assertEqual(second.process_code("Add 5 to score"), "Updated score from 10 to 15.0")
+
+        with self.assertRaises(ValueError):
+            sessions.path_for('../escape')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from unittest import mock
+from app import app
+from app.interpreter import AdvancedInterpreter
+from app.interpreter.suggestions import NgramIndex, SuggestionIndex, edit_distance
+
+class TestNgramIndex(unittest.TestCase):
+    def test_edit_distance_counts_swaps_once(self):
+        self.assertEqual(edit_distance('score', 'scroe'), 1)
+        self.assertEqual(edit_distance('prnt', 'print'), 1)
+        self.assertEqual(edit_distance('', 'abc'), 3)
+        self.assertEqual(edit_distance('maximum', 'x', limit=2), 3)
+
+    def test_similar_words(self):
+        index = NgramIndex(['score', 'count', 'scores', 'total'])
+        self.assertEqual(index.similar('score'), {'score': 1.0})
+        self.assertEqual(index.best('scroe')[0], 'score')
+        self.assertNotIn('total', index.similar('scroe'))
+        self.assertIsNone(index.best('zzz'))
+
+    def test_prefix_ignores_later_words(self):
+        index = NgramIndex(['count'])
+        names = index.prefix(len(index))
+        index.add('score')
+        self.assertNotIn('score', names)
+        self.assertIsNone(names.best('scroe'))
+        self.assertEqual(index.best('scroe')[0], 'score')
+
+class TestSuggestionIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = SuggestionIndex()
+
+    def test_correction_and_templates(self):
+        suggestions = self.index.suggest("Ad 5 to scroe", names=NgramIndex(['score']))
+        self.assertEqual(suggestions[0], {'kind': 'correction', 'text': 'Add 5 to score'})
+        self.assertEqual(suggestions[1]['text'], 'Add <number> to <variable>')
+
+    def test_limit_and_rejected_correction(self):
+        suggestions = self.index.suggest("Convert x to uppercse", validate=lambda text: False, limit=2)
+        self.assertEqual([s['kind'] for s in suggestions], ['template', 'template'])
+        self.assertEqual(suggestions[0]['text'], 'Convert <variable> to uppercase')
+
+    def test_nothing_close(self):
+        self.assertEqual(self.index.suggest("Hello world"), [])
+
+class TestInterpreterSuggestions(unittest.TestCase):
+    def test_unrecognized_line_carries_suggestions(self):
+        interpreter = AdvancedInterpreter()
+        interpreter.process_code("Make total equal to 3\nPrnt totl")
+        record = interpreter.output.records[-1]
+        self.assertEqual(record.text, "I don't understand: Prnt totl")
+        self.assertEqual(record.data['suggestions'][0], {'kind': 'correction', 'text': 'Print total'})
+
+    def test_suggestions_are_built_when_rendered(self):
+        interpreter = AdvancedInterpreter()
+        with mock.patch.object(AdvancedInterpreter, 'suggest_for', wraps=AdvancedInterpreter.suggest_for) as suggest_for:
+            interpreter.process_code("Make total equal to 3\nPrnt totl\nMake totl equal to 4")
+            self.assertEqual(interpreter.output.render(), "Created total = 3\nI don't understand: Prnt totl\nCreated totl = 4")
+            suggest_for.assert_not_called()
+            records = interpreter.output.to_list()
+            self.assertEqual(suggest_for.call_count, 1)
+        # Names defined after the line are not offered
+        self.assertEqual(records[1]['data']['suggestions'][0], {'kind': 'correction', 'text': 'Print total'})
+        interpreter.output.to_list()
+        self.assertEqual(suggest_for.call_count, 1)
+
+    def test_records_endpoint(self):
+        response = app.test_client().post('/api/run_code', json={
+            'code': "Make total equal to 3\nSrot total",
+            'format': 'records',
+        })
+        data = response.get_json()
+        self.assertEqual(data['output'], "Created total = 3\nI don't understand: Srot total")
+        self.assertEqual(data['records'][-1]['data']['suggestions'][0]['text'], 'Sort total')
+        self.assertNotIn('data', data['records'][0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import os
+import tempfile
+import unittest
+from array import array
+from app.interpreter import AdvancedInterpreter, CompactVariableStore
+from app.interpreter.snapshot import load_snapshot, save_snapshot
+
+class TestCompactVariableStore(unittest.TestCase):
+    def setUp(self):
+        self.store = CompactVariableStore()
+
+    def test_round_trips_values(self):
+        """Values read back equal to and of the same type as what was stored"""
+        values = {
+            'count': 42,
+            'ratio': 0.5,
+            'flag': True,
+            'huge': 1 << 70,
+            'name': 'Alice',
+            'ints': [1, 2, 3],
+            'floats': [1.5, 2.5],
+            'mixed': [1, 2.0],
+            'empty': [],
+        }
+        for name, value in values.items():
+            self.store[name] = value
+        for name, value in values.items():
+            self.assertEqual(self.store[name], value)
+            self.assertIs(type(self.store[name]), type(value))
+        self.assertEqual(len(self.store), len(values))
+        self.assertEqual(set(self.store), set(values))
+
+    def test_arrays_stay_packed_until_read(self):
+        """Arrays are unpacked once, on first read, into one shared list"""
+        self.store.set_array('ints', array('q', [1, 2, 3]))
+        self.assertIsInstance(self.store.raw('ints'), array)
+        values = self.store['ints']
+        self.assertEqual(values, [1, 2, 3])
+        self.assertIs(self.store['ints'], values)
+        self.assertIs(self.store.raw('ints'), values)
+
+    def test_lists_keep_their_identity(self):
+        values = [1, 2, 3]
+        self.store['ints'] = values
+        self.assertIs(self.store['ints'], values)
+
+    def test_deleting(self):
+        self.store['x'] = 1
+        self.store.set_array('ints', array('q', [1]))
+        del self.store['x']
+        del self.store['ints']
+        self.assertEqual(len(self.store), 0)
+        with self.assertRaises(KeyError):
+            del self.store['x']
+
+    def test_nbytes_counts_unread_arrays_packed(self):
+        values = list(range(1000, 2000))
+        self.store.set_array('ints', array('q', values))
+        packed = self.store.nbytes()
+        self.assertTrue(self.store.is_packed('ints'))
+        self.store['ints']
+        self.assertFalse(self.store.is_packed('ints'))
+        self.assertGreater(self.store.nbytes(), 3 * packed)
+        self.assertEqual(self.store.nbytes(), CompactVariableStore({'ints': values}).nbytes())
+
+    def test_interpreter_with_compact_store(self):
+        """The interpreter produces the same output with either store"""
+        code = "\n".join([
+            "Make a number called score equal to 10",
+            "Add 5 to score",
+            "Make a list numbers equal to [3, 1, 2]",
+            "Sort numbers",
+            "Set total to sum(numbers) + score",
+            "Print total",
+            "Find maximum of numbers",
+        ])
+        expected = AdvancedInterpreter().process_code(code)
+        compact = AdvancedInterpreter(compact=True)
+        self.assertEqual(compact.process_code(code), expected)
+        self.assertIsInstance(compact.variables, CompactVariableStore)
+        self.assertGreater(compact.memory_usage(), 0)
+
+class TestStoreSemantics(unittest.TestCase):
+    """Programs print the same with the dict store, the compact store and a restored session"""
+
+    SCRIPTS = [
+        [
+            "Make a list numbers equal to [3, 1, 2]",
+            "Set y to numbers.pop()",
+            "Make b equal to numbers",
+            "Append 9 to numbers",
+            "Print numbers",
+            "Print b",
+            "Print y",
+        ],
+        [
+            "Make a list nums equal to [3, 1, 2]",
+            "Make b equal to nums",
+            "Sort nums",
+            "Add 0 to b",
+            "Remove 3 from nums",
+            "Print b",
+            "Set total to sum(b) + len(nums)",
+            "Print total",
+        ],
+        [
+            "Make a list values equal to [1.5, 2.5]",
+            "Set pair to [values, values]",
+            "Append 4.0 to values",
+            "Print pair",
+            "Set x to values.reverse()",
+            "Print values",
+        ],
+    ]
+
+    def test_mutation_and_aliases(self):
+        for lines in self.SCRIPTS:
+            code = "\n".join(lines)
+            expected = AdvancedInterpreter().process_code(code)
+            self.assertEqual(AdvancedInterpreter(compact=True).process_code(code), expected, code)
+
+    def test_restored_sessions(self):
+        """Lists restored from a snapshot behave like the ones saved"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'session.snap')
+            for lines in self.SCRIPTS:
+                setup, code = lines[0], "\n".join(lines[1:])
+                plain = AdvancedInterpreter()
+                plain.process_code(setup)
+                save_snapshot(plain.variables, path)
+                expected = plain.process_code(code)
+                for lazy in (True, False):
+                    restored = AdvancedInterpreter(variables=load_snapshot(path, lazy=lazy))
+                    self.assertEqual(restored.process_code(code), expected, code)
+
+if __name__ == '__main__':
+    unittest.main()
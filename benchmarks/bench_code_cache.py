@@ -0,0 +1,66 @@
+"""
+Benchmark the compiled-code cache used by /api/execute.
+
+Compares compiling generated snippets with reading them from the cache, and
+the end-to-end run time of the old temp-file path against the cached runner.
+
+Usage: python benchmarks/bench_code_cache.py [--runs N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from code_cache import CodeCache
+
+def snippet(lines):
+    """Generated-looking code: assignments, a loop and prints"""
+    body = [f"value_{i} = [{i}, {i + 1}, {i + 2}]\nprint(sum(value_{i}))" for i in range(lines)]
+    return "\n".join(body) + "\nfor i in range(3):\n    print('done', i)\n"
+
+def run_temp_file(source):
+    with open("temp.py", "w") as f:
+        f.write(source)
+    try:
+        return subprocess.run([sys.executable, "temp.py"], capture_output=True, text=True, timeout=30)
+    finally:
+        os.remove("temp.py")
+
+def median_ms(function, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e3
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        for lines in (5, 50, 500):
+            source = snippet(lines)
+            compile_ms = median_ms(lambda: compile(source, "<generated>", "exec"), args.runs)
+            cache = CodeCache(os.path.join(directory, f"cache-{lines}"))
+            cache.get_or_compile(source)
+            lookup_ms = median_ms(lambda: cache.get_or_compile(source), args.runs)
+            old_ms = median_ms(lambda: run_temp_file(source), args.runs)
+            cached_ms = median_ms(lambda: cache.run(source), args.runs)
+            assert run_temp_file(source).stdout == cache.run(source).stdout
+            print(f"{lines:4} statements: compile {compile_ms:7.3f} ms  cache lookup {lookup_ms:6.3f} ms  |  "
+                  f"run via temp file {old_ms:6.1f} ms  cached {cached_ms:6.1f} ms")
+            stats = cache.stats()
+        print(f"last cache: hit ratio {stats['hit_ratio']:.2f}, "
+              f"compile time saved {stats['compile_seconds_saved'] * 1e3:.1f} ms")
+
+if __name__ == '__main__':
+    main()
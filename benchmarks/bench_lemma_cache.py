@@ -0,0 +1,88 @@
+"""
+Benchmark the lemma cache on a corpus with a small, heavily repeated vocabulary.
+
+Usage: python benchmarks/bench_lemma_cache.py [--tokens N] [--vocab N] [--cache-size N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from lemma_cache import LemmaCache
+
+def load_lemmatizer():
+    """WordNet when its corpus is installed, otherwise a suffix-stripping stand-in"""
+    try:
+        from nltk.stem import WordNetLemmatizer
+        lemmatizer = WordNetLemmatizer()
+        lemmatizer.lemmatize('warmup')
+        return 'wordnet', lemmatizer.lemmatize
+    except (ImportError, LookupError):
+        def strip_suffix(token):
+            for suffix in ('ies', 'es', 's'):
+                if token.endswith(suffix) and len(token) > len(suffix) + 2:
+                    return token[:-len(suffix)]
+            return token
+        return 'suffix-stub', strip_suffix
+
+def make_corpus(n_tokens, vocab_size, seed=0):
+    """Zipf-like token stream; each occurrence is a distinct string object"""
+    rng = random.Random(seed)
+    vocab = [f"word{i}s" for i in range(vocab_size)]
+    weights = [1.0 / (rank + 1) for rank in range(vocab_size)]
+    # ''.join creates a fresh object per occurrence, like a tokenizer does
+    return [''.join(list(token)) for token in rng.choices(vocab, weights, k=n_tokens)]
+
+def run_uncached(lemmatize, tokens):
+    return [lemmatize(token) for token in tokens]
+
+def run_cached(cache, tokens):
+    tokens = [sys.intern(token) for token in tokens]
+    return [cache.lemmatize(token) for token in tokens]
+
+def measure(fn, *args):
+    """Best-of-3 wall time, plus bytes still allocated by the result"""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    result = fn(*args)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return best, retained
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tokens', type=int, default=500_000)
+    parser.add_argument('--vocab', type=int, default=5_000)
+    parser.add_argument('--cache-size', type=int, default=50_000)
+    args = parser.parse_args()
+
+    name, lemmatize = load_lemmatizer()
+    tokens = make_corpus(args.tokens, args.vocab)
+    print(f"lemmatizer={name} tokens={args.tokens} vocab={args.vocab} cache_size={args.cache_size}")
+
+    base_time, base_bytes = measure(run_uncached, lemmatize, tokens)
+    print(f"uncached: {base_time:.3f}s  result={base_bytes / 1e6:.1f} MB")
+
+    cache = LemmaCache(lemmatize, max_size=args.cache_size)
+    cached_time, cached_bytes = measure(run_cached, cache, tokens)
+    # Report hit rate for a single cold pass rather than the repeated timing runs
+    cache = LemmaCache(lemmatize, max_size=args.cache_size)
+    run_cached(cache, tokens)
+    stats = cache.stats()
+    print(f"cached:   {cached_time:.3f}s  result={cached_bytes / 1e6:.1f} MB  "
+          f"speedup={base_time / cached_time:.2f}x")
+    print(f"hit_rate={stats['hit_rate']:.4f} hits={stats['hits']} misses={stats['misses']} "
+          f"evictions={stats['evictions']} cache_memory={stats['memory_bytes'] / 1e3:.1f} kB")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+import hashlib
+import importlib.util
+import marshal
+import os
+import stat
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+# Script run in a fresh interpreter to execute a cached code object
+RUNNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "code_runner.py")
+
+# Bytecode magic of this interpreter, source SHA-256, seconds the compile took
+HEADER = struct.Struct("<4s32sd")
+# Name shown for generated code in tracebacks
+CODE_FILENAME = "<generated>"
+
+def read_header(path: str) -> Optional[Tuple[bytes, bytes, float]]:
+    """(magic number, source digest, compile seconds) of a cache file, or None"""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+    except OSError:
+        return None
+    if len(header) < HEADER.size:
+        return None
+    return HEADER.unpack(header)
+
+def default_directory() -> str:
+    """Per-user cache directory, under XDG_CACHE_HOME or ~/.cache"""
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "natural-python", "code")
+
+def check_private(directory: str):
+    """
+    Raise PermissionError unless directory belongs to this user and nobody
+    else can write to it: any writer could plant code that runs as ours.
+    """
+    if not hasattr(os, "getuid"):
+        return
+    info = os.stat(directory)
+    if info.st_uid != os.getuid():
+        raise PermissionError(f"Code cache directory {directory} is owned by another user")
+    if info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError(f"Code cache directory {directory} is writable by other users")
+
+class CodeCache:
+    """
+    Content-addressed on-disk cache of compiled generated code.
+
+    Entries are named by the SHA-256 of the source. Each holds a header with
+    the interpreter's bytecode magic number, followed by the marshaled code
+    object and its source, which tracebacks quote. Every worker process
+    pointed at the same directory shares the entries, and entries written by
+    another Python version are recompiled. Files are replaced atomically, so
+    concurrent writers never expose partial entries.
+
+    Entries are executed, so the directory must be private to this user: it
+    is created with mode 0700, and an existing one is rejected if another
+    user owns it or can write to it.
+    """
+
+    def __init__(self, directory: str, max_entries: int = 10000):
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        check_private(directory)
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.compile_seconds = 0.0
+        self.compile_seconds_saved = 0.0
+
+    @classmethod
+    def from_env(cls) -> "CodeCache":
+        directory = os.getenv("CODE_CACHE_DIR") or default_directory()
+        return cls(directory, max_entries=int(os.getenv("CODE_CACHE_SIZE", "10000")))
+
+    def path_for(self, digest: bytes) -> str:
+        return os.path.join(self.directory, digest.hex() + ".bin")
+
+    def get_or_compile(self, source: str) -> str:
+        """
+        Path of the cache file holding source compiled. Raises SyntaxError (or
+        ValueError for null bytes) if source does not compile.
+        """
+        digest = hashlib.sha256(source.encode("utf-8", "surrogatepass")).digest()
+        path = self.path_for(digest)
+        header = read_header(path)
+        if header is not None:
+            magic, source_digest, compile_seconds = header
+            if magic == importlib.util.MAGIC_NUMBER and source_digest == digest:
+                with self._lock:
+                    self.hits += 1
+                    self.compile_seconds_saved += compile_seconds
+                return path
+            # Written by another Python version, or damaged
+            with self._lock:
+                self.stale += 1
+
+        start = time.perf_counter()
+        code = compile(source, CODE_FILENAME, "exec", dont_inherit=True)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.misses += 1
+            self.compile_seconds += elapsed
+        self._write(path, HEADER.pack(importlib.util.MAGIC_NUMBER, digest, elapsed) + marshal.dumps((code, source)))
+        return path
+
+    def _write(self, path: str, data: bytes):
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        with self._lock:
+            self._writes_since_prune += 1
+            prune = self._writes_since_prune > max(1, self.max_entries // 10)
+            if prune:
+                self._writes_since_prune = 0
+        if prune:
+            self.prune()
+
+    def prune(self):
+        """Delete the least recently written entries beyond max_entries"""
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith(".bin"):
+                    try:
+                        entries.append((entry.stat().st_mtime, entry.path))
+                    except FileNotFoundError:
+                        pass
+        entries.sort()
+        for _, path in entries[:max(0, len(entries) - self.max_entries)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Another worker pruned it first
+                pass
+
+    def run(self, source: str, timeout: float = 30) -> subprocess.CompletedProcess:
+        """Execute source in a fresh interpreter, compiling it only on a cache miss"""
+        try:
+            path = self.get_or_compile(source)
+        except (SyntaxError, ValueError):
+            # Let the interpreter report the error exactly as it would for a script
+            fd, script = tempfile.mkstemp(suffix=".py")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8", errors="surrogatepass") as f:
+                    f.write(source)
+                return subprocess.run(
+                    [sys.executable, script],
+                    capture_output=True,
+                    text=True,
+                    timeout=timeout,
+                )
+            finally:
+                os.remove(script)
+        return subprocess.run(
+            [sys.executable, RUNNER, path],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "compile_seconds": self.compile_seconds,
+                "compile_seconds_saved": self.compile_seconds_saved,
+            }
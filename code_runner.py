@@ -0,0 +1,56 @@
+"""
+Run a compiled code object from the code cache as if it were a script.
+
+Usage: python code_runner.py <cache file>
+
+Kept free of project imports so that starting it costs no more than
+starting the script itself would.
+"""
+
+import importlib.util
+import marshal
+import os
+import struct
+import sys
+
+# Must match code_cache.HEADER
+HEADER = struct.Struct("<4s32sd")
+# Exit status when the cache file is unusable; the caller checks entries
+# first, so this only happens if one is replaced by another Python version
+STALE_EXIT = 3
+
+def main():
+    path = sys.argv[1]
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < HEADER.size or HEADER.unpack_from(data)[0] != importlib.util.MAGIC_NUMBER:
+        print(f"Stale or corrupt code cache entry: {path}", file=sys.stderr)
+        sys.exit(STALE_EXIT)
+    code, source = marshal.loads(data[HEADER.size:])
+
+    # Present the code to itself as a main script in the working directory,
+    # where it used to be written before running: imports and __file__
+    # resolve there, not next to this runner
+    sys.argv = [code.co_filename]
+    sys.path[0] = os.getcwd()
+    namespace = {
+        "__name__": "__main__",
+        "__file__": os.path.join(os.getcwd(), code.co_filename),
+        "__builtins__": __builtins__,
+    }
+    try:
+        exec(code, namespace)
+    except SystemExit:
+        raise
+    except BaseException as e:
+        # Imported only on failure, to keep startup as cheap as running a script
+        import linecache
+        import traceback
+        # Let the traceback quote the failing line, as it would for a script file
+        linecache.cache[code.co_filename] = (len(source), None, source.splitlines(True), code.co_filename)
+        # Leave this runner's own frame out of the traceback
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import sys
+from collections import OrderedDict
+from typing import Callable, Dict
+
+class LemmaCache:
+    """Bounded LRU memo of token -> lemma, holding interned strings"""
+
+    def __init__(self, lemmatize: Callable[[str], str], max_size: int = 50000):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._lemmatize = lemmatize
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lemmatize(self, token: str) -> str:
+        """Return the cached lemma for a token"""
+        lemma = self._entries.get(token)
+        if lemma is not None:
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return lemma
+
+        self.misses += 1
+        token = sys.intern(token)
+        lemma = self._lemmatize(token)
+        # Reuse the token object when lemmatization is the identity
+        lemma = token if lemma == token else sys.intern(lemma)
+        self._entries[token] = lemma
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return lemma
+
+    def clear(self):
+        """Drop all cached entries and reset the counters"""
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by the cache table and its strings"""
+        total = sys.getsizeof(self._entries)
+        for token, lemma in self._entries.items():
+            total += sys.getsizeof(token)
+            if lemma is not token:
+                total += sys.getsizeof(lemma)
+        return total
+
+    def stats(self) -> Dict:
+        """Hit-rate and memory statistics"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'memory_bytes': self.memory_bytes(),
+        }
@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+DEFAULT_MODEL = "gpt-3.5-turbo"
+
+# Upstream statuses worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+class LLMError(Exception):
+    """Raised when the completion API fails after all retries"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+class LLMTimeout(LLMError):
+    """Raised when a call does not finish within its deadline"""
+
+class MalformedResponse(LLMError):
+    """Raised when a successful response does not hold a chat completion"""
+
+class AsyncTranslationClient:
+    """
+    Async chat-completion client with a shared keep-alive connection pool.
+
+    In-flight upstream requests are capped by a semaphore, failed attempts are
+    retried with jittered exponential backoff, and every call has an overall
+    deadline that covers all of its attempts.
+
+    Use the coroutine methods from a single event loop (FastAPI), or the
+    *_blocking methods from synchronous code (Flask); the latter run on a
+    background event loop owned by the client so the pool is still shared
+    across threads.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        model: str = DEFAULT_MODEL,
+        max_connections: int = 20,
+        max_in_flight: int = 10,
+        max_retries: int = 3,
+        timeout: float = 30.0,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.api_key = api_key if api_key is not None else os.getenv("OPENAI_API_KEY", "")
+        self.base_url = (base_url or os.getenv("OPENAI_BASE_URL") or DEFAULT_BASE_URL).rstrip('/')
+        self.model = model
+        self.max_connections = max_connections
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Custom transport, e.g. httpx.MockTransport in tests
+        self.transport = transport
+
+        # Created on first use, inside the event loop that will own them
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._background_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, **overrides) -> "AsyncTranslationClient":
+        """Build a client from LLM_* environment variables"""
+        settings = {
+            'model': os.getenv("LLM_MODEL", DEFAULT_MODEL),
+            'max_connections': int(os.getenv("LLM_MAX_CONNECTIONS", "20")),
+            'max_in_flight': int(os.getenv("LLM_MAX_IN_FLIGHT", "10")),
+            'max_retries': int(os.getenv("LLM_MAX_RETRIES", "3")),
+            'timeout': float(os.getenv("LLM_TIMEOUT", "30")),
+        }
+        settings.update(overrides)
+        return cls(**settings)
+
+    def _ensure_client(self):
+        loop = asyncio.get_running_loop()
+        if self._client is None:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                transport=self.transport,
+            )
+        elif loop is not self._loop:
+            raise RuntimeError("AsyncTranslationClient used from more than one event loop")
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Full-jitter exponential backoff, honouring Retry-After when given"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.backoff_max))
+            except ValueError:
+                pass
+        return delay
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0,
+        max_tokens: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Send a chat completion request and return the decoded response"""
+        self._ensure_client()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout if timeout is not None else self.timeout)
+        payload = {"model": self.model, "messages": messages, "temperature": temperature}
+        if max_tokens is not None:
+            payload["max_tokens"] = max_tokens
+
+        last_error: Optional[LLMError] = None
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            retry_after = None
+            # Waiting for a permit counts against the deadline too
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), remaining)
+            except asyncio.TimeoutError:
+                raise LLMTimeout("Timed out waiting for an upstream request slot")
+            try:
+                try:
+                    # httpx timeouts bound each phase; wait_for bounds the whole request
+                    remaining = max(deadline - loop.time(), 0.001)
+                    response = await asyncio.wait_for(
+                        self._client.post("/chat/completions", json=payload, timeout=remaining), remaining
+                    )
+                finally:
+                    self._semaphore.release()
+                if response.status_code == 200:
+                    return self._decode(response)
+                last_error = LLMError(
+                    f"Upstream returned {response.status_code}: {response.text[:200]}",
+                    status_code=response.status_code,
+                )
+                if response.status_code not in RETRYABLE_STATUS:
+                    raise last_error
+                retry_after = response.headers.get("Retry-After")
+            except (httpx.TimeoutException, asyncio.TimeoutError) as e:
+                last_error = LLMTimeout(f"Upstream request timed out: {e or 'deadline reached'}")
+            except httpx.TransportError as e:
+                last_error = LLMError(f"Upstream connection error: {e}")
+            except MalformedResponse as e:
+                last_error = e
+
+            if attempt == self.max_retries:
+                break
+            delay = self._backoff(attempt, retry_after)
+            if loop.time() + delay >= deadline:
+                break
+            logging.warning(f"LLM request failed ({last_error}); retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+        if last_error is None or loop.time() >= deadline:
+            raise LLMTimeout("Upstream request exceeded its deadline")
+        raise last_error
+
+    @staticmethod
+    def _decode(response: httpx.Response) -> Dict[str, Any]:
+        """The body of a successful response; MalformedResponse if it is not a completion"""
+        try:
+            body = response.json()
+        except ValueError as e:
+            raise MalformedResponse(f"Upstream returned invalid JSON: {e}")
+        choices = body.get("choices") if isinstance(body, dict) else None
+        if not isinstance(choices, list) or not all(
+            isinstance(choice, dict)
+            and isinstance(choice.get("message"), dict)
+            and isinstance(choice["message"].get("content"), str)
+            for choice in choices
+        ):
+            raise MalformedResponse(f"Upstream returned an unexpected body: {response.text[:200]}")
+        return body
+
+    async def chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Send a chat completion request and return the reply text"""
+        response = await self.complete(messages, **kwargs)
+        choices = response["choices"]
+        if not choices:
+            return ""
+        return choices[0]["message"]["content"]
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._semaphore = None
+            self._loop = None
+
+    def _get_background_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._background_loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="llm-client", daemon=True)
+                thread.start()
+                self._background_loop = loop
+            return self._background_loop
+
+    def complete_blocking(self, messages: List[Dict[str, str]], **kwargs) -> Dict[str, Any]:
+        """Synchronous complete() for callers without an event loop"""
+        future = asyncio.run_coroutine_threadsafe(self.complete(messages, **kwargs), self._get_background_loop())
+        return future.result()
+
+    def chat_blocking(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Synchronous chat() for callers without an event loop"""
+        future = asyncio.run_coroutine_threadsafe(self.chat(messages, **kwargs), self._get_background_loop())
+        return future.result()
@@ -0,0 +1,124 @@
+"""
+Local stand-in for the OpenAI chat completions API.
+
+Answers POST .../chat/completions after a configurable delay, fails a
+configurable fraction of requests, and replies with Python code that prints
+the user's message, so the backends can be load tested without a real key.
+
+Usage: python loadtest/fake_upstream.py [--port N] [--latency-ms N]
+           [--jitter-ms N] [--error-rate F] [--error-status N] [--seed N]
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class FakeUpstream(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, error_status=503, seed=None):
+        super().__init__(address, CompletionHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def draw(self):
+        """(delay in seconds, whether to fail) for the next request"""
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1e3
+            fail = self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        return delay, fail
+
+def generated_code(messages):
+    """Code a translation model might return: print the last user message"""
+    text = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    return f"print({text!r})"
+
+class CompletionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self.reply(200, {"requests": self.server.requests, "errors": self.server.errors})
+        else:
+            self.reply(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if not self.path.endswith("/chat/completions"):
+            self.reply(404, {"error": {"message": "Not found"}})
+            return
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self.reply(400, {"error": {"message": "Invalid JSON"}})
+            return
+        delay, fail = self.server.draw()
+        time.sleep(delay)
+        if fail:
+            self.reply(self.server.error_status, {"error": {"message": "Injected failure", "type": "server_error"}})
+            return
+        content = generated_code(payload.get("messages", []))
+        prompt_tokens = sum(len(m.get("content", "").split()) for m in payload.get("messages", []))
+        completion_tokens = len(content.split())
+        self.reply(200, {
+            "id": f"chatcmpl-fake-{self.server.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "fake"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+    def reply(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="mean delay before each reply")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="delay varies uniformly by up to this much")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    server = FakeUpstream(
+        (args.host, args.port),
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+    print(f"Fake completion API on http://{args.host}:{server.server_port}/v1", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
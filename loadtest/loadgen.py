@@ -0,0 +1,447 @@
+"""
+Load test /api/run_code and /api/execute from a scenario file.
+
+Starts the fake completion server and whichever backends the scenario's
+requests target, sends requests at a fixed rate whether or not earlier ones
+have finished, and reports throughput, latency percentiles, error rates, and
+the CPU and memory used by each server.
+
+Usage: python loadtest/loadgen.py loadtest/scenarios/mixed.json
+           [--rps N] [--duration S] [--json FILE] [--record FILE]
+           [--url NAME=URL ...]
+
+Latency is measured from when a request was due to be sent, so time spent
+waiting behind a slow server counts even if the generator itself fell
+behind. --url points a target at an already running server instead of
+starting one; its CPU and memory are then not reported.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import string
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# How each target is started; "{...}" fields are filled in at launch. Servers
+# run in a scratch directory so their log files stay out of the tree.
+TARGETS = {
+    # Workers and threads as in backend/Dockerfile
+    "backend": {
+        "command": ["{python}", "-m", "gunicorn", "--bind", "127.0.0.1:{port}", "--workers", "4",
+                    "--threads", "8", "--pythonpath", os.path.join(ROOT, "backend"), "app.main:app"],
+        "ready": "/api/metrics",
+    },
+    "api": {
+        "command": ["{python}", "-m", "uvicorn", "main:app", "--app-dir", ROOT,
+                    "--port", "{port}", "--log-level", "warning"],
+        "env": {"OPENAI_API_KEY": "loadtest", "OPENAI_BASE_URL": "{upstream}"},
+        "ready": "/api/scheduler_stats",
+    },
+}
+
+SCENARIO_DEFAULTS = {
+    "seed": 0,
+    "rps": 10,
+    "duration": 30,
+    "warmup": 5,
+    # "uniform" spacing, or "poisson" arrivals at the same mean rate
+    "arrival": "poisson",
+    "timeout": 60,
+    "upstream": {},
+    "servers": {},
+}
+
+PERCENTILES = (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+
+def percentile(samples, fraction):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def load_scenario(path):
+    with open(path) as f:
+        scenario = dict(SCENARIO_DEFAULTS, **json.load(f))
+    scenario["name"] = os.path.splitext(os.path.basename(path))[0]
+    if "replay" in scenario:
+        scenario["replay"] = os.path.join(os.path.dirname(os.path.abspath(path)), scenario["replay"])
+    elif not scenario.get("requests"):
+        raise ValueError(f"{path} needs either \"requests\" or \"replay\"")
+    return scenario
+
+def _fill(value, fields, repeat):
+    """value with $fields substituted; lists of strings become newline-joined lines"""
+    if isinstance(value, str):
+        return string.Template(value).safe_substitute(fields)
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return "\n".join(_fill(item, fields, 1) for item in value * repeat)
+    if isinstance(value, dict):
+        return {key: _fill(item, fields, repeat) for key, item in value.items()}
+    return value
+
+def generate_requests(scenario, count):
+    """
+    count requests drawn from the scenario's weighted request templates.
+
+    Strings in a template may use $client (one of the entry's "clients"
+    simulated clients), $n (a random number, so scripts differ and miss
+    result caches) and $i (the request's sequence number). A body field
+    given as a list of lines is joined, after repeating it "repeat" times.
+    """
+    rng = random.Random(scenario["seed"])
+    entries = scenario["requests"]
+    weights = [entry.get("weight", 1) for entry in entries]
+    requests = []
+    for i in range(count):
+        entry = rng.choices(entries, weights)[0]
+        name = entry.get("name", entry["path"])
+        fields = {
+            "client": f"{name}-{rng.randrange(entry.get('clients', 1))}",
+            "n": rng.randrange(1000000),
+            "i": i,
+        }
+        repeat = entry.get("repeat", 1)
+        requests.append({
+            "name": name,
+            "target": entry["target"],
+            "path": entry["path"],
+            "body": _fill(entry.get("body", {}), fields, repeat),
+            "headers": _fill(entry.get("headers", {}), fields, repeat),
+        })
+    return requests
+
+def read_recorded(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def arrival_times(scenario, count):
+    """Seconds after the start at which each request is due"""
+    rng = random.Random(scenario["seed"] + 1)
+    rps = scenario["rps"]
+    if scenario["arrival"] == "uniform":
+        return [i / rps for i in range(count)]
+    times, t = [], 0.0
+    for _ in range(count):
+        times.append(t)
+        t += rng.expovariate(rps)
+    return times
+
+def _proc_tree(pid):
+    pids, i = [pid], 0
+    while i < len(pids):
+        try:
+            for task in os.listdir(f"/proc/{pids[i]}/task"):
+                with open(f"/proc/{pids[i]}/task/{task}/children") as f:
+                    pids.extend(int(child) for child in f.read().split())
+        except OSError:
+            pass
+        i += 1
+    return pids
+
+def _proc_usage(pid):
+    """(CPU seconds including reaped children, resident bytes) of one process"""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    with open(f"/proc/{pid}/statm") as f:
+        resident_pages = int(f.read().split()[1])
+    ticks = os.sysconf("SC_CLK_TCK")
+    # utime, stime, cutime, cstime
+    cpu = sum(int(value) for value in fields[11:15]) / ticks
+    return cpu, resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+class ResourceSampler:
+    """Samples CPU time and resident memory of a process and its children (Linux only)"""
+
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def supported():
+        return os.path.exists("/proc/self/stat")
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            cpu = rss = 0
+            for pid in _proc_tree(self.pid):
+                try:
+                    process_cpu, process_rss = _proc_usage(pid)
+                except (OSError, ValueError, IndexError):
+                    # Exited between listing and reading
+                    continue
+                cpu += process_cpu
+                rss += process_rss
+            self.samples.append((time.monotonic(), cpu, rss))
+            self._stop.wait(self.interval)
+
+    def summary(self, since):
+        """CPU use (100 = one core) and memory from time since onwards"""
+        samples = [sample for sample in self.samples if sample[0] >= since]
+        if len(samples) < 2:
+            return None
+        rates = [
+            (b[1] - a[1]) / (b[0] - a[0]) * 100
+            for a, b in zip(samples, samples[1:]) if b[0] > a[0]
+        ]
+        (t0, cpu0, _), (t1, cpu1, _) = samples[0], samples[-1]
+        return {
+            "cpu_percent_mean": round((cpu1 - cpu0) / (t1 - t0) * 100, 1),
+            "cpu_percent_peak": round(max(rates), 1),
+            "rss_mb_peak": round(max(sample[2] for sample in samples) / 2**20, 1),
+            "rss_mb_end": round(samples[-1][2] / 2**20, 1),
+        }
+
+class Server:
+    """A server subprocess, its base URL and its log file"""
+
+    def __init__(self, name, config, upstream, workdir):
+        self.name = name
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.ready_path = config.get("ready", "/")
+        fields = {"python": sys.executable, "port": self.port, "upstream": upstream, "root": ROOT}
+        command = [str(arg).format(**fields) for arg in config["command"]]
+        env = dict(os.environ, **{key: str(value).format(**fields) for key, value in config.get("env", {}).items()})
+        self.log_path = os.path.join(workdir, f"{name}.log")
+        self._log = open(self.log_path, "wb")
+        self.process = subprocess.Popen(
+            command, cwd=workdir, env=env, stdout=self._log, stderr=subprocess.STDOUT, start_new_session=True,
+        )
+
+    def wait_ready(self, timeout=30.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"{self.name} exited with status {self.process.returncode}; see {self.log_path}")
+            try:
+                httpx.get(self.url + self.ready_path, timeout=1.0)
+                return
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        raise RuntimeError(f"{self.name} did not start within {timeout:g}s; see {self.log_path}")
+
+    def stop(self):
+        if self.process.poll() is None:
+            os.killpg(self.process.pid, signal.SIGTERM)
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                os.killpg(self.process.pid, signal.SIGKILL)
+                self.process.wait()
+        self._log.close()
+
+async def send(client, base_urls, request, due, results, timeout):
+    started = time.monotonic()
+    result = {"name": request["name"], "due": due, "lag": started - due}
+    try:
+        response = await client.post(
+            base_urls[request["target"]] + request["path"],
+            json=request["body"],
+            headers=request["headers"],
+            timeout=timeout,
+        )
+        result["status"] = response.status_code
+        queue_wait = response.headers.get("X-Queue-Wait-Ms")
+        if queue_wait is not None:
+            result["queue_wait_ms"] = float(queue_wait)
+    except httpx.HTTPError as e:
+        result["status"] = type(e).__name__
+    result["latency"] = time.monotonic() - due
+    results.append(result)
+
+async def generate_load(requests, offsets, base_urls, timeout):
+    """Send each request at its offset from now; returns the start time and results"""
+    results = []
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+    async with httpx.AsyncClient(limits=limits) as client:
+        start = time.monotonic()
+        tasks = []
+        for request, offset in zip(requests, offsets):
+            delay = start + offset - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send(client, base_urls, request, start + offset, results, timeout)))
+        await asyncio.gather(*tasks)
+    return start, results
+
+def summarize(results, window):
+    """Statistics for a group of results measured over window seconds"""
+    statuses = Counter(result["status"] for result in results)
+    ok = sum(count for status, count in statuses.items() if isinstance(status, int) and status < 400)
+    latencies = [result["latency"] * 1e3 for result in results]
+    waits = [result["queue_wait_ms"] for result in results if "queue_wait_ms" in result]
+    summary = {
+        "sent": len(results),
+        "ok": ok,
+        "throughput_rps": round(ok / window, 2),
+        "error_rate": round((len(results) - ok) / len(results), 4) if results else 0.0,
+        "rejected_429": statuses.get(429, 0),
+        "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        "latency_ms": {name: percentile(latencies, fraction) for name, fraction in PERCENTILES},
+        "queue_wait_ms": {name: percentile(waits, fraction) for name, fraction in PERCENTILES} if waits else None,
+        "late_sends": sum(result["lag"] > 0.05 for result in results),
+    }
+    return summary
+
+def _ms(value):
+    return "-" if value is None else f"{value:.1f}"
+
+def print_report(report):
+    print(f"\nScenario {report['scenario']}: {report['rps']} rps for {report['duration']}s "
+          f"(after {report['warmup']}s warmup)")
+    print(f"{'requests':<16} {'sent':>6} {'ok':>6} {'rps':>7} {'err%':>6} {'429':>5} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'wait p95':>9}")
+    for name, summary in list(report["requests"].items()) + [("all", report["overall"])]:
+        latency = summary["latency_ms"]
+        wait = (summary["queue_wait_ms"] or {}).get("p95")
+        print(f"{name:<16} {summary['sent']:>6} {summary['ok']:>6} {summary['throughput_rps']:>7.1f} "
+              f"{summary['error_rate'] * 100:>6.1f} {summary['rejected_429']:>5} "
+              f"{_ms(latency['p50']):>8} {_ms(latency['p95']):>8} {_ms(latency['p99']):>8} {_ms(wait):>9}")
+    if report["overall"]["late_sends"]:
+        print(f"warning: {report['overall']['late_sends']} requests were sent over 50 ms late; "
+              f"the generator could not keep up")
+    for name, usage in report["servers"].items():
+        if usage:
+            print(f"{name:<16} cpu mean {usage['cpu_percent_mean']:.0f}%  peak {usage['cpu_percent_peak']:.0f}%  "
+                  f"rss peak {usage['rss_mb_peak']:.0f} MB  end {usage['rss_mb_end']:.0f} MB")
+    if report.get("upstream"):
+        print(f"{'upstream calls':<16} {report['upstream']['requests']} completions, "
+              f"{report['upstream']['errors']} injected errors")
+
+def start_upstream(config, workdir):
+    command = [
+        "{python}", os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_upstream.py"),
+        "--port", "{port}",
+        "--latency-ms", str(config.get("latency_ms", 0)),
+        "--jitter-ms", str(config.get("jitter_ms", 0)),
+        "--error-rate", str(config.get("error_rate", 0)),
+        "--error-status", str(config.get("error_status", 503)),
+    ]
+    if "seed" in config:
+        command += ["--seed", str(config["seed"])]
+    return Server("upstream", {"command": command, "ready": "/stats"}, "", workdir)
+
+def run(scenario, urls, record=None):
+    total = scenario["warmup"] + scenario["duration"]
+    count = int(total * scenario["rps"])
+    if "replay" in scenario:
+        recorded = read_recorded(scenario["replay"])
+        requests = [recorded[i % len(recorded)] for i in range(count)]
+        for request in requests:
+            request.setdefault("name", request["path"])
+            request.setdefault("headers", {})
+    else:
+        requests = generate_requests(scenario, count)
+    if record:
+        with open(record, "w") as f:
+            for request in requests:
+                f.write(json.dumps(request) + "\n")
+    offsets = arrival_times(scenario, count)
+
+    workdir = tempfile.mkdtemp(prefix=f"loadtest-{scenario['name']}-")
+    servers, samplers = {}, {}
+    try:
+        targets = sorted({request["target"] for request in requests} - set(urls))
+        if "api" in targets:
+            servers["upstream"] = start_upstream(scenario["upstream"], workdir)
+            servers["upstream"].wait_ready()
+        for target in targets:
+            if target not in TARGETS:
+                raise ValueError(f"Unknown target {target!r}; use one of {', '.join(TARGETS)} or --url")
+            config = dict(TARGETS[target], **scenario["servers"].get(target, {}))
+            upstream = f"{servers['upstream'].url}/v1" if "upstream" in servers else ""
+            servers[target] = Server(target, config, upstream, workdir)
+        for target in targets:
+            servers[target].wait_ready()
+        if ResourceSampler.supported():
+            for name, server in servers.items():
+                samplers[name] = ResourceSampler(server.process.pid)
+                samplers[name].start()
+
+        base_urls = dict(urls, **{name: server.url for name, server in servers.items()})
+        start, results = asyncio.run(generate_load(requests, offsets, base_urls, scenario["timeout"]))
+        measured = [result for result in results if result["due"] >= start + scenario["warmup"]]
+        window = max(max((r["due"] + r["latency"] for r in measured), default=0) - (start + scenario["warmup"]),
+                     scenario["duration"])
+
+        groups = defaultdict(list)
+        for result in measured:
+            groups[result["name"]].append(result)
+        upstream_stats = None
+        if "upstream" in servers:
+            upstream_stats = httpx.get(servers["upstream"].url + "/stats").json()
+        for sampler in samplers.values():
+            sampler.stop()
+        report = {
+            "scenario": scenario["name"],
+            "rps": scenario["rps"],
+            "duration": scenario["duration"],
+            "warmup": scenario["warmup"],
+            "requests": {name: summarize(group, window) for name, group in sorted(groups.items())},
+            "overall": summarize(measured, window),
+            "servers": {name: sampler.summary(start + scenario["warmup"]) for name, sampler in samplers.items()},
+            "upstream": upstream_stats,
+        }
+    finally:
+        for sampler in samplers.values():
+            if sampler._thread.is_alive():
+                sampler.stop()
+        for server in servers.values():
+            server.stop()
+    shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenario", help="scenario JSON file")
+    parser.add_argument("--rps", type=float, help="override the scenario's request rate")
+    parser.add_argument("--duration", type=float, help="override the measured duration in seconds")
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--record", help="write the requests sent as JSONL, for replaying later")
+    parser.add_argument("--url", action="append", default=[], metavar="NAME=URL",
+                        help="send a target's requests to a running server instead of starting one")
+    args = parser.parse_args()
+
+    scenario = load_scenario(args.scenario)
+    if args.rps:
+        scenario["rps"] = args.rps
+    if args.duration:
+        scenario["duration"] = args.duration
+    urls = dict(item.split("=", 1) for item in args.url)
+    report = run(scenario, urls, record=args.record)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,18 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 import subprocess
 import os
 import logging
+from typing import Any, Dict, Optional, Tuple
 from fastapi.middleware.cors import CORSMiddleware
-import openai
 from dotenv import load_dotenv
 
+from code_cache import CodeCache
+from llm_client import AsyncTranslationClient
+from scheduler import AsyncFairScheduler, QueueFull, QueueTimeout
+from statement_translation import StatementCache, StatementTranslator
+
 # Load environment variables
 load_dotenv()
 
@@ -14,7 +20,9 @@ load_dotenv()
 api_key = os.getenv("OPENAI_API_KEY")
 if not api_key:
     raise ValueError("OPENAI_API_KEY not found in environment variables")
-openai.api_key = api_key
+
+# Pooled async client; OPENAI_BASE_URL can point it at a local stand-in server
+llm_client = AsyncTranslationClient.from_env(api_key=api_key)
 
 # Configure logging
 logging.basicConfig(
@@ -28,6 +36,10 @@ logging.basicConfig(
 
 app = FastAPI()
 
+@app.on_event("shutdown")
+async def close_llm_client():
+    await llm_client.aclose()
+
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -37,22 +49,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-class CodeRequest(BaseModel):
-    input: str
-    is_natural_language: bool = False
-
-class CodeResponse(BaseModel):
-    output: str
-    generated_code: str = None
-
-def process_natural_language(input_text: str) -> str:
-    """Convert natural language to Python code using OpenAI."""
-    try:
-        logging.info(f"Processing natural language input: {input_text}")
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": """You are a Python code generator that converts natural language instructions into executable Python code. Convert simple instructions into Python code.
+CODE_GENERATION_PROMPT = """You are a Python code generator that converts natural language instructions into executable Python code. Convert simple instructions into Python code.
 
 Examples:
 
@@ -74,64 +71,129 @@ Guidelines:
 - No comments or explanations
 - Create variables with exactly the names specified
 - Keep code extremely simple
-- Focus on basic operations: variables, printing, lists, simple loops"""},
+- Focus on basic operations: variables, printing, lists, simple loops"""
+
+# Per-statement translation cache shared by all requests in this process
+statement_translator = StatementTranslator(
+    llm_client,
+    CODE_GENERATION_PROMPT,
+    cache=StatementCache(max_entries=int(os.getenv("STATEMENT_CACHE_SIZE", "10000"))),
+    max_batch_size=int(os.getenv("STATEMENT_BATCH_SIZE", "8")),
+)
+
+# Compiled generated code, shared on disk by every worker (CODE_CACHE_DIR)
+code_cache = CodeCache.from_env()
+
+# Fair queuing of executions across clients (SCHEDULER_* settings)
+scheduler = AsyncFairScheduler.from_env()
+
+class CodeRequest(BaseModel):
+    input: str
+    is_natural_language: bool = False
+    # Translate and cache each statement separately instead of the whole input
+    per_statement: bool = False
+    # Clients without an X-API-Key header are scheduled by session, then by address
+    session_id: Optional[str] = None
+
+class CodeResponse(BaseModel):
+    output: str
+    generated_code: Optional[str] = None
+    # Per-call statistics when the input was translated per statement
+    translation_stats: Optional[Dict[str, Any]] = None
+
+async def process_natural_language(input_text: str) -> str:
+    """Convert natural language to Python code using OpenAI."""
+    try:
+        logging.info(f"Processing natural language input: {input_text}")
+        reply = await llm_client.chat(
+            messages=[
+                {"role": "system", "content": CODE_GENERATION_PROMPT},
                 {"role": "user", "content": input_text}
             ],
             temperature=0.1,  # Lower temperature for more consistent output
             max_tokens=150
         )
-        generated_code = response.choices[0].message.content.strip()
+        generated_code = reply.strip()
         logging.info(f"Generated code: {generated_code}")
         return generated_code
     except Exception as e:
         logging.error(f"OpenAI API error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating code: {str(e)}")
 
+async def process_statements(input_text: str) -> Tuple[str, dict]:
+    """Convert natural language to Python code one cached statement at a time."""
+    try:
+        logging.info(f"Processing natural language input per statement: {input_text}")
+        generated_code, stats = await statement_translator.translate(input_text)
+        logging.info(f"Generated code: {generated_code} ({stats})")
+        return generated_code, stats
+    except Exception as e:
+        logging.error(f"OpenAI API error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error generating code: {str(e)}")
+
+def client_id(request: CodeRequest, http_request: Request) -> str:
+    """
+    Who a request is scheduled for: its API key, else its session, else its
+    address.
+
+    The key and session id are taken as sent, not checked, so a client that
+    sends a new one with every request gets a fresh per-client queue each
+    time. Per-client caps and weights only hold behind a gateway that
+    validates X-API-Key; the total queue cap (SCHEDULER_QUEUE) still bounds
+    every client together.
+    """
+    api_key = http_request.headers.get("X-API-Key")
+    if api_key:
+        return api_key
+    if request.session_id:
+        return request.session_id
+    return f"addr:{http_request.client.host if http_request.client else 'unknown'}"
+
 @app.post("/api/execute")
-async def execute_code(request: CodeRequest) -> CodeResponse:
+async def execute_code(request: CodeRequest, http_request: Request, response: Response) -> CodeResponse:
     try:
         # Process natural language if needed
-        code_to_execute = process_natural_language(request.input) if request.is_natural_language else request.input
+        translation_stats = None
+        if not request.is_natural_language:
+            code_to_execute = request.input
+        elif request.per_statement:
+            code_to_execute, translation_stats = await process_statements(request.input)
+        else:
+            code_to_execute = await process_natural_language(request.input)
         
         # Log the code being executed
         logging.info(f"Executing code:\n{code_to_execute}")
         
-        # Create a temporary file with the Python code
-        temp_file = "temp.py"
-        with open(temp_file, "w") as f:
-            f.write(code_to_execute)
-
-        try:
-            # Execute the code
-            result = subprocess.run(
-                ["python3", temp_file],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-
-            # Log the execution result
-            logging.info(f"Execution completed with return code: {result.returncode}")
-            if result.stdout:
-                logging.info(f"stdout:\n{result.stdout}")
-            if result.stderr:
-                logging.error(f"stderr:\n{result.stderr}")
-
-            # Combine stdout and stderr for output
-            output = result.stdout
-            if result.stderr:
-                output += f"\nErrors:\n{result.stderr}"
-
-            return CodeResponse(
-                output=output,
-                generated_code=code_to_execute if request.is_natural_language else None
-            )
-
-        finally:
-            # Clean up the temporary file
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
+        # Run the code in a fresh interpreter once this client's turn comes;
+        # repeated snippets skip compilation
+        result, ticket = await scheduler.run_in_thread(
+            client_id(request, http_request), len(code_to_execute), code_cache.run, code_to_execute, timeout=30
+        )
+        response.headers["X-Queue-Wait-Ms"] = f"{ticket.queue_wait * 1e3:.1f}"
+        response.headers["X-Exec-Ms"] = f"{ticket.exec_time * 1e3:.1f}"
+
+        # Log the execution result
+        logging.info(f"Execution completed with return code: {result.returncode}")
+        if result.stdout:
+            logging.info(f"stdout:\n{result.stdout}")
+        if result.stderr:
+            logging.error(f"stderr:\n{result.stderr}")
+
+        # Combine stdout and stderr for output
+        output = result.stdout
+        if result.stderr:
+            output += f"\nErrors:\n{result.stderr}"
+
+        return CodeResponse(
+            output=output,
+            generated_code=code_to_execute if request.is_natural_language else None,
+            translation_stats=translation_stats
+        )
 
+    except QueueFull as e:
+        return JSONResponse(status_code=429, content={"detail": str(e)}, headers={"Retry-After": "1"})
+    except QueueTimeout as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except subprocess.TimeoutExpired:
         logging.error("Code execution timed out")
         raise HTTPException(status_code=408, detail="Code execution timed out")
@@ -139,13 +201,27 @@ async def execute_code(request: CodeRequest) -> CodeResponse:
         logging.error(f"Error executing code: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/translation_stats")
+async def translation_stats():
+    """Cumulative per-statement cache hit ratio and upstream token usage"""
+    return statement_translator.stats()
+
+@app.get("/api/code_cache_stats")
+async def code_cache_stats():
+    """Compiled-code cache hit ratio and compile time spent and saved"""
+    return code_cache.stats()
+
+@app.get("/api/scheduler_stats")
+async def scheduler_stats():
+    """Execution queue depth, rejections, and queue wait and execution times"""
+    return scheduler.stats()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint that also verifies OpenAI API key"""
     try:
         # Test OpenAI API key
-        openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
+        await llm_client.complete(
             messages=[{"role": "user", "content": "test"}],
             max_tokens=5
         )
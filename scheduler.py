@@ -0,0 +1,89 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Tuple
+
+from backend.app.fair_queue import FairQueue, QueueFull, QueueTimeout, Ticket, parse_weights
+
+__all__ = ["AsyncFairScheduler", "AsyncTicket", "QueueFull", "QueueTimeout", "parse_weights"]
+
+class AsyncTicket(Ticket):
+    """A ticket whose future completes when its job may run"""
+
+    __slots__ = ("future",)
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+
+    def notify(self):
+        self.future.set_result(None)
+
+class AsyncFairScheduler(FairQueue):
+    """
+    Weighted fair queuing of code executions from many clients, for one
+    event loop. The queue itself is the backend's FairQueue; this adds
+    waiting on the loop. All calls must come from the loop's thread.
+    """
+
+    ticket_class = AsyncTicket
+
+    @classmethod
+    def from_env(cls) -> "AsyncFairScheduler":
+        return cls(
+            max_concurrency=int(os.getenv("SCHEDULER_CONCURRENCY", "4")),
+            short_reserved=int(os.getenv("SCHEDULER_SHORT_RESERVED", "1")),
+            max_queue_per_client=int(os.getenv("SCHEDULER_CLIENT_QUEUE", "8")),
+            max_queue=int(os.getenv("SCHEDULER_QUEUE", "256")),
+            short_job_size=int(os.getenv("SCHEDULER_SHORT_JOB_BYTES", "200")),
+            max_wait=float(os.getenv("SCHEDULER_MAX_WAIT", "30")),
+            weights=parse_weights(os.getenv("SCHEDULER_WEIGHTS")),
+        )
+
+    async def wait(self, ticket: AsyncTicket):
+        """Wait until ticket may run; raises QueueTimeout after max_wait"""
+        try:
+            await asyncio.wait_for(asyncio.shield(ticket.future), self.max_wait)
+        except asyncio.TimeoutError:
+            self._abandon(ticket)
+            self.timed_out += 1
+            raise QueueTimeout(f"Waited more than {self.max_wait:g}s for an execution slot")
+        except asyncio.CancelledError:
+            # The client went away; give up the place in the queue, or the slot
+            self._abandon(ticket)
+            raise
+
+    @asynccontextmanager
+    async def slot(self, client: str, size: int) -> AsyncIterator[AsyncTicket]:
+        """Run the body once client's job is scheduled"""
+        ticket = self.submit(client, size)
+        await self.wait(ticket)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    async def run_in_thread(self, client: str, size: int, function: Callable[..., Any], *args, **kwargs) -> Tuple[Any, AsyncTicket]:
+        """
+        Call function in a worker thread once client's job is scheduled, and
+        return its result and the ticket. A thread cannot be stopped, so if
+        the caller is cancelled the slot stays taken until function returns.
+        """
+        ticket = self.submit(client, size)
+        await self.wait(ticket)
+        job = asyncio.ensure_future(asyncio.to_thread(function, *args, **kwargs))
+
+        def finished(job: "asyncio.Future[Any]"):
+            self.release(ticket)
+            if not job.cancelled():
+                # Retrieve the exception, in case the caller has gone away
+                job.exception()
+
+        job.add_done_callback(finished)
+        return await asyncio.shield(job), ticket
+
+    def _abandon(self, ticket: AsyncTicket):
+        if ticket.started is not None:
+            self.release(ticket)
+            return
+        self.cancel(ticket)
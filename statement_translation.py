@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from llm_client import AsyncTranslationClient
+
+BATCH_INSTRUCTIONS = """Translate each numbered instruction below independently.
+Reply with one section per instruction, in the same order, each starting with
+a header line of the form "### <number>" followed only by that instruction's
+Python code.
+
+"""
+
+_SECTION_HEADER = re.compile(r'^###\s*(\d+)\s*$', re.MULTILINE)
+_FENCE = re.compile(r'^```(?:python)?\s*$', re.MULTILINE)
+# Quoted text, up to the closing quote or the end of the line
+_QUOTED = re.compile(r'"[^"]*(?:"|$)|\'[^\']*(?:\'|$)')
+_WHITESPACE = re.compile(r'\s+')
+
+def split_statements(text: str) -> List[str]:
+    """
+    Split natural language input into statements, one per line.
+
+    Indented lines belong to the statement above them, so a block such as
+    "repeat 3 times:" followed by its body is translated as one unit.
+    """
+    statements: List[List[str]] = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        if statements and line[:1] in (' ', '\t'):
+            statements[-1].append(line.rstrip())
+        else:
+            statements.append([line.strip()])
+    return ['\n'.join(lines) for lines in statements]
+
+def _normalize_line(line: str) -> str:
+    """Collapse runs of whitespace outside quotes; keep the indentation"""
+    body = line.lstrip()
+    parts = []
+    position = 0
+    for quoted in _QUOTED.finditer(body):
+        parts.append(_WHITESPACE.sub(' ', body[position:quoted.start()]))
+        parts.append(quoted.group())
+        position = quoted.end()
+    parts.append(_WHITESPACE.sub(' ', body[position:]))
+    return line[:len(line) - len(body)] + ''.join(parts).rstrip()
+
+def normalize_statement(statement: str) -> str:
+    """
+    Cache key for a statement. Only differences that cannot change the
+    translation are removed: Unicode composition, blank lines, and spacing
+    outside quoted text. Indentation, case and punctuation are kept.
+    """
+    statement = unicodedata.normalize('NFC', statement)
+    lines = [_normalize_line(line) for line in statement.split('\n')]
+    return '\n'.join(line for line in lines if line.strip())
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English)"""
+    return len(text) // 4 + 1
+
+def parse_batch_reply(reply: str, count: int) -> Optional[List[str]]:
+    """Split a batched reply into per-statement code, or None if malformed"""
+    reply = _FENCE.sub('', reply)
+    headers = list(_SECTION_HEADER.finditer(reply))
+    if [int(h.group(1)) for h in headers] != list(range(1, count + 1)):
+        return None
+    sections = []
+    for index, header in enumerate(headers):
+        end = headers[index + 1].start() if index + 1 < len(headers) else len(reply)
+        sections.append(reply[header.end():end].strip('\n').rstrip())
+    return sections
+
+class StatementCache:
+    """LRU cache of normalized statement -> generated code"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+
+    def get(self, key: str) -> Optional[str]:
+        code = self._entries.get(key)
+        if code is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        # Prompt and completion tokens a fresh translation would have cost
+        self.tokens_saved += estimate_tokens(key) + estimate_tokens(code)
+        return code
+
+    def put(self, key: str, code: str):
+        self._entries[key] = code
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'tokens_saved': self.tokens_saved,
+        }
+
+class StatementTranslator:
+    """
+    Translate input statement by statement, caching each one.
+
+    Only statements missing from the cache go upstream, batched into a single
+    request; the generated code is then reassembled in input order.
+    """
+
+    def __init__(
+        self,
+        client: AsyncTranslationClient,
+        system_prompt: str,
+        cache: Optional[StatementCache] = None,
+        temperature: float = 0.1,
+        max_tokens_per_statement: int = 150,
+        max_batch_size: int = 8,
+    ):
+        self.client = client
+        self.system_prompt = system_prompt
+        self.cache = cache if cache is not None else StatementCache()
+        self.temperature = temperature
+        self.max_tokens_per_statement = max_tokens_per_statement
+        # Statements per upstream request, which keeps its max_tokens within
+        # the model's completion limit
+        self.max_batch_size = max_batch_size
+        self.upstream_requests = 0
+        self.upstream_tokens = 0
+
+    async def _request(self, prompt: str, max_tokens: int) -> Tuple[str, int]:
+        """The reply to prompt and the tokens it used"""
+        response = await self.client.complete(
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=self.temperature,
+            max_tokens=max_tokens,
+        )
+        usage = response.get("usage") or {}
+        tokens = usage.get("total_tokens") or estimate_tokens(prompt)
+        self.upstream_requests += 1
+        self.upstream_tokens += tokens
+        choices = response.get("choices") or []
+        return (choices[0]["message"]["content"].strip() if choices else ""), tokens
+
+    async def _translate_one(self, statement: str) -> Tuple[List[str], int]:
+        code, tokens = await self._request(statement, self.max_tokens_per_statement)
+        return [code], tokens
+
+    async def _translate_batch(self, statements: List[str]) -> Tuple[List[str], int]:
+        """Code for each statement, sent in one request, and the tokens used"""
+        if len(statements) == 1:
+            return await self._translate_one(statements[0])
+
+        prompt = BATCH_INSTRUCTIONS + '\n'.join(
+            f"{number}. {statement}" for number, statement in enumerate(statements, start=1)
+        )
+        reply, tokens = await self._request(prompt, self.max_tokens_per_statement * len(statements))
+        sections = parse_batch_reply(reply, len(statements))
+        if sections is not None:
+            return sections, tokens
+
+        # The model did not follow the section format; translate one by one
+        logging.warning("Malformed batched translation; retrying statements individually")
+        results = await asyncio.gather(*(self._translate_one(statement) for statement in statements))
+        return [codes[0] for codes, _ in results], tokens + sum(used for _, used in results)
+
+    async def translate(self, text: str) -> Tuple[str, Dict[str, Any]]:
+        """Return the generated code for text and statistics for this call"""
+        statements = split_statements(text)
+        keys = [normalize_statement(statement) for statement in statements]
+        # Counted here rather than as differences of the shared totals, which
+        # concurrent calls also add to
+        tokens_used = 0
+        tokens_saved = 0
+
+        translated: Dict[str, str] = {}
+        pending: List[str] = []
+        pending_keys = set()
+        hits = 0
+        for key in keys:
+            if key in translated or key in pending_keys:
+                hits += 1
+                continue
+            code = self.cache.get(key)
+            if code is None:
+                pending.append(key)
+                pending_keys.add(key)
+            else:
+                translated[key] = code
+                hits += 1
+                tokens_saved += estimate_tokens(key) + estimate_tokens(code)
+
+        batches = [pending[start:start + self.max_batch_size] for start in range(0, len(pending), self.max_batch_size)]
+        for batch, (codes, tokens) in zip(batches, await asyncio.gather(*map(self._translate_batch, batches))):
+            tokens_used += tokens
+            for key, code in zip(batch, codes):
+                self.cache.put(key, code)
+                translated[key] = code
+
+        generated_code = '\n'.join(translated[key] for key in keys)
+        stats = {
+            'statements': len(keys),
+            'cache_hits': hits,
+            'translated': len(pending),
+            'hit_ratio': hits / len(keys) if keys else 0.0,
+            'upstream_tokens': tokens_used,
+            'tokens_saved': tokens_saved,
+        }
+        return generated_code, stats
+
+    def stats(self) -> Dict[str, Any]:
+        """Cumulative statistics since startup"""
+        stats = self.cache.stats()
+        stats['upstream_requests'] = self.upstream_requests
+        stats['upstream_tokens'] = self.upstream_tokens
+        return stats
@@ -0,0 +1,108 @@
+import importlib.util
+import os
+import stat
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from code_cache import HEADER, CodeCache
+
+class CacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmpdir.name, "cache")
+        self.cache = CodeCache(self.directory)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+class TestLookups(CacheTestCase):
+    def test_entries_are_keyed_by_source(self):
+        first = self.cache.get_or_compile("x = 1")
+        self.assertEqual(self.cache.get_or_compile("x = 1"), first)
+        second = self.cache.get_or_compile("x = 2")
+        self.assertNotEqual(second, first)
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["stale"]), (1, 2, 0))
+
+    def test_other_magic_number_is_recompiled(self):
+        path = self.cache.get_or_compile("x = 1")
+        with open(path, "r+b") as f:
+            f.write(b"\0\0\0\0")
+        self.assertEqual(self.cache.get_or_compile("x = 1"), path)
+        self.assertEqual(self.cache.stats()["stale"], 1)
+        with open(path, "rb") as f:
+            self.assertEqual(HEADER.unpack(f.read(HEADER.size))[0], importlib.util.MAGIC_NUMBER)
+
+    def test_corrupt_entries_are_recompiled(self):
+        path = self.cache.get_or_compile("print('ok')")
+        with open(path, "r+b") as f:
+            f.truncate(HEADER.size - 1)
+        self.assertEqual(self.cache.run("print('ok')").stdout, "ok\n")
+        self.assertEqual((self.cache.stats()["misses"], self.cache.stats()["stale"]), (2, 0))
+        # A digest that does not match the file name
+        other = self.cache.get_or_compile("print('other')")
+        os.replace(other, path)
+        self.assertEqual(self.cache.run("print('ok')").stdout, "ok\n")
+        self.assertEqual(self.cache.stats()["stale"], 1)
+
+    def test_oldest_entries_are_evicted(self):
+        paths = [self.cache.get_or_compile(f"x = {n}") for n in range(5)]
+        for age, path in enumerate(reversed(paths)):
+            os.utime(path, (time.time() - age * 10,) * 2)
+        CodeCache(self.directory, max_entries=3).prune()
+        self.assertEqual([os.path.exists(path) for path in paths], [False, False, True, True, True])
+
+    def test_writes_prune_the_directory(self):
+        cache = CodeCache(self.directory, max_entries=3)
+        for n in range(10):
+            cache.get_or_compile(f"x = {n}")
+        entries = [name for name in os.listdir(self.directory) if name.endswith(".bin")]
+        self.assertLessEqual(len(entries), 4)
+
+class TestDirectory(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    @unittest.skipUnless(hasattr(os, "getuid"), "POSIX permissions only")
+    def test_directory_is_private(self):
+        directory = os.path.join(self.tmpdir.name, "cache")
+        CodeCache(directory)
+        self.assertEqual(stat.S_IMODE(os.stat(directory).st_mode) & 0o077, 0)
+        shared = os.path.join(self.tmpdir.name, "shared")
+        os.mkdir(shared)
+        os.chmod(shared, 0o777)
+        with self.assertRaises(PermissionError):
+            CodeCache(shared)
+
+    def test_default_directory_is_per_user(self):
+        with mock.patch.dict(os.environ, {"CODE_CACHE_DIR": "", "XDG_CACHE_HOME": self.tmpdir.name}):
+            cache = CodeCache.from_env()
+        self.assertTrue(cache.directory.startswith(self.tmpdir.name))
+
+class TestRunner(CacheTestCase):
+    def test_runs_as_a_script_in_the_working_directory(self):
+        source = "import os, sys\nprint(os.path.dirname(__file__) == os.getcwd(), sys.path[0] == os.getcwd())"
+        cwd = os.getcwd()
+        os.chdir(self.tmpdir.name)
+        try:
+            result = self.cache.run(source)
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(result.stdout, "True True\n")
+
+    def test_tracebacks_quote_the_source(self):
+        result = self.cache.run("x = 1\nraise ValueError('boom')")
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("raise ValueError('boom')", result.stderr)
+        self.assertNotIn("code_runner", result.stderr)
+
+if __name__ == '__main__':
+    unittest.main()
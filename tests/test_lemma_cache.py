@@ -0,0 +1,83 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from lemma_cache import LemmaCache
+
+try:
+    import nltk  # noqa: F401
+except ImportError:
+    nltk = None
+
+def strip_s(token):
+    return token[:-1] if token.endswith('s') else token
+
+class CountingLemmatizer:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, token):
+        self.calls.append(token)
+        return strip_s(token)
+
+class TestLemmaCache(unittest.TestCase):
+    def test_hits_skip_the_lemmatizer(self):
+        lemmatizer = CountingLemmatizer()
+        cache = LemmaCache(lemmatizer, max_size=10)
+        self.assertEqual(cache.lemmatize('cats'), 'cat')
+        self.assertEqual(cache.lemmatize('cats'), 'cat')
+        self.assertEqual(lemmatizer.calls, ['cats'])
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_rate']), (1, 1, 0.5))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        lemmatizer = CountingLemmatizer()
+        cache = LemmaCache(lemmatizer, max_size=2)
+        cache.lemmatize('cats')
+        cache.lemmatize('dogs')
+        cache.lemmatize('cats')
+        cache.lemmatize('birds')
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats()['evictions'], 1)
+        cache.lemmatize('cats')
+        cache.lemmatize('dogs')
+        self.assertEqual(lemmatizer.calls, ['cats', 'dogs', 'birds', 'dogs'])
+
+    def test_strings_are_interned(self):
+        cache = LemmaCache(strip_s)
+        first = cache.lemmatize(''.join(['cat', 's']))
+        second = cache.lemmatize(''.join(['ca', 'ts']))
+        self.assertIs(first, second)
+        # An unchanged word keeps the token object as its lemma
+        token = cache.lemmatize(''.join(['do', 'g']))
+        self.assertIs(token, cache.lemmatize('dog'))
+
+    def test_clear_and_size_limit(self):
+        cache = LemmaCache(strip_s)
+        cache.lemmatize('cats')
+        cache.clear()
+        self.assertEqual((len(cache), cache.hits, cache.misses), (0, 0, 0))
+        with self.assertRaises(ValueError):
+            LemmaCache(strip_s, max_size=0)
+
+@unittest.skipIf(nltk is None, "nltk is not installed")
+class TestTextProcessor(unittest.TestCase):
+    def test_lemmas_come_from_the_cache(self):
+        from text_processor import TextProcessor
+
+        class Lemmatizer:
+            lemmatize = staticmethod(strip_s)
+
+        processor = TextProcessor(lemmatizer=Lemmatizer())
+        try:
+            result = processor.process_text("Cats chase cats.")
+        except LookupError:
+            self.skipTest("nltk tokenizer data is not installed")
+        self.assertEqual(result['lemmatized'], ['cat', 'chase', 'cat'])
+        self.assertEqual(result['word_frequencies'], {'cat': 2, 'chase': 1})
+        self.assertEqual(processor.cache_stats()['hits'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
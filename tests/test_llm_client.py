@@ -0,0 +1,187 @@
+import asyncio
+import os
+import sys
+import time
+import unittest
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from llm_client import AsyncTranslationClient, LLMError, LLMTimeout
+
+MESSAGES = [{"role": "user", "content": "print hi"}]
+
+def completion(content="print('hi')"):
+    return httpx.Response(200, json={"choices": [{"message": {"role": "assistant", "content": content}}]})
+
+def make_client(handler, **kwargs):
+    settings = dict(api_key="test", base_url="http://upstream", backoff_base=0.001, backoff_max=0.01, timeout=5)
+    settings.update(kwargs)
+    return AsyncTranslationClient(transport=httpx.MockTransport(handler), **settings)
+
+def run(coroutine_function):
+    return asyncio.run(coroutine_function())
+
+class TestRetries(unittest.TestCase):
+    def test_retries_transient_errors(self):
+        replies = [httpx.Response(503), httpx.Response(429), completion()]
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return replies[len(calls) - 1]
+
+        async def main():
+            client = make_client(handler)
+            try:
+                return await client.chat(MESSAGES)
+            finally:
+                await client.aclose()
+
+        self.assertEqual(run(main), "print('hi')")
+        self.assertEqual(len(calls), 3)
+
+    def test_client_errors_are_not_retried(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(400, text="bad request")
+
+        async def main():
+            client = make_client(handler)
+            try:
+                await client.chat(MESSAGES)
+            finally:
+                await client.aclose()
+
+        with self.assertRaises(LLMError) as caught:
+            run(main)
+        self.assertEqual(caught.exception.status_code, 400)
+        self.assertEqual(len(calls), 1)
+
+    def test_gives_up_after_max_retries(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(502)
+
+        async def main():
+            client = make_client(handler, max_retries=2)
+            try:
+                await client.chat(MESSAGES)
+            finally:
+                await client.aclose()
+
+        with self.assertRaises(LLMError) as caught:
+            run(main)
+        self.assertEqual(caught.exception.status_code, 502)
+        self.assertEqual(len(calls), 3)
+
+    def test_malformed_responses_are_retried(self):
+        replies = [
+            httpx.Response(200, text="not json"),
+            httpx.Response(200, json={"id": "no choices"}),
+            httpx.Response(200, json={"choices": [{"text": "legacy"}]}),
+            completion("x = 1"),
+        ]
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return replies[len(calls) - 1]
+
+        async def main():
+            client = make_client(handler)
+            try:
+                return await client.chat(MESSAGES)
+            finally:
+                await client.aclose()
+
+        self.assertEqual(run(main), "x = 1")
+        self.assertEqual(len(calls), 4)
+
+    def test_malformed_response_is_an_llm_error(self):
+        async def main():
+            client = make_client(lambda request: httpx.Response(200, text="<html>"), max_retries=1)
+            try:
+                await client.chat(MESSAGES)
+            finally:
+                await client.aclose()
+
+        with self.assertRaises(LLMError):
+            run(main)
+
+    def test_backoff_honours_retry_after(self):
+        client = AsyncTranslationClient(api_key="test", backoff_base=0.001, backoff_max=8)
+        self.assertGreaterEqual(client._backoff(0, "2"), 2)
+        # Capped at backoff_max, and ignored when not a number of seconds
+        self.assertLessEqual(client._backoff(0, "60"), 8)
+        self.assertLessEqual(client._backoff(0, "soon"), 0.001)
+
+class TestDeadlines(unittest.TestCase):
+    def test_slow_upstream_hits_the_deadline(self):
+        async def handler(request):
+            await asyncio.sleep(1)
+            return completion()
+
+        async def main():
+            client = make_client(handler)
+            try:
+                await client.chat(MESSAGES, timeout=0.1)
+            finally:
+                await client.aclose()
+
+        start = time.monotonic()
+        with self.assertRaises(LLMTimeout):
+            run(main)
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_waiting_for_a_slot_counts_against_the_deadline(self):
+        async def handler(request):
+            await asyncio.sleep(0.5)
+            return completion()
+
+        async def main():
+            client = make_client(handler, max_in_flight=1)
+            try:
+                first = asyncio.create_task(client.chat(MESSAGES))
+                await asyncio.sleep(0.01)
+                start = time.monotonic()
+                with self.assertRaises(LLMTimeout):
+                    await client.chat(MESSAGES, timeout=0.1)
+                waited = time.monotonic() - start
+                await first
+                return waited
+            finally:
+                await client.aclose()
+
+        self.assertLess(run(main), 0.3)
+
+class TestConcurrency(unittest.TestCase):
+    def test_in_flight_requests_are_capped(self):
+        in_flight = 0
+        peak = 0
+
+        async def handler(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.02)
+            in_flight -= 1
+            return completion()
+
+        async def main():
+            client = make_client(handler, max_in_flight=2)
+            try:
+                return await asyncio.gather(*(client.chat(MESSAGES) for _ in range(8)))
+            finally:
+                await client.aclose()
+
+        self.assertEqual(len(run(main)), 8)
+        self.assertEqual(peak, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import asyncio
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from scheduler import AsyncFairScheduler, QueueTimeout
+
+def run(coroutine_function):
+    return asyncio.run(coroutine_function())
+
+class TestAsyncFairScheduler(unittest.TestCase):
+    def test_clients_are_interleaved(self):
+        order = []
+
+        async def job(scheduler, client):
+            async with scheduler.slot(client, 100):
+                order.append(client)
+                await asyncio.sleep(0)
+
+        async def main():
+            scheduler = AsyncFairScheduler(max_concurrency=1, short_reserved=0, short_job_size=0)
+            await asyncio.gather(*(job(scheduler, client) for client in ["a"] * 3 + ["b"]))
+            return scheduler.stats()
+
+        stats = run(main)
+        self.assertEqual(order, ["a", "b", "a", "a"])
+        self.assertEqual((stats["completed"], stats["running"], stats["queued"]), (4, 0, 0))
+
+    def test_wait_timeout_frees_the_place(self):
+        async def main():
+            scheduler = AsyncFairScheduler(max_concurrency=1, max_wait=0.01)
+            async with scheduler.slot("a", 10):
+                with self.assertRaises(QueueTimeout):
+                    async with scheduler.slot("b", 10):
+                        pass
+            return scheduler.stats()
+
+        stats = run(main)
+        self.assertEqual((stats["timed_out"], stats["queued"], stats["running"]), (1, 0, 0))
+
+    def test_cancelled_caller_keeps_the_slot_until_the_thread_returns(self):
+        done = threading.Event()
+
+        async def main():
+            scheduler = AsyncFairScheduler(max_concurrency=1)
+            caller = asyncio.ensure_future(scheduler.run_in_thread("a", 10, done.wait, 5))
+            await asyncio.sleep(0.05)
+            caller.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await caller
+            running_after_cancel = scheduler.stats()["running"]
+            done.set()
+            result, ticket = await scheduler.run_in_thread("b", 10, lambda: "next")
+            return running_after_cancel, result, scheduler.stats()
+
+        running_after_cancel, result, stats = run(main)
+        self.assertEqual(running_after_cancel, 1)
+        self.assertEqual(result, "next")
+        self.assertEqual((stats["completed"], stats["running"]), (2, 0))
+
+if __name__ == '__main__':
+    unittest.main()
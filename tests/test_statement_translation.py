@@ -0,0 +1,164 @@
+import asyncio
+import importlib
+import os
+import re
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from statement_translation import (
+    StatementCache,
+    StatementTranslator,
+    normalize_statement,
+    parse_batch_reply,
+    split_statements,
+)
+
+class FakeClient:
+    """Completion client that translates "print X" lines and records prompts"""
+
+    def __init__(self):
+        self.prompts = []
+
+    async def complete(self, messages, **kwargs):
+        prompt = messages[-1]["content"]
+        self.prompts.append(prompt)
+        return {
+            "choices": [{"message": {"content": f"print({prompt!r})"}}],
+            "usage": {"total_tokens": 10},
+        }
+
+class BatchClient:
+    """Completion client that answers batched prompts section by section"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.max_tokens = []
+
+    async def complete(self, messages, max_tokens, **kwargs):
+        self.max_tokens.append(max_tokens)
+        await asyncio.sleep(self.delay)
+        prompt = messages[-1]["content"]
+        numbered = re.findall(r"^(\d+)\. (.*)$", prompt, re.MULTILINE)
+        if numbered:
+            reply = "\n".join(f"### {number}\nprint({statement!r})" for number, statement in numbered)
+        else:
+            reply = f"print({prompt!r})"
+        return {"choices": [{"message": {"content": reply}}], "usage": {"total_tokens": 100}}
+
+class TestSplitStatements(unittest.TestCase):
+    def test_one_statement_per_line(self):
+        self.assertEqual(split_statements("make x 1\n\nprint x\n"), ["make x 1", "print x"])
+
+    def test_indented_lines_join_the_block_above(self):
+        text = "repeat 3 times:\n    print hi\n    print bye\nprint done"
+        self.assertEqual(split_statements(text), ["repeat 3 times:\n    print hi\n    print bye", "print done"])
+
+class TestNormalizeStatement(unittest.TestCase):
+    def test_spacing_outside_quotes_is_collapsed(self):
+        self.assertEqual(normalize_statement("print   x  "), "print x")
+        self.assertEqual(normalize_statement("make  s  \"a   b\""), "make s \"a   b\"")
+
+    def test_quoted_spacing_is_kept(self):
+        self.assertNotEqual(normalize_statement('print "a   b"'), normalize_statement('print "a b"'))
+        self.assertNotEqual(normalize_statement("print 'a  b"), normalize_statement("print 'a b"))
+
+    def test_indentation_is_kept(self):
+        self.assertEqual(normalize_statement("repeat 2 times:\n    print  hi"), "repeat 2 times:\n    print hi")
+        self.assertNotEqual(
+            normalize_statement("if x:\n    print a\n    print b"),
+            normalize_statement("if x:\n    print a\nprint b"),
+        )
+
+    def test_punctuation_and_case_are_kept(self):
+        self.assertNotEqual(normalize_statement("print hello..."), normalize_statement("print hello"))
+        self.assertNotEqual(normalize_statement("print x;"), normalize_statement("print x"))
+        self.assertNotEqual(normalize_statement("print Name"), normalize_statement("print name"))
+
+    def test_unicode_forms_share_a_key(self):
+        self.assertEqual(normalize_statement("print caf\u00e9"), normalize_statement("print cafe\u0301"))
+
+class TestParseBatchReply(unittest.TestCase):
+    def test_sections_in_order(self):
+        reply = "```python\n### 1\nx = 1\n### 2\nfor i in range(2):\n    print(i)\n```"
+        self.assertEqual(parse_batch_reply(reply, 2), ["x = 1", "for i in range(2):\n    print(i)"])
+
+    def test_malformed_replies(self):
+        self.assertIsNone(parse_batch_reply("x = 1\ny = 2", 2))
+        self.assertIsNone(parse_batch_reply("### 1\nx = 1", 2))
+        self.assertIsNone(parse_batch_reply("### 2\nx = 1\n### 1\ny = 2", 2))
+
+class TestStatementTranslator(unittest.TestCase):
+    def test_statements_are_cached_by_key(self):
+        client = FakeClient()
+        translator = StatementTranslator(client, "system", cache=StatementCache())
+        code, stats = asyncio.run(translator.translate('print "a   b"'))
+        self.assertEqual(code, "print('print \"a   b\"')")
+        # Different quoted spacing is a different statement
+        _, stats = asyncio.run(translator.translate('print "a b"\nprint  "a   b"'))
+        self.assertEqual((stats['cache_hits'], stats['translated']), (1, 1))
+        self.assertEqual(client.prompts, ['print "a   b"', 'print "a b"'])
+
+    def test_misses_are_sent_in_bounded_batches(self):
+        client = BatchClient()
+        translator = StatementTranslator(client, "system", max_tokens_per_statement=150, max_batch_size=8)
+        text = "\n".join(f"say {n}" for n in range(30))
+        code, stats = asyncio.run(translator.translate(text))
+        self.assertEqual(code.splitlines(), [f"print('say {n}')" for n in range(30)])
+        self.assertEqual(sorted(client.max_tokens), [900, 1200, 1200, 1200])
+        self.assertEqual((stats["translated"], stats["upstream_tokens"]), (30, 400))
+
+    def test_concurrent_calls_report_their_own_usage(self):
+        translator = StatementTranslator(BatchClient(delay=0.01), "system")
+
+        async def main():
+            return await asyncio.gather(*(translator.translate(f"say {n}") for n in range(5)))
+
+        results = asyncio.run(main())
+        self.assertEqual([stats["upstream_tokens"] for _, stats in results], [100] * 5)
+        self.assertEqual(translator.stats()["upstream_tokens"], 500)
+        _, stats = asyncio.run(translator.translate("say 1\nsay 2"))
+        self.assertEqual((stats["upstream_tokens"], stats["tokens_saved"]), (0, 2 * (2 + 4)))
+
+class TestExecuteResponse(unittest.TestCase):
+    """/api/execute responses validate with and without translation fields"""
+
+    @classmethod
+    def setUpClass(cls):
+        try:
+            from fastapi.testclient import TestClient
+        except ImportError:
+            raise unittest.SkipTest("fastapi is not installed")
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.cwd = os.getcwd()
+        # main.py logs to a file in the working directory and needs a key
+        os.chdir(cls.directory.name)
+        os.environ.setdefault("OPENAI_API_KEY", "test")
+        os.environ["CODE_CACHE_DIR"] = os.path.join(cls.directory.name, "code-cache")
+        cls.main = importlib.import_module("main")
+        cls.main.statement_translator.client = FakeClient()
+        cls.client = TestClient(cls.main.app)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls.cwd)
+        cls.directory.cleanup()
+
+    def test_plain_python(self):
+        response = self.client.post("/api/execute", json={"input": "print(6 * 7)"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"output": "42\n", "generated_code": None, "translation_stats": None})
+
+    def test_per_statement_translation(self):
+        response = self.client.post(
+            "/api/execute", json={"input": "say hi", "is_natural_language": True, "per_statement": True}
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["output"], "say hi\n")
+        self.assertEqual(data["translation_stats"]["statements"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
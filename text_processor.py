@@ -1,29 +1,34 @@
 import re
-from typing import List, Dict
+import sys
+from typing import List, Dict, Optional
 from nltk.tokenize import word_tokenize
 from nltk.stem import WordNetLemmatizer
 
+from lemma_cache import LemmaCache
+
 class TextProcessor:
-    def __init__(self):
-        self.lemmatizer = WordNetLemmatizer()
-        
+    def __init__(self, lemma_cache_size: int = 50000, lemmatizer: Optional[WordNetLemmatizer] = None):
+        self.lemmatizer = lemmatizer or WordNetLemmatizer()
+        self.lemma_cache = LemmaCache(self.lemmatizer.lemmatize, max_size=lemma_cache_size)
+
     def process_text(self, text: str) -> Dict:
         """Process text using various Python concepts"""
         # Strings and RegEx
         cleaned_text = re.sub(r'[^\w\s]', '', text.lower())
-        
-        # Lists and List Comprehension
-        tokens = word_tokenize(cleaned_text)
-        lemmatized = [self.lemmatizer.lemmatize(token) for token in tokens]
-        
+
+        # Lists and List Comprehension; interning makes repeated tokens and
+        # their lemmas share one string object each
+        tokens: List[str] = [sys.intern(token) for token in word_tokenize(cleaned_text)]
+        lemmatized: List[str] = [self.lemma_cache.lemmatize(token) for token in tokens]
+
         # Sets for unique words
         unique_words = set(lemmatized)
-        
+
         # Dictionary to store word frequencies
         word_freq = {}
         for word in lemmatized:
             word_freq[word] = word_freq.get(word, 0) + 1
-            
+
         return {
             'original': text,
             'cleaned': cleaned_text,
@@ -31,4 +36,8 @@ class TextProcessor:
             'lemmatized': lemmatized,
             'unique_words': list(unique_words),
             'word_frequencies': word_freq
-        } 
\ No newline at end of file
+        }
+
+    def cache_stats(self) -> Dict:
+        """Statistics for the lemma cache"""
+        return self.lemma_cache.stats()